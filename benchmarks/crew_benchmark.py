@@ -0,0 +1,283 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+#--------------------------------#
+#      Offline Crew Benchmark    #
+#--------------------------------#
+# Every crew runs against a local scripted LLM stand-in and a fake Exa answer endpoint, so timings
+# reflect this code base and CrewAI rather than provider latency. Each scenario runs in its own
+# process (for a clean peak RSS) and working directory (so the committed output/ reports are left alone).
+#
+#   python -m benchmarks.crew_benchmark
+#   python -m benchmarks.crew_benchmark --crews research --concurrency 1 8 --llm-latency 0.5
+#   python -m benchmarks.crew_benchmark --save-baseline
+#
+# Results are compared with benchmarks/baselines.json; the exit status is 1 when a scenario
+# regressed by more than the tolerance.
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(REPO_ROOT, "benchmarks", "baselines.json")
+SAMPLE_CODE = os.path.join(REPO_ROOT, "input", "code_extractor_repo", "BMS_EV", "bms-code.c")
+CREWS = ("research", "design_thinking", "code_extractor")
+PROMPTS = {
+    "research": "Summarize the current state of solid-state EV batteries",
+    "design_thinking": "Design a better onboarding experience for a home battery app",
+    "code_extractor": "Extract the functional requirements of this battery management code",
+}
+RESULT_PREFIX = "BENCHMARK_RESULT "
+# Metrics compared with the baseline, and whether a higher value is worse
+COMPARED_METRICS = {"wall_seconds": True, "overhead_seconds": True, "peak_rss_mb": True, "throughput_per_min": False}
+
+
+#--------------------------------#
+#       Scenario (Child)         #
+#--------------------------------#
+def _params(crew, index, execution_mode):
+    selection = {"provider": "OpenAI", "model": "gpt-4o-mini", "execution_mode": execution_mode}
+    params = {"selection": selection, "user_prompt": f"{PROMPTS[crew]} (benchmark run {index})"}
+    if crew == "code_extractor":
+        from src.tools.code_chunker import iter_chunks
+        with open(SAMPLE_CODE, encoding="utf-8") as f:
+            params["code_chunks"] = list(iter_chunks(f))
+        params["source_path"] = SAMPLE_CODE
+    return params
+
+
+def _busy_seconds(intervals):
+    """Length of the union of (start, end) intervals."""
+    total, reach = 0.0, None
+    for start, end in sorted(intervals):
+        if reach is None or start > reach:
+            total += end - start
+            reach = end
+        elif end > reach:
+            total += end - reach
+            reach = end
+    return total
+
+
+def _run_once(crew, index, execution_mode):
+    """Build and run one crew with its own trace and usage meter; return its metrics."""
+    from src.components.crew_jobs import CREW_BUILDERS
+    from src.utils.output_handler import capture_thread_output
+    from src.utils.run_events import RunEvents, run_events_scope
+    from src.utils.tracing import RunTrace
+    from src.utils.usage import UsageMeter
+
+    trace = RunTrace(name=crew)
+    events = RunEvents(trace, UsageMeter())
+    start = time.perf_counter()
+    with open(os.devnull, "w") as sink, capture_thread_output(sink), run_events_scope(events):
+        agents, tasks, run_crew = CREW_BUILDERS[crew](_params(crew, index, execution_mode))
+        built = time.perf_counter()
+        run_crew(agents, tasks)
+    end = time.perf_counter()
+    events.close()
+    trace.finish()
+
+    spans = trace.snapshot()
+    breakdown = trace.breakdown()
+    stages = {}
+    for span in spans:
+        if span["kind"] == "task":
+            stage = span["attributes"].get("agent") or span["name"]
+            stages[stage] = stages.get(stage, 0.0) + span["end"] - span["start"]
+    external = _busy_seconds([(span["start"], span["end"]) for span in spans
+                              if span["kind"] in ("llm", "tool", "retrieval")])
+    return {
+        "wall_seconds": end - start,
+        "build_seconds": built - start,
+        "external_seconds": external,
+        "overhead_seconds": end - start - external,
+        "llm_seconds": breakdown.get("llm", {}).get("seconds", 0.0),
+        "llm_calls": breakdown.get("llm", {}).get("spans", 0),
+        "tool_seconds": breakdown.get("tool", {}).get("seconds", 0.0),
+        "tool_calls": breakdown.get("tool", {}).get("spans", 0),
+        "tokens": events.usage.total["tokens_in"] + events.usage.total["tokens_out"],
+        "stages": stages,
+    }
+
+
+def _mean(values):
+    values = list(values)
+    return sum(values) / len(values) if values else 0.0
+
+
+def run_scenario(crew, concurrency, execution_mode, llm_latency):
+    """Warm up once, then run `concurrency` copies of a crew at the same time.
+
+    Returns:
+        dict: Mean per-run metrics plus batch wall time, throughput and peak RSS
+    """
+    started = time.perf_counter()
+    from src.components import crew_jobs  # noqa: F401  (import cost of CrewAI and the crews)
+    import_seconds = time.perf_counter() - started
+    warmup = _run_once(crew, 0, execution_mode)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        runs = list(pool.map(lambda index: _run_once(crew, index, execution_mode), range(1, concurrency + 1)))
+    batch_seconds = time.perf_counter() - start
+
+    result = {key: _mean(run[key] for run in runs) for key in runs[0] if key != "stages"}
+    result["stages"] = {stage: _mean(run["stages"].get(stage, 0.0) for run in runs) for stage in runs[0]["stages"]}
+    # Time the client stack adds to each mock LLM request on top of the scripted latency
+    result["llm_client_overhead_seconds"] = (result["llm_seconds"] - result["llm_calls"] * llm_latency) \
+        / max(result["llm_calls"], 1)
+    result.update(
+        crew=crew,
+        concurrency=concurrency,
+        execution_mode=execution_mode,
+        import_seconds=import_seconds,
+        warmup_seconds=warmup["wall_seconds"],
+        batch_seconds=batch_seconds,
+        throughput_per_min=60.0 * concurrency / batch_seconds,
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        peak_rss_mb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024),
+    )
+    return result
+
+
+#--------------------------------#
+#        Harness (Parent)        #
+#--------------------------------#
+def _scenario_env(llm_url, exa_url, llm_latency):
+    env = dict(os.environ)
+    env.update(
+        PYTHONPATH=os.pathsep.join(filter(None, [REPO_ROOT, env.get("PYTHONPATH")])),
+        OPENAI_API_BASE=f"{llm_url}/v1",
+        OPENAI_BASE_URL=f"{llm_url}/v1",
+        OPENAI_API_KEY="benchmark",
+        EXA_API_KEY="benchmark",
+        EXA_ANSWER_URL=f"{exa_url}/answer",
+        KNOWLEDGE_EMBEDDER="local",
+        KNOWLEDGE_DIR=os.path.join(REPO_ROOT, "knowledge"),
+        KNOWLEDGE_INDEX_DIR=os.path.join(REPO_ROOT, ".cache", "knowledge_index"),
+        BENCHMARK_LLM_LATENCY=str(llm_latency),
+        CREWAI_DISABLE_TELEMETRY="true",
+        OTEL_SDK_DISABLED="true",
+    )
+    # Budgets of the real deployment must not stop a benchmark early; empty values also win over .env
+    for prefix in ("RUN",) + tuple(crew.upper() for crew in CREWS):
+        env[f"{prefix}_TOKEN_BUDGET"] = env[f"{prefix}_COST_BUDGET"] = ""
+    # Likewise the deployment's provider quotas and model routing would only measure those, not the crews
+    env["LLM_RATE_LIMITS"] = env["LLM_FALLBACKS"] = env["LLM_LATENCY_SLO"] = env["LLM_HEDGE"] = ""
+    return env
+
+
+def run_in_subprocess(crew, concurrency, execution_mode, env):
+    """Run one scenario in a fresh interpreter and working directory."""
+    with tempfile.TemporaryDirectory(prefix=f"bench-{crew}-") as workdir:
+        completed = subprocess.run(
+            [sys.executable, "-m", "benchmarks.crew_benchmark", "--scenario", crew,
+             "--concurrency", str(concurrency), "--execution-mode", execution_mode],
+            cwd=workdir, env=env, capture_output=True, text=True,
+        )
+    for line in reversed(completed.stdout.splitlines()):
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX):])
+    raise RuntimeError(f"{crew} x{concurrency} failed:\n{completed.stderr[-4000:]}")
+
+
+def scenario_key(result):
+    return f"{result['crew']}@{result['concurrency']}/{result['execution_mode']}"
+
+
+def compare_with_baseline(results, baselines, tolerance):
+    """Return a description of each metric that is worse than its baseline by more than `tolerance`."""
+    regressions = []
+    for result in results:
+        baseline = baselines.get(scenario_key(result))
+        if not baseline:
+            continue
+        for metric, higher_is_worse in COMPARED_METRICS.items():
+            before, after = baseline[metric], result[metric]
+            change = (after - before) / before if before else 0.0
+            if (change if higher_is_worse else -change) > tolerance:
+                regressions.append(f"{scenario_key(result)} {metric}: {before:.3f} -> {after:.3f} ({change:+.0%})")
+    return regressions
+
+
+def format_results(results):
+    lines = [f"{'scenario':<36}{'wall s':>9}{'overhead s':>12}{'llm s':>8}{'tool s':>8}{'calls':>7}"
+             f"{'runs/min':>10}{'rss MB':>9}{'import s':>10}"]
+    for result in results:
+        lines.append(f"{scenario_key(result):<36}{result['wall_seconds']:>9.2f}{result['overhead_seconds']:>12.2f}"
+                     f"{result['llm_seconds']:>8.2f}{result['tool_seconds']:>8.2f}{result['llm_calls']:>7.0f}"
+                     f"{result['throughput_per_min']:>10.1f}{result['peak_rss_mb']:>9.0f}{result['import_seconds']:>10.2f}")
+        for stage, seconds in result["stages"].items():
+            lines.append(f"    {stage[:40]:<40} {seconds:8.2f}s")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmarks of the research, design thinking and code extractor crews")
+    parser.add_argument("--crews", nargs="+", choices=CREWS, default=list(CREWS))
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4],
+                        help="Numbers of simultaneous runs per crew")
+    parser.add_argument("--execution-mode", choices=("sequential", "dag"), default="sequential")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Seconds per mock LLM response")
+    parser.add_argument("--exa-latency", type=float, default=0.3, help="Seconds per mock Exa answer")
+    parser.add_argument("--tool-calls", type=int, default=1, help="Tool calls per task for agents with tools")
+    parser.add_argument("--answer-words", type=int, default=300, help="Words in each final answer")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative regression")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--json", help="Also write the results to this file")
+    parser.add_argument("--scenario", choices=CREWS, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.scenario:
+        concurrency = args.concurrency[0]
+        latency = float(os.getenv("BENCHMARK_LLM_LATENCY", "0"))
+        result = run_scenario(args.scenario, concurrency, args.execution_mode, latency)
+        print(RESULT_PREFIX + json.dumps(result), flush=True)
+        return 0
+
+    from benchmarks.mock_services import start_mock_llm, start_mock_exa
+    llm = start_mock_llm(args.llm_latency, args.tool_calls, args.answer_words)
+    exa = start_mock_exa(args.exa_latency)
+    env = _scenario_env(llm.url, exa.url, args.llm_latency)
+    config = {"llm_latency": args.llm_latency, "exa_latency": args.exa_latency, "tool_calls": args.tool_calls,
+              "answer_words": args.answer_words}
+
+    results = []
+    for crew in args.crews:
+        for concurrency in args.concurrency:
+            print(f"Running {crew} x{concurrency} ({args.execution_mode})...", flush=True)
+            results.append(run_in_subprocess(crew, concurrency, args.execution_mode, env))
+    print(format_results(results))
+    print(f"Mock LLM requests: {llm.requests}, mock Exa requests: {exa.requests}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": config, "results": results}, f, indent=2)
+
+    baselines = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, encoding="utf-8") as f:
+            baselines = json.load(f)
+    if args.save_baseline:
+        baselines.update({scenario_key(result): dict(result, config=config) for result in results})
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"Baseline saved to {BASELINE_PATH}")
+        return 0
+    mismatched = {scenario_key(result) for result in results
+                  if baselines.get(scenario_key(result), {}).get("config", config) != config}
+    if mismatched:
+        print(f"Baselines for {', '.join(sorted(mismatched))} were recorded with other mock settings; "
+              f"skipping their comparison")
+    regressions = compare_with_baseline([result for result in results if scenario_key(result) not in mismatched],
+                                        baselines, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+#--------------------------------#
+#      Scripted LLM Stand-in     #
+#--------------------------------#
+# Filler for final answers; headings keep the code extractor's section parsing busy
+_ANSWER_WORDS = ("analysis requirement evidence insight the system shall report value state signal "
+                 "control data flow user need idea prototype feedback").split()
+
+
+def _text(content):
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content or ""
+
+
+def scripted_reply(messages, tool_calls_per_task=1, answer_words=300):
+    """Return the next ReAct turn CrewAI expects for a conversation.
+
+    Agents with tools call the first tool that takes a `query` argument
+    `tool_calls_per_task` times, then give a final answer; agents without
+    tools answer at once. Tool queries are derived from the conversation, so
+    concurrent runs with different prompts do not share cached answers.
+    """
+    texts = [_text(message.get("content")) for message in messages]
+    prompt = "\n".join(texts)
+    tools = [name.strip() for name, arguments in re.findall(r"Tool Name: (.+)\nTool Arguments: (.+)", prompt)
+             if "query" in arguments]
+    steps = sum(text.count("Observation:") for text in texts[1:])
+    if tools and steps < tool_calls_per_task:
+        query = f"benchmark query {hashlib.sha1(texts[-1].encode('utf-8')).hexdigest()[:12]}"
+        if "code" in tools[0].lower():
+            query = "overview"
+        return (f"Thought: I need more information before answering.\n"
+                f"Action: {tools[0]}\nAction Input: {json.dumps({'query': query})}")
+    words = " ".join(_ANSWER_WORDS[i % len(_ANSWER_WORDS)] for i in range(answer_words))
+    return f"Thought: I now know the final answer\nFinal Answer: ## Result\n\n### main\n\n{words}"
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    """OpenAI-compatible `/v1/chat/completions` endpoint with configurable latency."""
+
+    server_version = "MockLLM/1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        config = self.server.config
+        time.sleep(config["latency"])
+        content = scripted_reply(body.get("messages", []), config["tool_calls_per_task"], config["answer_words"])
+        prompt_tokens = sum(len(_text(message.get("content"))) for message in body.get("messages", [])) // 4
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(content) // 4,
+                 "total_tokens": prompt_tokens + len(content) // 4}
+        with self.server.lock:
+            self.server.requests += 1
+        if body.get("stream"):
+            self._stream(body, content, usage)
+            return
+        self._json({
+            "id": "chatcmpl-mock", "object": "chat.completion", "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": usage,
+        })
+
+    def _stream(self, body, content, usage):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        base = {"id": "chatcmpl-mock", "object": "chat.completion.chunk", "created": int(time.time()),
+                "model": body.get("model", "mock")}
+        pieces = [content[i:i + 80] for i in range(0, len(content), 80)]
+        for piece in pieces:
+            chunk = dict(base, choices=[{"index": 0, "delta": {"content": piece}, "finish_reason": None}])
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+        last = dict(base, choices=[{"index": 0, "delta": {}, "finish_reason": "stop"}], usage=usage)
+        self.wfile.write(f"data: {json.dumps(last)}\n\ndata: [DONE]\n\n".encode("utf-8"))
+
+    def _json(self, payload, status=200):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+#--------------------------------#
+#        Fake Exa Answers        #
+#--------------------------------#
+class MockExaHandler(MockLLMHandler):
+    """Stand-in for `https://api.exa.ai/answer` with configurable latency."""
+
+    server_version = "MockExa/1"
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/answer"):
+            self.send_error(404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        time.sleep(self.server.config["latency"])
+        with self.server.lock:
+            self.server.requests += 1
+        query = body.get("query", "")
+        self._json({
+            "answer": f"Benchmark answer to '{query}'. " + " ".join(_ANSWER_WORDS) * 3,
+            "citations": [{"title": f"Source {i} for {query}", "url": f"https://example.com/{i}"} for i in range(3)],
+        })
+
+
+def start_server(handler, **config):
+    """Serve `handler` on a free local port in a daemon thread.
+
+    Returns:
+        ThreadingHTTPServer: The running server; `server.url` is its base URL
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    server.config = config
+    server.requests = 0
+    server.lock = threading.Lock()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True, name=handler.server_version).start()
+    return server
+
+
+def start_mock_llm(latency=0.2, tool_calls_per_task=1, answer_words=300):
+    return start_server(MockLLMHandler, latency=latency, tool_calls_per_task=tool_calls_per_task,
+                        answer_words=answer_words)
+
+
+def start_mock_exa(latency=0.3):
+    return start_server(MockExaHandler, latency=latency)
@@ -1,68 +1,38 @@
-from crewai import Agent, Task, Crew, Process, LLM
+from src.components.crew_cache import get_agents
+from src.utils.task_graph import schedule_tasks, record_run_timing, speedup_summary
+from crewai import Agent, Task, Crew, Process
 from crewai_tools import FileReadTool
-from crewai.knowledge.source.pdf_knowledge_source import PDFKnowledgeSource
-import os
+from src.tools.custom_tool import CodeStructureTool, CodeIndexTool
+from src.tools.c_parser import summarize_structure
+from src.tools.code_index import load_code_index
+from src.tools.code_incremental import (load_state, save_state, clear_state, plan_incremental, merge_sections,
+                                        split_requirements, merge_requirements, previous_requirements_for,
+                                        requirement_id)
+from src.utils.knowledge_index import knowledge_context
+from src.utils.output_handler import capture_thread_output, current_output_sink
+from src.utils.run_events import instrument_crew, current_run_events, run_events_scope
+from concurrent.futures import ThreadPoolExecutor
 from textwrap import dedent
+import json
+import os
+import time
 from dotenv import load_dotenv
 load_dotenv()
 
+# Files of a repository analyzed concurrently
+CODE_EXTRACTOR_WORKERS = int(os.getenv("CODE_EXTRACTOR_WORKERS", "4"))
+# Size cap of the code overview inlined into the flow analysis prompts
+CODE_OVERVIEW_CHARS = int(os.getenv("CODE_OVERVIEW_CHARS", "8000"))
+# Files under knowledge/ retrieved into the requirement tasks
+REQUIREMENTS_KNOWLEDGE = ["37_Requirements_10_Best_Practices.pdf"]
+
 #--------------------------------#
 #         LLM & Research Agent   #
 #--------------------------------#
-def create_code_extractor_crew(selection, files):
-    # Instantiate knowledge source
-    pdf_knowledge_source = PDFKnowledgeSource(
-        file_paths=['37_Requirements_10_Best_Practices.pdf'])
-
-    provider = selection["provider"]
-    model = selection["model"]
-    if provider == "Anthropic":
-        llm = LLM(
-            api_key=os.getenv("ANTHROPIC_API_KEY"),
-            model=f"anthropic/{model}",
-            temperature=0.7
-        )
-    elif provider == "Ollama":
-        llm = LLM(
-            base_url="http://localhost:11434",
-            model=f"ollama/{model}",
-        )
-    elif provider == "Gemini":
-        llm = LLM(
-            api_key=os.getenv("GEMINI_API_KEY"),
-            model=f"gemini/{model}",
-        )
-    else:
-        # Map friendly names to concrete model names for OpenAI
-        if model == "GPT-3.5":
-            model = "gpt-3.5-turbo"
-        elif model == "GPT-4":
-            model = "gpt-4"
-        elif model == "o1":
-            model = "o1"
-        elif model == "o1-mini":
-            model = "o1-mini"
-        elif model == "o1-preview":
-            model = "o1-preview"
-        # If model is custom but empty, fallback
-        if not model:
-            model = "o1"
-        llm = LLM(
-            api_key=os.getenv("OPENAI_API_KEY"),
-            model=f"openai/{model}"
-        )
-    code_parser_agent = Agent(
-        role='Code Parser',
-        goal=dedent(f"""Parse and extract structural information from C code files.
-            Code:
-            {files}"""),
-        backstory=dedent("""
-            You are a meticulous code parser, expert in dissecting C code and extracting key structural elements. 
-            You have an eagle eye for detail and can identify even the most subtle nuances in code syntax and 
-            organization."""),
-        verbose=True,
-        llm=llm,
-    )
+def create_code_extractor_crew(selection):
+    return get_agents("code_extractor", selection, _build_code_extractor_agents)
+
+def _build_code_extractor_agents(llm):
     control_flow_analyzer_agent = Agent(
         role='Control Flow Analyzer Agent',
         goal='Analyze the control flow within the C code.',
@@ -89,7 +59,6 @@ def create_code_extractor_crew(selection, files):
             documentation. You understand the difference between functional and non-functional requirements and can 
             capture them accurately. You are familiar with requirements engineering best practices."""),
         verbose=True,
-        knowledge_sources=[pdf_knowledge_source],
         llm=llm,
     )
     requirement_validator_agent = Agent(
@@ -99,46 +68,77 @@ def create_code_extractor_crew(selection, files):
             completeness of requirements. You have a keen eye for inconsistencies and can identify gaps between code 
             and documentation."""),
         verbose=True,
-        knowledge_sources=[pdf_knowledge_source],
         llm=llm,
     )
-    code_extractor_agents = [code_parser_agent, control_flow_analyzer_agent, data_flow_analyzer_agent,
+    code_extractor_agents = [control_flow_analyzer_agent, data_flow_analyzer_agent,
                              requirement_synthesizer_agent, requirement_validator_agent]
     return code_extractor_agents
 
 #--------------------------------#
 #         Research Task          #
 #--------------------------------#
-def create_code_extractor_tasks(agents, user_prompt):
-    parse_code_task = Task(
-        description=dedent(f"""User Input: {user_prompt}
-                    Parse all of the C code files in the directory and extract the Abstract Syntax Tree (AST). 
-                    The AST should capture the structure and relationships between different elements in the code."""),
-        expected_output=dedent(f"""A JSON representation of the AST."""),
-        output_file='output/code_extractor/ast.json',
-        agent=agents[0]
-    )
+def index_code(code_chunks, path=None, output_dir="output/code_extractor"):
+    """Parse and index a chunked C source locally and write its structure to `ast.json`.
+
+    The parse is deterministic and takes milliseconds, so the agents only
+    reason about the code instead of transcribing its syntax. The index
+    (call graph, CFGs, def-use chains) is cached by file hash.
+
+    Returns:
+        dict: The index from `load_code_index`
+    """
+    index = load_code_index(code_chunks, path)
+    os.makedirs(output_dir, exist_ok=True)
+    with open(f"{output_dir}/ast.json", "w", encoding="utf-8") as f:
+        json.dump(index["structure"], f, indent=2)
+    return index
+
+def create_code_tools(indexes):
+    """Return the structure and index query tools over {path: index}."""
+    return [CodeStructureTool(files={path: index["structure"] for path, index in indexes.items()}),
+            CodeIndexTool(indexes=indexes)]
+
+def create_flow_analysis_tasks(agents, user_prompt, code_tools, overview, output_dir="output/code_extractor",
+                               scope_note=""):
     analyze_control_flow_task = Task(
         description=dedent(f"""User Input: {user_prompt}
-                    Analyze the control flow of the code using the AST. Identify loops, conditionals, and 
-                    function calls. Determine the possible execution paths."""),
+                    Analyze the control flow of the code using the parsed code structure. Identify loops, 
+                    conditionals, and function calls. Determine the possible execution paths. Query the call 
+                    graph tool for callers, call paths and control-flow graphs, and the code structure tool for 
+                    the statement tree of each function you need. Organize the analysis with one 
+                    `### <function name>` section per function.""") + scope_note + "\nCode overview:\n" + overview,
         expected_output=dedent(f"""A description of the control flow paths and dependencies."""),
-        output_file="output/code_extractor/control_flow_analysis.md",
-        agent=agents[1]
+        output_file=f"{output_dir}/control_flow_analysis.md",
+        tools=code_tools,
+        agent=agents[0]
     )
     analyze_data_flow_task = Task(
         description=dedent(f"""User Input: {user_prompt}
-                    Analyze the data flow of the code using the AST. Identify variable assignments,
-                    data dependencies, and data transformations."""),
+                    Analyze the data flow of the code using the parsed code structure. Identify variable 
+                    assignments, data dependencies, and data transformations. Query the data flow tool for the 
+                    writers and readers of each variable and the def-use chains of each function you need. 
+                    Organize the analysis with one `### <function name>` section per function.""")
+                    + scope_note + "\nCode overview:\n" + overview,
         expected_output=dedent(f"""A list of at least 10 creative ideas, prioritized with a short justification for each."""),
-        output_file="output/code_extractor/data_flow_analysis.md",
-        agent=agents[2]
+        output_file=f"{output_dir}/data_flow_analysis.md",
+        tools=code_tools,
+        agent=agents[1]
     )
-    synthesize_requirements_task = Task(
-        description=dedent(f"""User Input: {user_prompt}
+    return analyze_control_flow_task, analyze_data_flow_task
+
+def create_requirement_tasks(agents, user_prompt, code_tools, scope_note=""):
+    synthesize_description = dedent(f"""User Input: {user_prompt}
                     Using the control and data flow analysis, generate a set of initial requirement statements. 
                     Requirements should be clear,concise, and testable. Include both functional and non-functional 
-                    requirements. Use requirements engineering best practices."""),
+                    requirements. Use requirements engineering best practices.""")
+    validate_description = dedent(f"""User Input: {user_prompt}
+                    Validate the generated requirement statements against the original code. Ensure that each
+                    requirement is traceable to a specific code element and accurately reflects the intended behavior.
+                    Identify any discrepancies or missing requirements. Query the code structure and call graph
+                    tools to check the code elements each requirement cites.""")
+    synthesize_requirements_task = Task(
+        description=synthesize_description + scope_note
+                    + knowledge_context(REQUIREMENTS_KNOWLEDGE, synthesize_description),
         expected_output=dedent(f"""A set of requirement statements. Each requirement should be formatted as follows:
                     - Requirement ID: A unique identifier for the requirement.
                     - Requirement Statement: A clear and concise description of the requirement.
@@ -146,13 +146,11 @@ def create_code_extractor_tasks(agents, user_prompt):
                     - Type: The type of requirement (e.g., functional, non-functional).
                     - Source: The analysis or code element that the requirement is derived from."""),
         output_file="output/code_extractor/code_requirements.md",
-        agent=agents[3]
+        agent=agents[2]
     )
     validate_requirements_task = Task(
-        description=dedent(f"""User Input: {user_prompt}
-                    Validate the generated requirement statements against the original code. Ensure that each
-                    requirement is traceable to a specific code element and accurately reflects the intended behavior.
-                    Identify any discrepancies or missing requirements."""),
+        description=validate_description + scope_note
+                    + knowledge_context(REQUIREMENTS_KNOWLEDGE, validate_description),
         expected_output=dedent(f"""A set of validated requirement statements. Each requirement should be formatted as follows:
                     - Requirement ID: A unique identifier for the requirement.
                     - Requirement Statement: A clear and concise description of the requirement.
@@ -160,21 +158,239 @@ def create_code_extractor_tasks(agents, user_prompt):
                     - Type: The type of requirement (e.g., functional, non-functional).
                     - Source: The analysis or code element that the requirement is derived from."""),
         output_file="output/code_extractor/validated_requirements.md",
-        agent=agents[4]
+        tools=code_tools,
+        agent=agents[3]
     )
-    code_extractor_tasks = [parse_code_task, analyze_control_flow_task, analyze_data_flow_task,
+    return synthesize_requirements_task, validate_requirements_task
+
+def create_code_extractor_tasks(agents, user_prompt, code_chunks, execution_mode="sequential"):
+    return _create_single_file_tasks(agents, user_prompt, index_code(code_chunks), execution_mode)
+
+def _create_single_file_tasks(agents, user_prompt, index, execution_mode, flow_scope="", requirement_scope=""):
+    code_tools = create_code_tools({"<upload>": index})
+    overview = summarize_structure(index["structure"], CODE_OVERVIEW_CHARS)
+    analyze_control_flow_task, analyze_data_flow_task = create_flow_analysis_tasks(
+        agents, user_prompt, code_tools, overview, scope_note=flow_scope)
+    synthesize_requirements_task, validate_requirements_task = create_requirement_tasks(
+        agents, user_prompt, code_tools, requirement_scope)
+    if execution_mode == "dag":
+        # Control and data flow only need the local parse, so they can run side by side
+        analyze_control_flow_task.context = []
+        analyze_data_flow_task.context = []
+        synthesize_requirements_task.context = [analyze_control_flow_task, analyze_data_flow_task]
+        validate_requirements_task.context = [synthesize_requirements_task]
+    code_extractor_tasks = [analyze_control_flow_task, analyze_data_flow_task,
                             synthesize_requirements_task, validate_requirements_task]
     return code_extractor_tasks
 
+#--------------------------------#
+#     Incremental Extraction     #
+#--------------------------------#
+def create_incremental_code_extractor_tasks(agents, user_prompt, code_chunks, source_key,
+                                            execution_mode="sequential"):
+    """Create tasks that only re-analyze functions changed since the last run on `source_key`.
+
+    The first run (or one after a change to types, macros or globals) is a
+    full run. Later runs scope every task to the changed functions and their
+    callers; nothing is run when no function changed.
+
+    Args:
+        agents (list): Agents from `create_code_extractor_crew`
+        user_prompt (str): The user's instructions
+        code_chunks (list): Chunks of the source from `iter_chunks`
+        source_key (str): Stable name of the source, e.g. its file name
+        execution_mode (str): "sequential" or "dag"
+
+    Returns:
+        tuple: (tasks, run) where `run` is passed to `run_incremental_code_extractor`
+    """
+    index = index_code(code_chunks, source_key)
+    state = load_state(source_key)
+    plan = plan_incremental(index, state)
+    if plan["full"]:
+        tasks = _create_single_file_tasks(agents, user_prompt, index, execution_mode)
+    elif not plan["affected"]:
+        tasks = []
+    else:
+        affected = ", ".join(plan["affected"])
+        callers = ", ".join(name for name in plan["affected"] if name not in plan["changed"]) or "none"
+        flow_scope = dedent(f"""
+                    Incremental run: only analyze these functions: {affected}. Changed since the last run:
+                    {", ".join(plan["changed"])}; callers of changed functions: {callers}. The analyses of all
+                    other functions are kept from the previous run.""")
+        previous = previous_requirements_for(state, plan["affected"] + plan["removed"])
+        used_ids = ", ".join(filter(None, (requirement_id(block) for block in state["requirements"])))
+        removed = f" Functions removed since the last run: {', '.join(plan['removed'])}." if plan["removed"] else ""
+        requirement_scope = dedent(f"""
+                    Incremental run: only write requirements for these functions: {affected}.{removed}
+                    Requirements for other functions are kept from the previous run. Keep the Requirement ID of
+                    each previous requirement below that still applies, drop the ones that no longer apply, and
+                    give new requirements IDs that are not already in use ({used_ids}).
+                    Previous requirements for these functions:
+                    """) + ("\n\n".join(previous) or "none")
+        tasks = _create_single_file_tasks(agents, user_prompt, index, execution_mode, flow_scope, requirement_scope)
+    run = {"source_key": source_key, "index": index, "state": state, "plan": plan, "tasks": tasks}
+    return tasks, run
+
+def run_incremental_code_extractor(code_extractor_agents, remaining_tasks, execution_mode, run,
+                                   output_dir="output/code_extractor"):
+    """Run the scoped tasks, then merge their results into the previous run's analyses and requirements.
+
+    Returns:
+        str: The merged, validated requirement set
+    """
+    plan, state = run["plan"], run["state"] or {}
+    structure = run["index"]["structure"]
+    if plan["full"] or plan["affected"]:
+        print(f"Analyzing {len(plan['affected'])} of {len(structure['functions'])} functions "
+              f"({len(plan['changed'])} changed)")
+    else:
+        print("No function changed since the last run, keeping the previous analyses")
+    if remaining_tasks:
+        run_code_extractor(code_extractor_agents, remaining_tasks, execution_mode)
+
+    names = set(structure["functions"])
+    outputs = [task.output.raw for task in run["tasks"]]
+    control_flow, data_flow, _, validated = outputs if outputs else ("", "", "", "")
+    previous = state.get("analyses", {})
+    analyses = {
+        "control_flow": merge_sections(previous.get("control_flow", {}), control_flow, plan, names),
+        "data_flow": merge_sections(previous.get("data_flow", {}), data_flow, plan, names),
+    }
+    new_requirements = split_requirements(validated)
+    if outputs and not new_requirements:
+        clear_state(run["source_key"])
+        print("Could not split the validated requirements by Requirement ID; the next run will be a full run")
+        return validated
+    requirements = new_requirements if plan["full"] else merge_requirements(state, new_requirements, plan)
+
+    for name, sections in (("control_flow_analysis", analyses["control_flow"]),
+                           ("data_flow_analysis", analyses["data_flow"])):
+        with open(f"{output_dir}/{name}.md", "w", encoding="utf-8") as f:
+            f.write("\n\n".join(sections[function] for function in structure["functions"] if function in sections))
+    result = "\n\n".join(requirements)
+    with open(f"{output_dir}/validated_requirements.md", "w", encoding="utf-8") as f:
+        f.write(result)
+    save_state(run["source_key"], {"fingerprints": plan["fingerprints"], "declarations": plan["declarations"],
+                                   "analyses": analyses, "requirements": requirements})
+    return result
+
+#--------------------------------#
+#      Repository Extraction     #
+#--------------------------------#
+def file_output_dir(path):
+    return "output/code_extractor/files/" + path.replace("\\", "/").replace("/", "__")
+
+def create_file_analysis_tasks(agents, user_prompt, source, execution_mode="sequential"):
+    """Create the flow analysis tasks for one file of a repository.
+
+    Every task gets an explicit context so a file's tasks never pick up another
+    file's outputs, and results are written under a per-file output directory.
+    """
+    output_dir = file_output_dir(source["path"])
+    file_prompt = f"{user_prompt}\nFile: {source['path']}"
+    index = index_code(source["chunks"], source["path"], output_dir)
+    code_tools = create_code_tools({source["path"]: index})
+    overview = summarize_structure(index["structure"], CODE_OVERVIEW_CHARS)
+    analyze_control_flow_task, analyze_data_flow_task = create_flow_analysis_tasks(agents, file_prompt, code_tools,
+                                                                                   overview, output_dir)
+    analyze_control_flow_task.context = []
+    if execution_mode == "dag":
+        analyze_data_flow_task.context = []
+    else:
+        analyze_data_flow_task.context = [analyze_control_flow_task]
+    return [analyze_control_flow_task, analyze_data_flow_task]
+
+def create_repository_requirement_tasks(agents, user_prompt, file_task_sets):
+    """Create the reduce step that turns every file's flow analyses into one requirement set."""
+    flow_tasks = [task for file_tasks in file_task_sets for task in file_tasks[-2:]]
+    # One tool over every file, so cross-file calls and shared symbols can be checked
+    indexes = {}
+    for task in flow_tasks:
+        for tool in task.tools:
+            if isinstance(tool, CodeIndexTool):
+                indexes.update(tool.indexes)
+    scope_note = dedent(f"""
+                    The analyses cover {len(file_task_sets)} files of one code base. Merge duplicate requirements,
+                    capture behavior that spans files (calls, shared data, interfaces), and name the source file
+                    in each requirement's Source.""")
+    synthesize_requirements_task, validate_requirements_task = create_requirement_tasks(
+        agents, user_prompt, create_code_tools(indexes), scope_note)
+    synthesize_requirements_task.context = flow_tasks
+    validate_requirements_task.context = flow_tasks + [synthesize_requirements_task]
+    return [synthesize_requirements_task, validate_requirements_task]
 
 #--------------------------------#
 #         Research Crew          #
 #--------------------------------#
-def run_code_extractor(code_extractor_agents, code_extractor_tasks):
+def run_code_extractor(code_extractor_agents, code_extractor_tasks, execution_mode="sequential"):
+    """Run the code extractor crew and record its wall time.
+
+    In "dag" mode control-flow and data-flow analysis run concurrently and
+    are joined before requirement synthesis.
+    """
+    if execution_mode == "dag":
+        code_extractor_tasks = schedule_tasks(code_extractor_tasks)
+    instrument_crew(code_extractor_agents, code_extractor_tasks)
     crew = Crew(
         agents=code_extractor_agents,
         tasks=code_extractor_tasks,
         verbose=True,
         process=Process.sequential
     )
+    start = time.perf_counter()
+    result = crew.kickoff()
+    record_run_timing("code_extractor", execution_mode, time.perf_counter() - start, len(code_extractor_tasks))
+    summary = speedup_summary("code_extractor", len(code_extractor_tasks))
+    if summary:
+        print(summary)
+    return result
+
+
+def _run_pending_tasks(agents, tasks, execution_mode):
+    """Kick off a crew for the tasks that have no output yet (e.g. after a resume)."""
+    pending = [task for task in tasks if task.output is None]
+    if not pending:
+        return None
+    if execution_mode == "dag":
+        pending = schedule_tasks(pending)
+    instrument_crew(agents, pending)
+    crew = Crew(
+        agents=agents,
+        tasks=pending,
+        verbose=True,
+        process=Process.sequential
+    )
     return crew.kickoff()
+
+def run_code_repository_extractor(file_crews, reduce_agents, reduce_tasks, execution_mode="sequential",
+                                  max_workers=CODE_EXTRACTOR_WORKERS):
+    """Analyze many files on a bounded worker pool, then build one requirement set.
+
+    Args:
+        file_crews (list): (agents, tasks) per file from `create_file_analysis_tasks`
+        reduce_agents (list): Agents for the requirement synthesis and validation
+        reduce_tasks (list): Tasks from `create_repository_requirement_tasks`
+        execution_mode (str): "sequential" or "dag" for each file's crew
+        max_workers (int): Number of files analyzed at once
+
+    Returns:
+        CrewOutput: The validated cross-file requirements
+    """
+    start = time.perf_counter()
+    sink = current_output_sink()
+    events = current_run_events()
+
+    def analyze_file(agents, tasks):
+        # Worker threads do not inherit the job's output routing or event channel
+        with capture_thread_output(sink), run_events_scope(events):
+            return _run_pending_tasks(agents, tasks, execution_mode)
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="code-file") as pool:
+        futures = [pool.submit(analyze_file, agents, tasks) for agents, tasks in file_crews]
+        for future in futures:
+            future.result()
+    result = _run_pending_tasks(reduce_agents, reduce_tasks, "sequential")
+    task_count = sum(len(tasks) for _, tasks in file_crews) + len(reduce_tasks)
+    record_run_timing("code_repository", execution_mode, time.perf_counter() - start, task_count)
+    return result
@@ -0,0 +1,221 @@
+from crewai import LLM
+from src.utils.llm_streaming import streaming_llm_kwargs
+from src.utils.tracing import (current_trace, current_agent, bind_thread, usage_callback, record_usage,
+                               usage_tokens, llm_span_attributes)
+from src.utils.rate_limit import get_limiter, estimate_tokens
+from src.utils.llm_routing import fallback_models, route
+import copy
+import functools
+import hashlib
+import os
+import threading
+import time
+from contextlib import nullcontext
+from functools import lru_cache
+from dotenv import load_dotenv
+load_dotenv()
+
+#--------------------------------#
+#        Cached LLM Clients      #
+#--------------------------------#
+class TracedLLM(LLM):
+    """CrewAI LLM that traces, meters and rate-limits each request of the run it is bound to.
+
+    Spans carry latency, provider, model and the token usage CrewAI reports
+    to the call's callbacks; the same usage is added to the run's meter,
+    whose budget is checked before every request. Requests to a model with a
+    configured quota wait their turn at the process-wide limiter first.
+    With fallbacks, a request that fails or misses its latency target is
+    routed on to the next model (see `llm_routing.route`).
+    `bind()` returns a per-agent copy tied to one run, which also works on the
+    threads CrewAI starts for async tasks.
+    """
+
+    run_trace = None
+    run_usage = None
+    agent_role = None
+    fallbacks = ()
+
+    def bind(self, trace, agent_role, usage=None):
+        llm = copy.copy(self)
+        llm.run_trace = trace
+        llm.run_usage = usage
+        llm.agent_role = agent_role
+        llm.fallbacks = tuple(backup.bind(trace, agent_role, usage) for backup in self.fallbacks)
+        return llm
+
+    def with_fallbacks(self, fallbacks):
+        llm = copy.copy(self)
+        llm.fallbacks = tuple(fallbacks)
+        return llm
+
+    def call(self, messages, *args, **kwargs):
+        if not self.fallbacks:
+            return self._call(messages, *args, **kwargs)
+        if self.run_trace is not None:
+            bind_thread(self.run_trace, self.agent_role)
+        return route([(llm.model, functools.partial(llm._call, messages, *args, **kwargs))
+                      for llm in (self,) + self.fallbacks])
+
+    def _call(self, messages, *args, **kwargs):
+        trace = self.run_trace or current_trace()
+        limiter = get_limiter(self.model)
+        if trace is None and self.run_usage is None and limiter is None:
+            return super().call(messages, *args, **kwargs)
+        if self.run_usage is not None:
+            self.run_usage.check()
+        if self.run_trace is not None:
+            bind_thread(self.run_trace, self.agent_role)
+        if len(args) >= 2:
+            args = (args[0], list(args[1] or []) + [usage_callback], *args[2:])
+        else:
+            kwargs["callbacks"] = list(kwargs.get("callbacks") or []) + [usage_callback]
+        agent = self.agent_role or current_agent()
+        queued = time.perf_counter()
+        slot_context = limiter.slot(estimate_tokens(messages, getattr(self, "max_tokens", None))) \
+            if limiter is not None else nullcontext({})
+        with slot_context as slot:
+            if trace is not None and slot.get("waited"):
+                trace.add_span(f"rate limit {limiter.name}", "queue", queued, time.perf_counter(), agent=agent)
+            span_context = trace.span(f"llm {self.model}", "llm", agent=agent, **llm_span_attributes(self.model)) \
+                if trace is not None else nullcontext({})
+            with span_context as span, record_usage() as recorder:
+                result = super().call(messages, *args, **kwargs)
+                tokens_in, tokens_out = usage_tokens(recorder.usage)
+                span["gen_ai.usage.input_tokens"], span["gen_ai.usage.output_tokens"] = tokens_in, tokens_out
+            if tokens_in is not None:
+                slot["used"] = tokens_in + (tokens_out or 0)
+        if self.run_usage is not None:
+            self.run_usage.record(agent, self.model, tokens_in, tokens_out)
+        return result
+
+
+def _resolve_model(provider, model):
+    """Map the sidebar selection to the provider's concrete model name."""
+    if provider in ("Anthropic", "Ollama", "Gemini"):
+        return model
+    # Map friendly names to concrete model names for OpenAI
+    if model == "GPT-3.5":
+        model = "gpt-3.5-turbo"
+    elif model == "GPT-4":
+        model = "gpt-4"
+    # If model is custom but empty, fallback
+    if not model:
+        model = "o1"
+    return model
+
+
+def _api_key(provider):
+    if provider == "Anthropic":
+        return os.getenv("ANTHROPIC_API_KEY")
+    elif provider == "Ollama":
+        return None
+    elif provider == "Gemini":
+        return os.getenv("GEMINI_API_KEY")
+    return os.getenv("OPENAI_API_KEY")
+
+
+@lru_cache(maxsize=32)
+def _build_llm(provider, model, api_key):
+    if provider == "Anthropic":
+        return TracedLLM(
+            api_key=api_key,
+            model=f"anthropic/{model}",
+            temperature=0.7,
+            **streaming_llm_kwargs()
+        )
+    elif provider == "Ollama":
+        return TracedLLM(
+            base_url="http://localhost:11434",
+            model=f"ollama/{model}",
+            **streaming_llm_kwargs()
+        )
+    elif provider == "Gemini":
+        return TracedLLM(
+            api_key=api_key,
+            model=f"gemini/{model}",
+            **streaming_llm_kwargs()
+        )
+    return TracedLLM(
+        api_key=api_key,
+        model=f"openai/{model}",
+        **streaming_llm_kwargs()
+    )
+
+
+# LiteLLM provider prefixes of fallback models, mapped to the sidebar's provider names
+_PROVIDERS = {"openai": "OpenAI", "anthropic": "Anthropic", "gemini": "Gemini", "ollama": "Ollama"}
+
+
+def _fallback_llms(model):
+    llms = []
+    for name in fallback_models(model):
+        prefix, _, backup = name.partition("/")
+        if prefix not in _PROVIDERS or not backup:
+            raise ValueError(f"Fallback model '{name}' must look like '<provider>/<model>' with provider "
+                             f"one of {', '.join(_PROVIDERS)}")
+        llms.append(_build_llm(_PROVIDERS[prefix], backup, _api_key(_PROVIDERS[prefix])))
+    return llms
+
+
+def get_llm(selection):
+    """Return the LLM client for a sidebar selection, built once per process.
+
+    The API key is part of the cache key, so entering a new key in the sidebar
+    yields a fresh client instead of a stale one. Backup models configured in
+    LLM_FALLBACKS for the selected model are attached as its fallbacks.
+
+    Args:
+        selection (dict): Contains provider and model information
+
+    Returns:
+        LLM: A configured CrewAI LLM
+    """
+    provider = selection["provider"]
+    llm = _build_llm(provider, _resolve_model(provider, selection["model"]), _api_key(provider))
+    fallbacks = _fallback_llms(llm.model)
+    return llm.with_fallbacks(fallbacks) if fallbacks else llm
+
+
+#--------------------------------#
+#      Cached Agent Templates    #
+#--------------------------------#
+_agent_templates = {}
+_agent_templates_lock = threading.Lock()
+
+
+def _cache_key(crew_type, selection):
+    provider = selection["provider"]
+    key_fingerprint = hashlib.sha256((_api_key(provider) or "").encode("utf-8")).hexdigest()
+    return crew_type, provider, _resolve_model(provider, selection["model"]), key_fingerprint
+
+
+def get_agents(crew_type, selection, build_agents):
+    """Return fresh copies of a crew's agents, building the templates only once.
+
+    Agents carry per-run state (crew reference, executor, tools handler), so
+    callers always get copies; the copies share the cached LLM client, tools
+    and knowledge sources of the template.
+
+    Args:
+        crew_type (str): Identifies the crew, e.g. "research" or "design_thinking"
+        selection (dict): Contains provider and model information
+        build_agents (callable): Takes an LLM and returns the list of template agents
+
+    Returns:
+        list: Agents ready to be assigned to tasks
+    """
+    key = _cache_key(crew_type, selection)
+    with _agent_templates_lock:
+        templates = _agent_templates.get(key)
+        if templates is None:
+            templates = build_agents(get_llm(selection))
+            _agent_templates[key] = templates
+    return [agent.copy() for agent in templates]
+
+
+def clear_cache():
+    """Drop all cached LLM clients and agent templates."""
+    _build_llm.cache_clear()
+    with _agent_templates_lock:
+        _agent_templates.clear()
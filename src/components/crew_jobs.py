@@ -0,0 +1,133 @@
+from crewai.tasks.task_output import TaskOutput
+from src.components.researcher import create_researcher, create_research_task, run_research
+from src.components.research_batch import create_research_batch_tasks, run_research_batch, BATCH_CONCURRENCY
+from src.components.design_thinking import create_design_thinking_crew, create_design_thinking_tasks, run_design_thinking
+from src.components.code_extractor import (create_code_extractor_crew, run_code_extractor, create_code_extractor_tasks,
+                                           create_file_analysis_tasks, create_repository_requirement_tasks,
+                                           run_code_repository_extractor, create_incremental_code_extractor_tasks,
+                                           run_incremental_code_extractor)
+from src.tools.code_chunker import iter_chunks
+from src.utils.job_store import get_job_store
+
+#--------------------------------#
+#         Crew Builders          #
+#--------------------------------#
+def build_research(params):
+    researcher = create_researcher(params["selection"])
+    task = create_research_task(researcher, params["user_prompt"])
+    return [researcher], [task], lambda agents, tasks: run_research(agents[0], tasks[0])
+
+def build_research_batch(params):
+    agents, tasks = create_research_batch_tasks(params["selection"], params["prompts"], params["output_dir"])
+    run_crew = lambda agents, remaining: run_research_batch(tasks, remaining, params["prompts"], params["output_dir"],
+                                                            params.get("concurrency", BATCH_CONCURRENCY),
+                                                            params.get("runs_per_minute", 0))
+    return agents, tasks, run_crew
+
+def build_design_thinking(params):
+    execution_mode = params["selection"].get("execution_mode", "sequential")
+    agents = create_design_thinking_crew(params["selection"])
+    tasks = create_design_thinking_tasks(agents, params["user_prompt"], execution_mode)
+    return agents, tasks, lambda agents, tasks: run_design_thinking(agents, tasks, execution_mode)
+
+def build_code_extractor(params):
+    execution_mode = params["selection"].get("execution_mode", "sequential")
+    if "sources" in params:
+        return build_code_repository(params, execution_mode)
+    code_chunks = params.get("code_chunks")
+    if code_chunks is None:
+        # Jobs recorded before chunked uploads stored the whole file
+        code_chunks = list(iter_chunks(params["code_file"].splitlines(keepends=True)))
+    agents = create_code_extractor_crew(params["selection"])
+    if params["selection"].get("incremental"):
+        tasks, run = create_incremental_code_extractor_tasks(agents, params["user_prompt"], code_chunks,
+                                                             params.get("source_path", "upload.c"), execution_mode)
+        return agents, tasks, lambda agents, remaining: run_incremental_code_extractor(agents, remaining,
+                                                                                       execution_mode, run)
+    tasks = create_code_extractor_tasks(agents, params["user_prompt"], code_chunks, execution_mode)
+    return agents, tasks, lambda agents, tasks: run_code_extractor(agents, tasks, execution_mode)
+
+def build_code_repository(params, execution_mode):
+    file_crews = []
+    for source in params["sources"]:
+        agents = create_code_extractor_crew(params["selection"])
+        file_crews.append((agents, create_file_analysis_tasks(agents, params["user_prompt"], source, execution_mode)))
+    reduce_agents = create_code_extractor_crew(params["selection"])
+    reduce_tasks = create_repository_requirement_tasks(reduce_agents, params["user_prompt"],
+                                                       [tasks for _, tasks in file_crews])
+    # Flattened in a fixed order so checkpoint indices stay stable across resumes
+    tasks = [task for _, file_tasks in file_crews for task in file_tasks] + reduce_tasks
+    run_crew = lambda agents, remaining: run_code_repository_extractor(file_crews, reduce_agents, reduce_tasks,
+                                                                       execution_mode)
+    return reduce_agents, tasks, run_crew
+
+CREW_BUILDERS = {
+    "research": build_research,
+    "research_batch": build_research_batch,
+    "design_thinking": build_design_thinking,
+    "code_extractor": build_code_extractor,
+}
+
+#--------------------------------#
+#      Checkpoint & Resume       #
+#--------------------------------#
+def attach_checkpoints(tasks, job_id, store):
+    """Save each task's output to the job store as soon as the task completes."""
+    for index, task in enumerate(tasks):
+        def save(output, index=index, task=task):
+            store.save_checkpoint(job_id, index, task.description, output.raw)
+        task.callback = save
+
+def restore_checkpoints(tasks, checkpoints):
+    """Restore completed task outputs and return the tasks that still need to run.
+
+    Remaining tasks without an explicit context are given every earlier task as
+    context, which reproduces what the sequential process would have passed
+    them had the run not been interrupted.
+    """
+    if not checkpoints:
+        return tasks
+    for index, task in enumerate(tasks):
+        if index in checkpoints:
+            task.output = TaskOutput(
+                description=task.description,
+                expected_output=task.expected_output,
+                raw=checkpoints[index],
+                agent=task.agent.role if task.agent else "",
+            )
+        elif not isinstance(task.context, list):
+            task.context = tasks[:index]
+    return [task for index, task in enumerate(tasks) if index not in checkpoints]
+
+def run_stored_job(job_id):
+    """Run (or resume) a job recorded in the job store.
+
+    Tasks that already have a checkpoint are skipped; the final result and
+    status are written back to the store.
+
+    Args:
+        job_id (str): Id returned by `JobStore.create_job`
+
+    Returns:
+        The crew result, or the last checkpointed output if nothing was left to run
+    """
+    store = get_job_store()
+    job = store.get_job(job_id)
+    try:
+        agents, tasks, run_crew = CREW_BUILDERS[job["crew_type"]](job["params"])
+        store.update_job(job_id, "running", total_tasks=len(tasks))
+        checkpoints = store.load_checkpoints(job_id)
+        attach_checkpoints(tasks, job_id, store)
+        remaining = restore_checkpoints(tasks, checkpoints)
+        # An incremental run with nothing changed has no tasks but still merges and returns a result
+        if remaining or not tasks:
+            if checkpoints:
+                print(f"Resuming after {len(checkpoints)} of {len(tasks)} completed tasks")
+            result = run_crew(agents, remaining)
+        else:
+            result = checkpoints[len(tasks) - 1]
+    except Exception as e:
+        store.update_job(job_id, "failed", error=str(e))
+        raise
+    store.update_job(job_id, "completed", result=str(result))
+    return result
@@ -1,7 +1,10 @@
-from src.tools.custom_tool import EXAAnswerTool
-from crewai import Agent, Task, Crew, Process, LLM
-import os
+from src.tools.custom_tool import EXAAnswerTool, EXAMultiAnswerTool
+from src.components.crew_cache import get_agents
+from src.utils.task_graph import schedule_tasks, record_run_timing, speedup_summary
+from src.utils.run_events import instrument_crew
+from crewai import Agent, Task, Crew, Process
 from textwrap import dedent
+import time
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -9,44 +12,9 @@ load_dotenv()
 #         LLM & Research Agent   #
 #--------------------------------#
 def create_design_thinking_crew(selection):
-    provider = selection["provider"]
-    model = selection["model"]
-    if provider == "Anthropic":
-        llm = LLM(
-            api_key=os.getenv("ANTHROPIC_API_KEY"),
-            model=f"anthropic/{model}",
-            temperature=0.7
-        )
-    elif provider == "Ollama":
-        llm = LLM(
-            base_url="http://localhost:11434",
-            model=f"ollama/{model}",
-        )
-    elif provider == "Gemini":
-        llm = LLM(
-            api_key=os.getenv("GEMINI_API_KEY"),
-            model=f"gemini/{model}",
-        )
-    else:
-        # Map friendly names to concrete model names for OpenAI
-        if model == "GPT-3.5":
-            model = "gpt-3.5-turbo"
-        elif model == "GPT-4":
-            model = "gpt-4"
-        elif model == "o1":
-            model = "o1"
-        elif model == "o1-mini":
-            model = "o1-mini"
-        elif model == "o1-preview":
-            model = "o1-preview"
-        # If model is custom but empty, fallback
-        if not model:
-            model = "o1"
-        llm = LLM(
-            api_key=os.getenv("OPENAI_API_KEY"),
-            model=f"openai/{model}"
-        )
+    return get_agents("design_thinking", selection, _build_design_thinking_agents)
 
+def _build_design_thinking_agents(llm):
     empathize_agent = Agent(
         role='User Insight Specialist',
         goal='Deeply understand users needs, emotions, and challenges by gathering qualitative and quantitative insights',
@@ -56,7 +24,7 @@ def create_design_thinking_crew(selection):
             environments. Your knack for building trust allows you to uncover the true, unspoken pain points of 
             those you observe. Known as a "detective of human behavior," your detailed user profiles are unmatched 
             in precision."""),
-        tools=[EXAAnswerTool()],
+        tools=[EXAMultiAnswerTool(), EXAAnswerTool()],
         verbose=True,
         llm=llm,
     )
@@ -118,7 +86,10 @@ def create_design_thinking_crew(selection):
 #--------------------------------#
 #         Research Task          #
 #--------------------------------#
-def create_design_thinking_tasks(agents, user_prompt):
+# Tasks `create_design_thinking_tasks` returns; run timings are compared per task count
+DESIGN_THINKING_TASK_COUNT = 6
+
+def create_design_thinking_tasks(agents, user_prompt, execution_mode="sequential"):
     user_research_task = Task(
         description=dedent(f"""User Input: {user_prompt}
                     Conduct in-depth research to understand users’ needs, pain points, and behaviors. 
@@ -184,6 +155,14 @@ def create_design_thinking_tasks(agents, user_prompt):
                     - Suggestions for improvement."""),
         agent=agents[5]
     )
+    if execution_mode == "dag":
+        # Declare each stage's real inputs; framing and ideation both only need the research
+        problem_framing_task.context = [user_research_task]
+        idea_generation_task.context = [user_research_task]
+        solution_development_task.context = [problem_framing_task, idea_generation_task]
+        feedback_iteration_task.context = [problem_framing_task, solution_development_task]
+        reflection_task.context = [user_research_task, problem_framing_task, idea_generation_task,
+                                   solution_development_task, feedback_iteration_task]
     design_thinking_tasks = [user_research_task, problem_framing_task, idea_generation_task, solution_development_task,
                              feedback_iteration_task, reflection_task]
     return design_thinking_tasks
@@ -192,11 +171,25 @@ def create_design_thinking_tasks(agents, user_prompt):
 #--------------------------------#
 #         Research Crew          #
 #--------------------------------#
-def run_design_thinking(design_thinking_agents, design_thinking_tasks):
+def run_design_thinking(design_thinking_agents, design_thinking_tasks, execution_mode="sequential"):
+    """Run the design thinking crew and record its wall time.
+
+    In "dag" mode the tasks are ordered by their declared context and
+    independent stages run concurrently as async tasks.
+    """
+    if execution_mode == "dag":
+        design_thinking_tasks = schedule_tasks(design_thinking_tasks)
+    instrument_crew(design_thinking_agents, design_thinking_tasks)
     crew = Crew(
         agents=design_thinking_agents,
         tasks=design_thinking_tasks,
         verbose=True,
         process=Process.sequential
     )
-    return crew.kickoff()
+    start = time.perf_counter()
+    result = crew.kickoff()
+    record_run_timing("design_thinking", execution_mode, time.perf_counter() - start, DESIGN_THINKING_TASK_COUNT)
+    summary = speedup_summary("design_thinking", DESIGN_THINKING_TASK_COUNT)
+    if summary:
+        print(summary)
+    return result
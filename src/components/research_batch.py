@@ -0,0 +1,224 @@
+from src.components.researcher import create_researcher, create_research_task, run_research
+from src.utils.output_handler import capture_thread_output, current_output_sink
+from src.utils.run_events import current_run_events, run_events_scope
+from src.utils.usage import BudgetExceeded
+from concurrent.futures import ThreadPoolExecutor
+import csv
+import io
+import json
+import os
+import re
+import threading
+import time
+import zipfile
+from dotenv import load_dotenv
+load_dotenv()
+
+#--------------------------------#
+#       Batch Prompt Files       #
+#--------------------------------#
+BATCH_MAX_PROMPTS = int(os.getenv("RESEARCH_BATCH_MAX_PROMPTS", "500"))
+BATCH_CONCURRENCY = int(os.getenv("RESEARCH_BATCH_CONCURRENCY", "4"))
+BATCH_OUTPUT_DIR = "output/research_batch"
+RESULTS_NAME = "results.jsonl"
+COMBINED_NAME = "all_reports.md"
+ARCHIVE_NAME = "research_batch.zip"
+
+
+def parse_prompts(file_name, data):
+    """Read research prompts from an uploaded CSV or JSONL file.
+
+    CSV files use a "prompt" column (or the first column when there is no
+    header) and an optional "id" column. JSONL files hold one object with
+    "prompt" and optional "id" per line, or one plain string per line.
+
+    Args:
+        file_name (str): Upload name; ".jsonl"/".ndjson" selects JSONL
+        data (bytes): File contents
+
+    Returns:
+        list: {"id", "prompt"} per non-empty prompt
+    """
+    text = data.decode("utf-8-sig") if isinstance(data, bytes) else data
+    rows = []
+    if file_name.lower().endswith((".jsonl", ".ndjson")):
+        for line in text.splitlines():
+            if line.strip():
+                item = json.loads(line)
+                rows.append(item if isinstance(item, dict) else {"prompt": str(item)})
+    else:
+        records = [record for record in csv.reader(io.StringIO(text)) if any(cell.strip() for cell in record)]
+        header = [cell.strip().lower() for cell in records[0]] if records else []
+        column, id_column = 0, None
+        if "prompt" in header:
+            column = header.index("prompt")
+            id_column = header.index("id") if "id" in header else None
+            records = records[1:]
+        rows = [{"prompt": record[column], "id": record[id_column] if id_column is not None else None}
+                for record in records if len(record) > column]
+    prompts = [{"id": str(row.get("id") or number), "prompt": str(row.get("prompt") or "").strip()}
+               for number, row in enumerate(rows, 1)]
+    prompts = [item for item in prompts if item["prompt"]]
+    if len(prompts) > BATCH_MAX_PROMPTS:
+        raise ValueError(f"The file has {len(prompts)} prompts; a batch takes at most {BATCH_MAX_PROMPTS}")
+    return prompts
+
+
+def _slug(text, limit=40):
+    return re.sub(r"[^\w-]+", "-", text.lower()).strip("-")[:limit] or "prompt"
+
+
+def report_name(number, item):
+    return f"{number:03d}-{_slug(item['id'])}.md"
+
+
+#--------------------------------#
+#       Batch Research Tasks     #
+#--------------------------------#
+def create_research_batch_tasks(selection, prompts, output_dir):
+    """Create one researcher and one research task per prompt.
+
+    Tasks get an explicit empty context, so a resumed batch never feeds
+    earlier reports into later prompts.
+
+    Returns:
+        tuple: (agents, tasks), aligned with `prompts`
+    """
+    agents, tasks = [], []
+    for number, item in enumerate(prompts, 1):
+        researcher = create_researcher(selection)
+        task = create_research_task(researcher, item["prompt"], os.path.join(output_dir, report_name(number, item)))
+        task.context = []
+        agents.append(researcher)
+        tasks.append(task)
+    return agents, tasks
+
+
+class _StartPacer:
+    """Spaces out run starts to at most `per_minute` a minute; 0 means no limit."""
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        time.sleep(start - now)
+
+
+def run_research_batch(tasks, remaining, prompts, output_dir, concurrency=BATCH_CONCURRENCY, runs_per_minute=0):
+    """Research many prompts on a bounded worker pool and package the reports.
+
+    Each report is written as soon as its run finishes, and a line is
+    appended to `results.jsonl`, so partial results survive a crash. A failed
+    prompt does not stop the others; an exhausted budget stops the batch.
+    Finally all reports are combined into `all_reports.md` and zipped.
+
+    Args:
+        tasks (list): All tasks from `create_research_batch_tasks`
+        remaining (list): The tasks that still need to run
+        prompts (list): The prompts the tasks were created from
+        output_dir (str): Directory for the reports and the archive
+        concurrency (int): Prompts researched at once
+        runs_per_minute (int): Maximum run starts per minute; 0 means no limit
+
+    Returns:
+        str: A markdown summary of the batch
+
+    Raises:
+        RuntimeError: If any prompt failed; resuming the job retries only those
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    positions = {id(task): number for number, task in enumerate(tasks, 1)}
+    sink = current_output_sink()
+    events = current_run_events()
+    pacer = _StartPacer(runs_per_minute)
+    stop = threading.Event()
+    results_lock = threading.Lock()
+    outcomes = {}
+
+    def research(task):
+        # Worker threads do not inherit the job's output routing or event channel
+        with capture_thread_output(sink), run_events_scope(events):
+            research_prompt(task)
+
+    def research_prompt(task):
+        number = positions[id(task)]
+        item = prompts[number - 1]
+        status, error, started = "skipped", None, time.perf_counter()
+        if not stop.is_set():
+            pacer.wait()
+            started = time.perf_counter()
+            try:
+                run_research(task.agent, task)
+                status = "completed"
+            except BudgetExceeded as e:
+                stop.set()
+                status, error = "stopped", str(e)
+            except Exception as e:
+                status, error = "failed", str(e)
+        record = {"id": item["id"], "prompt": item["prompt"], "status": status, "error": error,
+                  "seconds": round(time.perf_counter() - started, 3), "report": report_name(number, item)}
+        with results_lock:
+            outcomes[number] = record
+            with open(os.path.join(output_dir, RESULTS_NAME), "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+        print(f"[{len(outcomes)}/{len(remaining)}] {item['id']}: {status}")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="research-batch") as pool:
+        for future in [pool.submit(research, task) for task in remaining]:
+            future.result()
+    seconds = time.perf_counter() - start
+    print(f"Researched {len(remaining)} prompts in {seconds:.1f}s with {concurrency} at once "
+          f"({60.0 * len(remaining) / max(seconds, 1e-9):.1f} prompts/min)")
+
+    write_batch_archive(prompts, output_dir)
+    summary = _batch_summary(tasks, prompts, outcomes)
+    failed = [record for record in outcomes.values() if record["status"] != "completed"]
+    if failed:
+        raise RuntimeError(f"{len(failed)} of {len(tasks)} prompts did not complete "
+                           f"({failed[0]['id']}: {failed[0]['error'] or failed[0]['status']}); "
+                           f"resume the job to retry them")
+    return summary
+
+
+def _batch_summary(tasks, prompts, outcomes):
+    lines = ["| # | Id | Status | Seconds | Prompt |", "|---:|---|---|---:|---|"]
+    for number, (task, item) in enumerate(zip(tasks, prompts), 1):
+        record = outcomes.get(number, {"status": "completed" if task.output is not None else "not run", "seconds": 0})
+        prompt = item["prompt"][:80].replace("|", "/")
+        lines.append(f"| {number} | {item['id']} | {record['status']} | {record['seconds']:.1f} | {prompt} |")
+    return "\n".join(lines)
+
+
+def write_batch_archive(prompts, output_dir):
+    """Combine the reports written so far into one markdown file and zip everything.
+
+    Returns:
+        str: Path of the archive
+    """
+    sections = []
+    names = []
+    for number, item in enumerate(prompts, 1):
+        path = os.path.join(output_dir, report_name(number, item))
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                sections.append(f"# [{item['id']}] {item['prompt']}\n\n{f.read().strip()}\n")
+            names.append(report_name(number, item))
+    with open(os.path.join(output_dir, COMBINED_NAME), "w", encoding="utf-8") as f:
+        f.write("\n\n---\n\n".join(sections))
+    path = os.path.join(output_dir, ARCHIVE_NAME)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with zipfile.ZipFile(temporary, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name in names + [COMBINED_NAME, RESULTS_NAME]:
+            if os.path.exists(os.path.join(output_dir, name)):
+                archive.write(os.path.join(output_dir, name), name)
+    os.replace(temporary, path)
+    return path
@@ -1,6 +1,7 @@
-from src.tools.custom_tool import EXAAnswerTool
-from crewai import Agent, Task, Crew, Process, LLM
-import os
+from src.tools.custom_tool import EXAAnswerTool, EXAMultiAnswerTool
+from src.components.crew_cache import get_agents
+from src.utils.run_events import instrument_crew
+from crewai import Agent, Task, Crew, Process
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -22,64 +23,34 @@ def create_researcher(selection):
         Ollama models have limited function-calling capabilities. When using Ollama,
         the agent will rely more on its base knowledge and may not effectively use
         external tools like web search.
+
+        The LLM client and agent template are cached per provider and model, so
+        repeated runs only pay for a cheap copy of the agent.
     """
-    provider = selection["provider"]
-    model = selection["model"]
-    if provider == "Anthropic":
-        llm = LLM(
-            api_key=os.getenv("ANTHROPIC_API_KEY"),
-            model=f"anthropic/{model}",
-            temperature=0.7
-        )
-    elif provider == "Ollama":
-        llm = LLM(
-            base_url="http://localhost:11434",
-            model=f"ollama/{model}",
-        )
-    elif provider == "Gemini":
-        llm = LLM(
-            api_key=os.getenv("GEMINI_API_KEY"),
-            model=f"gemini/{model}",
-        )
-    else:
-        # Map friendly names to concrete model names for OpenAI
-        if model == "GPT-3.5":
-            model = "gpt-3.5-turbo"
-        elif model == "GPT-4":
-            model = "gpt-4"
-        elif model == "o1":
-            model = "o1"
-        elif model == "o1-mini":
-            model = "o1-mini"
-        elif model == "o1-preview":
-            model = "o1-preview"
-        # If model is custom but empty, fallback
-        if not model:
-            model = "o1"
-        llm = LLM(
-            api_key=os.getenv("OPENAI_API_KEY"),
-            model=f"openai/{model}"
-        )
+    return get_agents("research", selection, _build_research_agents)[0]
 
+def _build_research_agents(llm):
     researcher = Agent(
         role='Research Analyst',
         goal='Conduct thorough research on given topics for the current year 2025',
-        backstory='Expert at analyzing and summarizing complex information',
-        tools=[EXAAnswerTool()],
+        backstory=('Expert at analyzing and summarizing complex information. You break a topic into '
+                   'independent questions and ask them together rather than one at a time'),
+        tools=[EXAMultiAnswerTool(), EXAAnswerTool()],
         llm=llm,
         verbose=True
     )
-    return researcher
+    return [researcher]
 
 #--------------------------------#
 #         Research Task          #
 #--------------------------------#
-def create_research_task(researcher, task_description):
+def create_research_task(researcher, task_description, output_file="output/researcher/research_report.md"):
     """Create a research task for the agent to execute.
     
     Args:
         researcher (Agent): The research agent that will perform the task
         task_description (str): The research query or topic to investigate
+        output_file (str): Where CrewAI writes the report
     
     Returns:
         Task: A configured CrewAI task with expected output format
@@ -132,7 +103,7 @@ def create_research_task(researcher, task_description):
         cited using the sources discovered during research.
         """,
         agent=researcher,
-        output_file="output/researcher/research_report.md"
+        output_file=output_file
     )
 
 #--------------------------------#
@@ -148,6 +119,7 @@ def run_research(researcher, task):
     Returns:
         str: The research results in markdown format
     """
+    instrument_crew([researcher], [task])
     crew = Crew(
         agents=[researcher],
         tasks=[task],
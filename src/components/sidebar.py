@@ -1,20 +1,31 @@
 import streamlit as st
 import os
-import requests
+import threading
+import time
+from src.utils import http_client
 from dotenv import load_dotenv
 load_dotenv()
 
 #--------------------------------#
 #      Ollama Integration        #
 #--------------------------------#
-def get_ollama_models():
+OLLAMA_MODELS_TTL = float(os.getenv("OLLAMA_MODELS_TTL", "30"))
+
+_ollama_models = None
+_ollama_fetched_at = 0.0
+_ollama_refresh_thread = None
+_ollama_lock = threading.Lock()
+
+
+def fetch_ollama_models():
     """Get list of available Ollama models from local instance.
     
     Returns:
         list: Names of available Ollama models, or empty list if Ollama is not running
     """
     try:
-        response = requests.get("http://localhost:11434/api/tags")
+        # Local call: fail fast rather than retrying while Ollama is down
+        response = http_client.get("http://localhost:11434/api/tags", timeout=(1, 3), retries=0)
         if response.status_code == 200:
             models = response.json()
             return [model["name"] for model in models["models"]]
@@ -22,6 +33,57 @@ def get_ollama_models():
     except:
         return []
 
+
+def _refresh_ollama_models():
+    global _ollama_models, _ollama_fetched_at
+    models = fetch_ollama_models()
+    with _ollama_lock:
+        _ollama_models = models
+        _ollama_fetched_at = time.monotonic()
+
+
+def _start_ollama_refresh():
+    """Start a background refresh unless one is already in flight."""
+    global _ollama_refresh_thread
+    with _ollama_lock:
+        if _ollama_refresh_thread is None or not _ollama_refresh_thread.is_alive():
+            _ollama_refresh_thread = threading.Thread(target=_refresh_ollama_models, daemon=True)
+            _ollama_refresh_thread.start()
+        return _ollama_refresh_thread
+
+
+def get_ollama_models(max_age=OLLAMA_MODELS_TTL, wait=1.0):
+    """Return the cached Ollama model list, refreshing it in the background when stale.
+
+    Sidebar reruns never block on a stale list; only the very first lookup waits
+    (up to `wait` seconds) for the initial fetch.
+
+    Args:
+        max_age (float): Seconds before the cached list is considered stale
+        wait (float): Seconds to wait for a fetch when nothing is cached yet
+
+    Returns:
+        list: Names of available Ollama models, or empty list if Ollama is not running
+    """
+    with _ollama_lock:
+        models = _ollama_models
+        fresh = models is not None and time.monotonic() - _ollama_fetched_at < max_age
+    if fresh:
+        return models
+    thread = _start_ollama_refresh()
+    if models is None:
+        thread.join(wait)
+        with _ollama_lock:
+            models = _ollama_models
+    return models or []
+
+
+def refresh_ollama_models(wait=3.0):
+    """Force a new lookup and wait (up to `wait` seconds) for its result."""
+    _start_ollama_refresh().join(wait)
+    with _ollama_lock:
+        return _ollama_models or []
+
 #--------------------------------#
 #      Sidebar Configuration     #
 #--------------------------------#
@@ -54,6 +116,23 @@ def render_sidebar():
             else:
                 agentic_option = "code_extractor"
 
+            execution_mode = "sequential"
+            if agentic_option in ("design_thinking", "code_extractor"):
+                execution_label = st.radio(
+                    "Execution Mode",
+                    ["Sequential", "Parallel (DAG)"],
+                    help="Parallel runs independent stages concurrently based on each task's declared inputs",
+                    horizontal=True
+                )
+                execution_mode = "dag" if execution_label == "Parallel (DAG)" else "sequential"
+            incremental = False
+            if agentic_option == "code_extractor":
+                incremental = st.checkbox(
+                    "Incremental re-extraction",
+                    help="For a single file, re-analyze only the functions changed since the last run on a file "
+                         "with the same name (and their callers), and merge the results into the previous requirements"
+                )
+
         with st.expander("🤖 Model Selection", expanded=True):
             provider = st.radio(
                 "Select LLM Provider",
@@ -73,8 +152,11 @@ def render_sidebar():
                 else:
                     model = model_option
             elif provider == "Ollama":
-                # Get available Ollama models
-                ollama_models = get_ollama_models()
+                # Get available Ollama models (cached, refreshed in the background)
+                if st.button("🔄 Refresh models", help="Look up the models currently loaded in Ollama"):
+                    ollama_models = refresh_ollama_models()
+                else:
+                    ollama_models = get_ollama_models()
                 if not ollama_models:
                     st.warning("⚠️ No Ollama models found. Make sure Ollama is running locally.")
                     model = None
@@ -175,5 +257,7 @@ def render_sidebar():
     return {
         "provider": provider,
         "model": model,
-        "agentic_option": agentic_option
+        "agentic_option": agentic_option,
+        "execution_mode": execution_mode,
+        "incremental": incremental
     }
\ No newline at end of file
@@ -0,0 +1,703 @@
+import re
+from src.tools.code_chunker import iter_units
+
+#--------------------------------#
+#        Local C Parser          #
+#--------------------------------#
+# A small, dependency-free parser for the subset of C needed by the code
+# extractor: top-level declarations plus a statement tree per function with
+# the calls, reads and writes of every statement. It does not preprocess, so
+# macros are recorded but not expanded.
+
+_TOKEN_RE = re.compile(r"""
+    (?P<newline>\n)
+  | (?P<space>[ \t\r\f\v]+|\\\n)
+  | (?P<comment>//[^\n]*|/\*.*?\*/)
+  | (?P<string>"(?:\\.|[^"\\\n])*")
+  | (?P<char>'(?:\\.|[^'\\\n])*')
+  | (?P<number>\.?\d(?:[\w.]|[eEpP][+-])*)
+  | (?P<ident>[A-Za-z_]\w*)
+  | (?P<op>\.\.\.|<<=|>>=|->|\+\+|--|<<|>>|<=|>=|==|!=|&&|\|\||[-+*/%&|^]=|[{}()\[\];,.:?~!<>=+\-*/%&|^\#])
+""", re.S | re.X)
+
+KEYWORDS = {
+    "auto", "break", "case", "char", "const", "continue", "default", "do", "double", "else", "enum", "extern",
+    "float", "for", "goto", "if", "inline", "int", "long", "register", "restrict", "return", "short", "signed",
+    "sizeof", "static", "struct", "switch", "typedef", "union", "unsigned", "void", "volatile", "while", "_Bool",
+}
+BUILTIN_TYPES = {
+    "char", "double", "float", "int", "long", "short", "signed", "unsigned", "void", "_Bool", "bool",
+    "size_t", "ssize_t", "int8_t", "int16_t", "int32_t", "int64_t", "uint8_t", "uint16_t", "uint32_t",
+    "uint64_t", "intptr_t", "uintptr_t", "FILE",
+}
+TYPE_QUALIFIERS = {"const", "volatile", "static", "extern", "register", "inline", "restrict", "auto",
+                   "struct", "union", "enum"}
+ASSIGNMENT_OPS = {"=", "+=", "-=", "*=", "/=", "%=", "&=", "|=", "^=", "<<=", ">>="}
+BUILTIN_CONSTANTS = {"true", "false", "NULL"}
+_SPACED_OPS = ASSIGNMENT_OPS | {"==", "!=", "<", ">", "<=", ">=", "&&", "||", "?", ":", "+", "-", "/", "%", "|", "^"}
+_WORD_KINDS = ("ident", "number", "string", "char")
+
+
+def tokenize(text, first_line=1):
+    """Split C text into (kind, value, line) tuples, dropping whitespace and comments.
+
+    Preprocessor lines become a single ("directive", text, line) token.
+    """
+    tokens = []
+    line = first_line
+    at_line_start = True
+    position = 0
+    while position < len(text):
+        if at_line_start and text[position] == "#":
+            end = position
+            while True:
+                end = text.find("\n", end)
+                if end == -1:
+                    end = len(text)
+                    break
+                if text[end - 1] != "\\":
+                    break
+                end += 1
+            directive = text[position:end]
+            tokens.append(("directive", " ".join(directive.replace("\\\n", " ").split()), line))
+            line += directive.count("\n")
+            position = end
+            continue
+        match = _TOKEN_RE.match(text, position)
+        if match is None:
+            # Unknown character (e.g. stray backslash or non-ASCII): skip it
+            position += 1
+            continue
+        kind = match.lastgroup
+        value = match.group()
+        position = match.end()
+        if kind == "newline":
+            line += 1
+            at_line_start = True
+            continue
+        if kind in ("space", "comment"):
+            line += value.count("\n")
+            continue
+        at_line_start = False
+        tokens.append((kind, value, line))
+    return tokens
+
+
+def _join(tokens):
+    """Render tokens back to compact source text."""
+    text = ""
+    previous_kind = previous_value = None
+    for kind, value, _ in tokens:
+        if previous_value is not None and (
+                (kind in _WORD_KINDS and previous_kind in _WORD_KINDS)
+                or value in _SPACED_OPS or previous_value in _SPACED_OPS or previous_value == ","):
+            text += " "
+        text += value
+        previous_kind, previous_value = kind, value
+    return text
+
+
+def _matching(tokens, index, open_char, close_char):
+    """Return the index of the bracket closing the one at `index`."""
+    depth = 0
+    for position in range(index, len(tokens)):
+        value = tokens[position][1]
+        if value == open_char:
+            depth += 1
+        elif value == close_char:
+            depth -= 1
+            if depth == 0:
+                return position
+    return len(tokens) - 1
+
+
+def _split_top_level(tokens, separator):
+    """Split tokens on a separator that is not nested in brackets."""
+    parts, current, depth = [], [], 0
+    for token in tokens:
+        value = token[1]
+        if value in "([{":
+            depth += 1
+        elif value in ")]}":
+            depth -= 1
+        if value == separator and depth == 0:
+            parts.append(current)
+            current = []
+        else:
+            current.append(token)
+    parts.append(current)
+    return parts
+
+
+#--------------------------------#
+#      Expression Analysis       #
+#--------------------------------#
+def _access_path_before(tokens, end):
+    """Walk back from `end` over a postfix expression like `bms->cells[i].v`.
+
+    Returns:
+        tuple: (start index, normalized path such as "bms->cells[].v")
+    """
+    position = end
+    parts = []
+    while position >= 0:
+        value = tokens[position][1]
+        if value == "]":
+            depth = 0
+            while position >= 0:
+                if tokens[position][1] == "]":
+                    depth += 1
+                elif tokens[position][1] == "[":
+                    depth -= 1
+                    if depth == 0:
+                        break
+                position -= 1
+            parts.append("[]")
+            position -= 1
+        elif tokens[position][0] == "ident":
+            parts.append(value)
+            if position > 0 and tokens[position - 1][1] in (".", "->"):
+                parts.append(tokens[position - 1][1])
+                position -= 2
+            else:
+                break
+        elif value == ")":
+            # Parenthesized lvalue such as (*ptr): fall back to the innermost identifier
+            start = position
+            depth = 0
+            while start >= 0:
+                if tokens[start][1] == ")":
+                    depth += 1
+                elif tokens[start][1] == "(":
+                    depth -= 1
+                    if depth == 0:
+                        break
+                start -= 1
+            names = [token[1] for token in tokens[start:position] if token[0] == "ident"]
+            return start, names[-1] if names else None
+        else:
+            break
+    path = "".join(reversed(parts))
+    return position, path or None
+
+
+def _access_path_after(tokens, start):
+    """Read a postfix expression forward from `start`; returns (end index, path)."""
+    position = start
+    parts = []
+    while position < len(tokens) and tokens[position][1] in ("*", "&", "("):
+        position += 1
+    while position < len(tokens):
+        kind, value, _ = tokens[position]
+        if kind == "ident" and (not parts or parts[-1] in (".", "->")):
+            parts.append(value)
+        elif value in (".", "->") and parts:
+            parts.append(value)
+        elif value == "[" and parts:
+            position = _matching(tokens, position, "[", "]")
+            parts.append("[]")
+        else:
+            break
+        position += 1
+    return position, "".join(parts) or None
+
+
+def analyze_expression(tokens, ignored=()):
+    """Collect the calls, reads and writes of an expression.
+
+    Variable accesses are reported as normalized paths ("bms->soc",
+    "bms->cell_voltages[]") so member-level def-use chains can be built.
+    Names in `ignored` (types, macros, enum constants) are not reported as reads.
+
+    Returns:
+        dict: {"calls": [...], "reads": [...], "writes": [...]}
+    """
+    calls, reads, writes = [], [], []
+    written_positions = set()
+    for position, (kind, value, _) in enumerate(tokens):
+        if value in ASSIGNMENT_OPS:
+            start, path = _access_path_before(tokens, position - 1)
+            if path:
+                writes.append(path)
+                written_positions.update(range(max(start, 0), position))
+                if value != "=":
+                    reads.append(path)
+        elif value in ("++", "--"):
+            if position > 0 and (tokens[position - 1][0] == "ident" or tokens[position - 1][1] == "]"):
+                start, path = _access_path_before(tokens, position - 1)
+            else:
+                end, path = _access_path_after(tokens, position + 1)
+                start = position + 1
+            if path:
+                writes.append(path)
+                reads.append(path)
+                written_positions.update(range(max(start, 0), position + 1))
+    position = 0
+    while position < len(tokens):
+        kind, value, _ = tokens[position]
+        following = tokens[position + 1][1] if position + 1 < len(tokens) else None
+        preceding = tokens[position - 1][1] if position > 0 else None
+        if kind == "ident" and following == "(" and value not in KEYWORDS:
+            calls.append(value)
+        elif (kind == "ident" and value not in KEYWORDS and value not in ignored
+              and preceding not in (".", "->") and position not in written_positions):
+            end, path = _access_path_after(tokens, position)
+            if path:
+                reads.append(path)
+            # Index expressions inside the path are reads of their own
+            for offset, token in enumerate(tokens[position:end]):
+                if token[1] == "[":
+                    closing = _matching(tokens, position + offset, "[", "]")
+                    nested = analyze_expression(tokens[position + offset + 1:closing], ignored)
+                    calls.extend(nested["calls"])
+                    reads.extend(nested["reads"])
+            position = max(end, position + 1)
+            continue
+        position += 1
+    return {"calls": _unique(calls), "reads": _unique(reads), "writes": _unique(writes)}
+
+
+def _unique(values):
+    seen = set()
+    return [value for value in values if not (value in seen or seen.add(value))]
+
+
+#--------------------------------#
+#        Statement Parsing       #
+#--------------------------------#
+class _FunctionBodyParser:
+    """Recursive-descent parser producing a statement tree for a function body."""
+
+    def __init__(self, tokens, known_types, constants=()):
+        self.tokens = [token for token in tokens if token[0] != "directive"]
+        self.known_types = known_types
+        self.ignored = set(known_types) | set(constants) | BUILTIN_CONSTANTS
+        self.locals = []
+
+    def _is_type_start(self, position):
+        kind, value, _ = self.tokens[position]
+        if value in TYPE_QUALIFIERS or value in BUILTIN_TYPES:
+            return True
+        if kind == "ident" and value in self.known_types and position + 1 < len(self.tokens):
+            return self.tokens[position + 1][0] == "ident" or self.tokens[position + 1][1] == "*"
+        return False
+
+    def _simple(self, kind, tokens, line):
+        statement = {"kind": kind, "line": line, "text": _join(tokens)}
+        statement.update(analyze_expression(tokens, self.ignored))
+        return statement
+
+    def _declaration(self, tokens, line):
+        """Build a declaration statement; initialized names count as writes."""
+        statement = {"kind": "declaration", "line": line, "text": _join(tokens),
+                     "declares": [], "calls": [], "reads": [], "writes": []}
+        declarators = _split_top_level(tokens, ",")
+        type_tokens = []
+        for index, declarator in enumerate(declarators):
+            names_end = next((i for i, token in enumerate(declarator) if token[1] in ("=", "[")), len(declarator))
+            idents = [i for i in range(names_end) if declarator[i][0] == "ident"]
+            if not idents:
+                continue
+            name_index = idents[-1]
+            if index == 0:
+                type_tokens = declarator[:name_index]
+            name = declarator[name_index][1]
+            var_type = _join([token for token in type_tokens if token[1] not in ("static", "register")])
+            if any(token[1] == "*" for token in declarator[:name_index]) and index > 0:
+                var_type += "*"
+            if names_end < len(declarator) and declarator[names_end][1] == "[":
+                var_type += "[]"
+            statement["declares"].append(name)
+            self.locals.append({"name": name, "type": var_type, "line": line})
+            if "=" in [token[1] for token in declarator]:
+                initializer = declarator[[token[1] for token in declarator].index("=") + 1:]
+                nested = analyze_expression(initializer, self.ignored)
+                statement["calls"].extend(nested["calls"])
+                statement["reads"].extend(nested["reads"])
+                statement["writes"].append(name)
+        for key in ("calls", "reads", "writes"):
+            statement[key] = _unique(statement[key])
+        return statement
+
+    def _until_semicolon(self, position):
+        end = position
+        depth = 0
+        while end < len(self.tokens):
+            value = self.tokens[end][1]
+            if value in "([{":
+                depth += 1
+            elif value in ")]}":
+                if depth == 0:
+                    break
+                depth -= 1
+            elif value == ";" and depth == 0:
+                break
+            end += 1
+        return end
+
+    def _condition(self, position):
+        """Parse `( ... )` at position; returns (condition tokens, index after it)."""
+        close = _matching(self.tokens, position, "(", ")")
+        return self.tokens[position + 1:close], close + 1
+
+    def block(self, position):
+        """Parse statements from `{` at position to its `}`; returns (statements, index after)."""
+        statements = []
+        position += 1
+        while position < len(self.tokens) and self.tokens[position][1] != "}":
+            statement, position = self.statement(position)
+            if statement is not None:
+                statements.append(statement)
+        return statements, position + 1
+
+    def _body(self, position):
+        statement, position = self.statement(position)
+        if statement is None:
+            return [], position
+        if statement["kind"] == "block":
+            return statement["body"], position
+        return [statement], position
+
+    def statement(self, position):
+        kind, value, line = self.tokens[position]
+        if value == "{":
+            body, position = self.block(position)
+            return {"kind": "block", "line": line, "body": body}, position
+        if value == ";":
+            return None, position + 1
+        if value in ("if", "while", "switch"):
+            condition, position = self._condition(position + 1)
+            node = self._simple(value, condition, line)
+            node["condition"] = node.pop("text")
+            node["body"], position = self._body(position)
+            if value == "if" and position < len(self.tokens) and self.tokens[position][1] == "else":
+                node["else"], position = self._body(position + 1)
+            return node, position
+        if value == "for":
+            header_start = position + 2
+            header, position = self._condition(position + 1)
+            parts = _split_top_level(header, ";") + [[], []]
+            init, condition, step = parts[0], parts[1], parts[2]
+            node = self._simple("for", header, line)
+            node.pop("text")
+            node["init"] = _join(init)
+            node["condition"] = _join(condition)
+            node["step"] = _join(step)
+            if init and self._is_type_start(header_start):
+                declaration = self._declaration(init, line)
+                node["writes"] = _unique(node["writes"] + declaration["writes"])
+            node["body"], position = self._body(position)
+            return node, position
+        if value == "do":
+            body, position = self._body(position + 1)
+            condition = []
+            if position < len(self.tokens) and self.tokens[position][1] == "while":
+                condition, position = self._condition(position + 1)
+            node = self._simple("do", condition, line)
+            node["condition"] = node.pop("text")
+            node["body"] = body
+            return node, self._until_semicolon(position) + 1
+        if value in ("case", "default"):
+            end = position + 1
+            while end < len(self.tokens) and self.tokens[end][1] != ":":
+                end += 1
+            return {"kind": "case", "line": line, "value": _join(self.tokens[position + 1:end]) or "default"}, end + 1
+        if value in ("break", "continue"):
+            return {"kind": value, "line": line}, self._until_semicolon(position) + 1
+        if value == "goto":
+            end = self._until_semicolon(position)
+            return {"kind": "goto", "line": line, "label": _join(self.tokens[position + 1:end])}, end + 1
+        if value == "return":
+            end = self._until_semicolon(position)
+            return self._simple("return", self.tokens[position + 1:end], line), end + 1
+        if kind == "ident" and position + 1 < len(self.tokens) and self.tokens[position + 1][1] == ":":
+            return {"kind": "label", "line": line, "label": value}, position + 2
+        end = self._until_semicolon(position)
+        tokens = self.tokens[position:end]
+        if self._is_type_start(position):
+            return self._declaration(tokens, line), end + 1
+        return self._simple("expression", tokens, line), end + 1
+
+
+#--------------------------------#
+#      Top-Level Declarations    #
+#--------------------------------#
+def _parse_params(tokens):
+    params = []
+    for part in _split_top_level(tokens, ","):
+        idents = [token for token in part if token[0] == "ident"]
+        if not part or [token[1] for token in part] == ["void"]:
+            continue
+        if part[-1][1] == "...":
+            params.append({"name": "...", "type": "..."})
+            continue
+        name_index = max(i for i, token in enumerate(part) if token[0] == "ident") if idents else None
+        if name_index is None or len(idents) == 1 and part[name_index][1] in BUILTIN_TYPES:
+            params.append({"name": None, "type": _join(part)})
+        else:
+            suffix = "[]" if any(token[1] == "[" for token in part[name_index:]) else ""
+            params.append({"name": part[name_index][1], "type": _join(part[:name_index]) + suffix})
+    return params
+
+
+def _parse_members(tokens, is_enum):
+    members = []
+    if is_enum:
+        for part in _split_top_level(tokens, ","):
+            if part:
+                member = {"name": part[0][1]}
+                if len(part) > 2 and part[1][1] == "=":
+                    member["value"] = _join(part[2:])
+                members.append(member)
+        return members
+    for part in _split_top_level(tokens, ";"):
+        if not part:
+            continue
+        names_end = next((i for i, token in enumerate(part) if token[1] in ("[", ":")), len(part))
+        idents = [i for i in range(names_end) if part[i][0] == "ident"]
+        if not idents:
+            continue
+        member = {"name": part[idents[-1]][1], "type": _join(part[:idents[-1]])}
+        if names_end < len(part) and part[names_end][1] == "[":
+            member["type"] += "[" + _join(part[names_end + 1:_matching(part, names_end, "[", "]")]) + "]"
+        members.append(member)
+    return members
+
+
+def _parse_type(tokens, line):
+    """Parse `[typedef] struct/union/enum [tag] { ... } [name];`; returns (name, info) or None.
+
+    The body must follow the keyword or its tag directly: a unit such as
+    `struct point *make(...) {` or `struct point p = {...};` is not a type.
+    """
+    values = [token[1] for token in tokens]
+    keyword_index = next((i for i, value in enumerate(values) if value in ("struct", "union", "enum")), None)
+    if keyword_index is None or "{" not in values:
+        return None
+    open_index = values.index("{")
+    if open_index > keyword_index + 2 or "(" in values[:open_index]:
+        return None
+    close_index = _matching(tokens, open_index, "{", "}")
+    tag = values[keyword_index + 1] if open_index > keyword_index + 1 else None
+    trailing = [token[1] for token in tokens[close_index + 1:] if token[0] == "ident"]
+    name = trailing[0] if values[0] == "typedef" and trailing else tag
+    info = {
+        "kind": values[keyword_index],
+        "line": line,
+        "members": _parse_members(tokens[open_index + 1:close_index], values[keyword_index] == "enum"),
+    }
+    if tag and tag != name:
+        info["tag"] = tag
+    return name, info
+
+
+def _walk(statements):
+    for statement in statements:
+        yield statement
+        for key in ("body", "else"):
+            if key in statement:
+                yield from _walk(statement[key])
+
+
+def parse_function(tokens, name, known_types, start_line, end_line, constants=()):
+    """Parse a function definition into its signature and statement tree."""
+    values = [token[1] for token in tokens]
+    name_index = next(i for i, token in enumerate(tokens) if token[1] == name and values[i + 1] == "(")
+    params_close = _matching(tokens, name_index + 1, "(", ")")
+    body_open = values.index("{", params_close)
+    parser = _FunctionBodyParser(tokens[body_open:_matching(tokens, body_open, "{", "}") + 1], known_types, constants)
+    body, _ = parser.block(0)
+    qualifiers = {"static", "inline", "extern"}
+    return_tokens = [token for token in tokens[:name_index] if token[1] not in qualifiers]
+    calls, reads, writes = [], [], []
+    for statement in _walk(body):
+        calls.extend(statement.get("calls", []))
+        reads.extend(statement.get("reads", []))
+        writes.extend(statement.get("writes", []))
+    return {
+        "name": name,
+        "signature": _join(tokens[:params_close + 1]),
+        "return_type": _join(return_tokens),
+        "params": _parse_params(tokens[name_index + 2:params_close]),
+        "static": "static" in values[:name_index],
+        "start_line": start_line,
+        "end_line": end_line,
+        "locals": parser.locals,
+        "calls": _unique(calls),
+        "reads": _unique(reads),
+        "writes": _unique(writes),
+        "body": body,
+    }
+
+
+def _parse_directive(text, line, result):
+    match = re.match(r"#\s*include\s*[<\"]([^>\"]+)[>\"]", text)
+    if match:
+        result["includes"].append(match.group(1))
+        return
+    match = re.match(r"#\s*define\s+(\w+)(\([^)]*\))?\s*(.*)", text)
+    if match:
+        result["macros"][match.group(1)] = {"line": line, "params": match.group(2),
+                                            "value": re.sub(r"\s*(//.*|/\*.*?\*/)", "", match.group(3)).strip()}
+
+
+def _parse_declaration(tokens, line, result, known_types):
+    """Record prototypes, typedefs and global variables from a top-level declaration."""
+    values = [token[1] for token in tokens]
+    if "(" in values and "{" not in values:
+        paren = values.index("(")
+        if paren > 0 and tokens[paren - 1][0] == "ident" and values[0] != "typedef":
+            name = values[paren - 1]
+            result["prototypes"][name] = {"line": line, "signature": _join(tokens[:_matching(tokens, paren, "(", ")") + 1])}
+            return
+    if values and values[0] == "typedef":
+        pointer_name = re.search(r"\(\s*\*\s*(\w+)\s*\)", " ".join(values))
+        idents = [token[1] for token in tokens if token[0] == "ident"]
+        name = pointer_name.group(1) if pointer_name else (idents[-1] if idents else None)
+        if name:
+            result["types"][name] = {"kind": "typedef", "line": line, "aliases": _join(tokens[1:])}
+            known_types.add(name)
+        return
+    parser = _FunctionBodyParser(tokens + [("op", ";", line)], known_types)
+    parser._declaration(tokens, line)
+    for variable in parser.locals:
+        variable["static"] = "static" in values
+        variable["extern"] = "extern" in values
+        result["globals"][variable["name"]] = variable
+
+
+def _constants(result):
+    """Names that are constants rather than variables: object-like macros and enum members."""
+    names = {name for name, macro in result["macros"].items() if not macro["params"]}
+    for info in result["types"].values():
+        if info["kind"] == "enum":
+            names.update(member["name"] for member in info["members"])
+    return names
+
+
+def parse_c_source(lines, path=None):
+    """Parse C source into a compact AST and symbol table.
+
+    Args:
+        lines (iterable): Source lines or a string of C code
+        path (str): Optional file name recorded in the result
+
+    Returns:
+        dict: {"path", "includes", "macros", "types", "globals", "prototypes",
+               "functions", "unparsed"}; every function carries its signature,
+               line range, locals, calls, reads, writes and a statement tree
+    """
+    if isinstance(lines, str):
+        lines = lines.splitlines(keepends=True)
+    result = {"path": path, "includes": [], "macros": {}, "types": {}, "globals": {},
+              "prototypes": {}, "functions": {}, "unparsed": []}
+    known_types = set(BUILTIN_TYPES)
+    for unit in iter_units(lines):
+        tokens = tokenize(unit["text"], unit["start_line"])
+        code = [token for token in tokens if token[0] != "directive"]
+        for token in tokens:
+            if token[0] == "directive":
+                _parse_directive(token[1], token[2], result)
+        if not code:
+            continue
+        line = code[0][2]
+        try:
+            if unit["function"]:
+                result["functions"][unit["function"]] = parse_function(
+                    code, unit["function"], known_types, line, unit["end_line"], _constants(result))
+                continue
+            parsed_type = _parse_type(code, line)
+            if parsed_type:
+                name, info = parsed_type
+                if name:
+                    result["types"][name] = info
+                    known_types.add(name)
+                continue
+            if code[-1][1] == ";":
+                code = code[:-1]
+            _parse_declaration(code, line, result, known_types)
+        except (StopIteration, ValueError, IndexError):
+            result["unparsed"].append({"start_line": unit["start_line"], "end_line": unit["end_line"]})
+    return result
+
+
+#--------------------------------#
+#        Structure Summaries     #
+#--------------------------------#
+def parse_chunks(chunks, path=None):
+    """Parse a source that was stored as chunks by the code chunker."""
+    return parse_c_source((line for chunk in chunks for line in chunk["text"].splitlines(keepends=True)), path)
+
+
+def summarize_structure(structure, max_chars=None):
+    """Render a parsed file as a compact text overview for agent prompts.
+
+    The overview lists declarations and one line per function (signature,
+    line range, calls and writes); statement trees are left to the
+    code structure tool.
+
+    Args:
+        structure (dict): Result of `parse_c_source`
+        max_chars (int): Truncate the overview to about this many characters
+
+    Returns:
+        str: One line per declaration or function
+    """
+    lines = [f"File: {structure['path'] or '<upload>'}"]
+    if structure["includes"]:
+        lines.append("Includes: " + ", ".join(structure["includes"]))
+    if structure["macros"]:
+        lines.append("Macros: " + ", ".join(
+            f"{name}{macro['params'] or ''}={macro['value']}" for name, macro in structure["macros"].items()))
+    for name, info in structure["types"].items():
+        if info["kind"] == "enum":
+            lines.append(f"enum {name} {{" + ", ".join(member["name"] for member in info["members"]) + "}")
+        elif info["kind"] in ("struct", "union"):
+            lines.append(f"{info['kind']} {name} {{" + "; ".join(
+                f"{member['type']} {member['name']}" for member in info["members"]) + "}")
+        else:
+            lines.append(f"typedef {info['aliases']}")
+    for name, variable in structure["globals"].items():
+        lines.append(f"global {variable['type']} {name} (line {variable['line']})")
+    for name, function in structure["functions"].items():
+        line = f"{function['signature']} [lines {function['start_line']}-{function['end_line']}]"
+        if function["calls"]:
+            line += " calls: " + ", ".join(function["calls"])
+        if function["writes"]:
+            line += " | writes: " + ", ".join(function["writes"])
+        lines.append(line)
+    if structure["unparsed"]:
+        lines.append("Unparsed ranges: " + ", ".join(
+            f"{unit['start_line']}-{unit['end_line']}" for unit in structure["unparsed"]))
+    if max_chars is not None:
+        size = 0
+        for kept, line in enumerate(lines):
+            size += len(line) + 1
+            if size > max_chars:
+                lines = lines[:kept] + [f"... {len(lines) - kept} more lines, query the code structure tool"]
+                break
+    return "\n".join(lines)
+
+
+def lookup_symbol(structure, name):
+    """Return everything a parsed file knows about a name (function, type, macro, global, constant)."""
+    found = {}
+    if name in structure["functions"]:
+        found["function"] = structure["functions"][name]
+    if name in structure["prototypes"]:
+        found["prototype"] = structure["prototypes"][name]
+    if name in structure["types"]:
+        found["type"] = structure["types"][name]
+    if name in structure["macros"]:
+        found["macro"] = structure["macros"][name]
+    if name in structure["globals"]:
+        found["global"] = structure["globals"][name]
+    for type_name, info in structure["types"].items():
+        if info["kind"] == "enum" and any(member["name"] == name for member in info["members"]):
+            found["enum_constant_of"] = type_name
+    users = [function_name for function_name, function in structure["functions"].items()
+             if any(access == name or re.match(rf"{re.escape(name)}\b", access)
+                    for access in function["reads"] + function["writes"] + function["calls"])]
+    if users and found:
+        found["used_by"] = users
+    return found
@@ -0,0 +1,144 @@
+import os
+import re
+
+#--------------------------------#
+#        C Source Chunking       #
+#--------------------------------#
+# ~4 characters per token, so the default keeps a chunk around 3k tokens
+DEFAULT_CHUNK_CHARS = int(os.getenv("CODE_CHUNK_CHARS", "12000"))
+
+# `name(params)` right before the body; one level of nested parentheses covers function-pointer parameters
+_FUNCTION_HEADER = re.compile(r"\b([A-Za-z_]\w*)\s*\((?:[^()]|\([^()]*\))*\)\s*$")
+_COMMENT = re.compile(r"/\*.*?\*/|//[^\n]*", re.S)
+_NOT_FUNCTION_NAMES = {"if", "for", "while", "switch", "return", "sizeof"}
+
+
+def _function_name(text):
+    """Return the name of the function defined in a top-level unit, or None.
+
+    A definition is recognized by its shape, `name(...) {`, whatever the
+    return type, so functions returning a struct, union or enum count too.
+    """
+    code = _COMMENT.sub(" ", text)
+    if "{" not in code:
+        return None
+    header = code.split("{", 1)[0]
+    if "=" in header:
+        return None
+    match = _FUNCTION_HEADER.search(header)
+    if not match or match.group(1) in _NOT_FUNCTION_NAMES:
+        return None
+    return match.group(1)
+
+
+def iter_units(lines):
+    """Split C source lines into top-level units without loading the whole file.
+
+    A unit ends at a line where brace depth returns to zero after a `}` or
+    `;`, or at the end of a preprocessor directive. Comments and blank lines
+    are attached to the unit that follows them. Braces inside comments,
+    strings and character literals are ignored.
+
+    Args:
+        lines (iterable): Source lines, e.g. an open text file
+
+    Yields:
+        dict: Unit with "start_line", "end_line", "text" and "function"
+              (the function name for function definitions, else None)
+    """
+    depth = 0
+    in_block_comment = False
+    in_directive = False
+    buffer = []
+    start_line = None
+    lineno = 0
+
+    for lineno, line in enumerate(lines, 1):
+        if start_line is None:
+            start_line = lineno
+        buffer.append(line)
+        stripped = line.strip()
+        if not in_block_comment and depth == 0 and (stripped.startswith("#") or in_directive):
+            in_directive = stripped.endswith("\\")
+            if not in_directive:
+                text = "".join(buffer)
+                yield {"start_line": start_line, "end_line": lineno, "text": text, "function": None}
+                buffer, start_line = [], None
+            continue
+
+        last_significant = None
+        quote = None
+        i = 0
+        while i < len(line):
+            char = line[i]
+            pair = line[i:i + 2]
+            if in_block_comment:
+                if pair == "*/":
+                    in_block_comment = False
+                    i += 1
+            elif quote:
+                if char == "\\":
+                    i += 1
+                elif char == quote:
+                    quote = None
+            elif pair == "/*":
+                in_block_comment = True
+                i += 1
+            elif pair == "//":
+                break
+            elif char in "\"'":
+                quote = char
+                last_significant = char
+            elif not char.isspace():
+                if char == "{":
+                    depth += 1
+                elif char == "}":
+                    depth = max(depth - 1, 0)
+                last_significant = char
+            i += 1
+
+        if depth == 0 and last_significant in ("}", ";"):
+            text = "".join(buffer)
+            yield {"start_line": start_line, "end_line": lineno, "text": text, "function": _function_name(text)}
+            buffer, start_line = [], None
+
+    if buffer and "".join(buffer).strip():
+        text = "".join(buffer)
+        yield {"start_line": start_line, "end_line": lineno, "text": text, "function": _function_name(text)}
+
+
+def iter_chunks(lines, max_chars=DEFAULT_CHUNK_CHARS):
+    """Pack top-level units into chunks of at most `max_chars` characters.
+
+    Chunks only break at unit boundaries, so a function is never split; a
+    single unit larger than `max_chars` becomes a chunk of its own.
+
+    Args:
+        lines (iterable): Source lines, e.g. an open text file
+        max_chars (int): Soft size limit of a chunk
+
+    Yields:
+        dict: Chunk with "index", "start_line", "end_line", "text" and "functions"
+    """
+    index = 0
+    current = []
+    size = 0
+    for unit in iter_units(lines):
+        if current and size + len(unit["text"]) > max_chars:
+            yield _make_chunk(index, current)
+            index += 1
+            current, size = [], 0
+        current.append(unit)
+        size += len(unit["text"])
+    if current:
+        yield _make_chunk(index, current)
+
+
+def _make_chunk(index, units):
+    return {
+        "index": index,
+        "start_line": units[0]["start_line"],
+        "end_line": units[-1]["end_line"],
+        "text": "".join(unit["text"] for unit in units),
+        "functions": [unit["function"] for unit in units if unit["function"]],
+    }
@@ -0,0 +1,169 @@
+import hashlib
+import json
+import os
+import re
+
+#--------------------------------#
+#     Incremental Extraction     #
+#--------------------------------#
+STATE_DIR = os.getenv("EXTRACTION_STATE_DIR", ".cache/extraction_state")
+
+_POSITION_KEYS = {"line", "start_line", "end_line"}
+_SECTION_HEADING = re.compile(r"^(#{2,4})\s+`?([A-Za-z_]\w*)(?:\s*\(\))?`?(?:\s*\(\))?\s*$", re.MULTILINE)
+_HEADING = re.compile(r"^(#{1,6})\s", re.MULTILINE)
+_REQUIREMENT_START = re.compile(r"^\s*(?:[-*]\s*)?(?:\*\*)?Requirement ID(?:\*\*)?\s*:", re.MULTILINE | re.IGNORECASE)
+_REQUIREMENT_ID = re.compile(r"Requirement ID(?:\*\*)?\s*:\s*\**\s*([\w.-]+)", re.IGNORECASE)
+
+
+def _fingerprint(value):
+    """Hash a parsed element, ignoring line numbers so moved code keeps its fingerprint."""
+    def strip(item):
+        if isinstance(item, dict):
+            return {key: strip(child) for key, child in item.items() if key not in _POSITION_KEYS}
+        if isinstance(item, list):
+            return [strip(child) for child in item]
+        return item
+    return hashlib.sha256(json.dumps(strip(value), sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def function_fingerprints(structure):
+    return {name: _fingerprint(function) for name, function in structure["functions"].items()}
+
+
+def declarations_fingerprint(structure):
+    """Fingerprint everything outside function bodies (macros, types, globals, prototypes)."""
+    return _fingerprint({key: structure[key] for key in ("includes", "macros", "types", "globals", "prototypes")})
+
+
+def _state_path(source_key):
+    return os.path.join(STATE_DIR, hashlib.sha256(source_key.encode("utf-8")).hexdigest()[:16] + ".json")
+
+
+def load_state(source_key):
+    """Return the state saved by the last run on `source_key`, or None."""
+    try:
+        with open(_state_path(source_key), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_state(source_key, state):
+    os.makedirs(STATE_DIR, exist_ok=True)
+    path = _state_path(source_key)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump(dict(state, source=source_key), f)
+    os.replace(temporary, path)
+
+
+def clear_state(source_key):
+    """Forget the last run on `source_key`, so the next run on it is a full run."""
+    try:
+        os.remove(_state_path(source_key))
+    except FileNotFoundError:
+        pass
+
+
+def plan_incremental(index, state):
+    """Decide which functions need fresh analysis compared with the previous run.
+
+    Changed and new functions are affected, and so are their transitive callers,
+    whose behavior depends on them. A change outside function bodies (types,
+    macros, globals) can affect any function, so it forces a full run.
+
+    Returns:
+        dict: {"full": bool, "changed": [...], "affected": [...], "removed": [...],
+               "fingerprints": {...}, "declarations": str}
+    """
+    structure = index["structure"]
+    fingerprints = function_fingerprints(structure)
+    declarations = declarations_fingerprint(structure)
+    plan = {"full": True, "changed": sorted(fingerprints), "affected": sorted(fingerprints), "removed": [],
+            "fingerprints": fingerprints, "declarations": declarations}
+    if not state or state.get("declarations") != declarations:
+        return plan
+    previous = state["fingerprints"]
+    changed = {name for name, fingerprint in fingerprints.items() if previous.get(name) != fingerprint}
+    affected = set(changed)
+    pending = list(changed)
+    while pending:
+        for site in index["callers"].get(pending.pop(), []):
+            if site["function"] not in affected:
+                affected.add(site["function"])
+                pending.append(site["function"])
+    plan.update(full=False, changed=sorted(changed), affected=sorted(affected),
+                removed=sorted(set(previous) - set(fingerprints)))
+    return plan
+
+
+#--------------------------------#
+#     Per-Function Merging       #
+#--------------------------------#
+def split_sections(markdown, function_names):
+    """Split an analysis into per-function sections keyed by `### <function>` headings.
+
+    A section runs until the next heading of the same or a higher level.
+    """
+    sections = {}
+    for match in _SECTION_HEADING.finditer(markdown):
+        if match.group(2) not in function_names:
+            continue
+        level = len(match.group(1))
+        end = next((heading.start() for heading in _HEADING.finditer(markdown, match.end())
+                    if len(heading.group(1)) <= level), len(markdown))
+        sections[match.group(2)] = markdown[match.start():end].strip()
+    return sections
+
+
+def merge_sections(previous, markdown, plan, function_names):
+    """Keep the previous sections of unaffected functions and take the rest from the new analysis."""
+    stale = set(plan["affected"]) | set(plan["removed"])
+    merged = {name: text for name, text in previous.items() if name not in stale}
+    merged.update(split_sections(markdown, function_names))
+    return merged
+
+
+def split_requirements(markdown):
+    """Split a requirement list into one block per `Requirement ID` entry."""
+    starts = [match.start() for match in _REQUIREMENT_START.finditer(markdown)]
+    return [markdown[start:end].strip() for start, end in zip(starts, starts[1:] + [len(markdown)])]
+
+
+def requirement_id(block):
+    match = _REQUIREMENT_ID.search(block)
+    return match.group(1) if match else None
+
+
+def _mentions(block, names):
+    return {name for name in names if re.search(rf"\b{re.escape(name)}\b", block)}
+
+
+def previous_requirements_for(state, names):
+    """Return the previous requirement blocks that cite any of `names`."""
+    return [block for block in state.get("requirements", []) if _mentions(block, names)]
+
+
+def merge_requirements(state, new_blocks, plan):
+    """Merge a partial run's validated requirements into the previous set.
+
+    Previous requirements that cite an affected or removed function are
+    replaced by the new ones; requirements that keep an existing ID replace
+    it in place, so unchanged functions keep their requirement IDs.
+
+    Returns:
+        list: The merged requirement blocks
+    """
+    stale = set(plan["affected"]) | set(plan["removed"])
+    new_by_id = {requirement_id(block): block for block in new_blocks if requirement_id(block)}
+    merged = []
+    replaced = set()
+    for block in state.get("requirements", []):
+        block_id = requirement_id(block)
+        if block_id in new_by_id:
+            merged.append(new_by_id[block_id])
+            replaced.add(block_id)
+        elif not _mentions(block, stale):
+            merged.append(block)
+    merged.extend(block for block in new_blocks if requirement_id(block) not in replaced)
+    return merged
@@ -0,0 +1,320 @@
+import hashlib
+import json
+import os
+from src.tools.c_parser import parse_chunks
+
+#--------------------------------#
+#        Static Code Index       #
+#--------------------------------#
+# Bump when the index layout or the parser output changes, so stale cache files are rebuilt
+INDEX_VERSION = 2
+INDEX_CACHE_DIR = os.getenv("CODE_INDEX_CACHE_DIR", ".cache/code_index")
+# Call paths listed by a "paths into" query
+MAX_CALL_PATHS = int(os.getenv("CODE_INDEX_MAX_PATHS", "20"))
+
+ENTRY, EXIT = 0, 1
+
+
+class _CFGBuilder:
+    """Lower a function's statement tree into a statement-level control-flow graph.
+
+    Dangling edges are carried as (node id, label) pairs until the next node
+    is created; `break`, `continue` and `goto` are wired to their targets.
+    Every node records the branch conditions that guard it.
+    """
+
+    def __init__(self):
+        self.nodes = [{"id": ENTRY, "kind": "entry"}, {"id": EXIT, "kind": "exit"}]
+        self.edges = []
+        self.labels = {}
+        self.gotos = []
+
+    def node(self, statement, text, guards):
+        node = {"id": len(self.nodes), "kind": statement["kind"], "line": statement["line"], "text": text,
+                "guards": list(guards)}
+        for key in ("calls", "reads", "writes"):
+            node[key] = statement.get(key, [])
+        self.nodes.append(node)
+        return node["id"]
+
+    def connect(self, preds, target):
+        for source, label in preds:
+            self.edges.append([source, target, label])
+
+    def sequence(self, statements, preds, guards, loop):
+        for statement in statements:
+            preds = self.statement(statement, preds, guards, loop)
+        return preds
+
+    def statement(self, statement, preds, guards, loop):
+        kind = statement["kind"]
+        if kind == "block":
+            return self.sequence(statement["body"], preds, guards, loop)
+        if kind == "if":
+            node = self.node(statement, f"if ({statement['condition']})", guards)
+            self.connect(preds, node)
+            taken = self.sequence(statement["body"], [(node, "true")], guards + [statement["condition"]], loop)
+            not_taken = [(node, "false")]
+            if "else" in statement:
+                not_taken = self.sequence(statement["else"], not_taken, guards + [f"!({statement['condition']})"],
+                                          loop)
+            return taken + not_taken
+        if kind in ("while", "for"):
+            header = (f"for ({statement['init']}; {statement['condition']}; {statement['step']})"
+                      if kind == "for" else f"while ({statement['condition']})")
+            node = self.node(statement, header, guards)
+            self.connect(preds, node)
+            breaks = []
+            body = self.sequence(statement["body"], [(node, "true")], guards + [header], (node, breaks))
+            self.connect(body, node)
+            return [(node, "false")] + breaks
+        if kind == "do":
+            node = self.node(statement, f"do ... while ({statement['condition']})", guards)
+            first = len(self.nodes)
+            breaks = []
+            body = self.sequence(statement["body"], preds, guards, (node, breaks))
+            self.connect(body, node)
+            self.edges.append([node, first if first < len(self.nodes) else node, "true"])
+            if first == len(self.nodes):
+                self.connect(preds, node)
+            return [(node, "false")] + breaks
+        if kind == "switch":
+            node = self.node(statement, f"switch ({statement['condition']})", guards)
+            self.connect(preds, node)
+            breaks = []
+            inner = []
+            has_default = False
+            case_guards = guards
+            for child in statement["body"]:
+                if child["kind"] == "case":
+                    label = "default" if child["value"] == "default" else f"case {child['value']}"
+                    has_default = has_default or child["value"] == "default"
+                    case_guards = guards + [f"{statement['condition']}: {label}"]
+                    case_node = self.node(child, label, case_guards)
+                    self.connect(inner, case_node)
+                    self.edges.append([node, case_node, label])
+                    inner = [(case_node, None)]
+                else:
+                    inner = self.statement(child, inner, case_guards, (loop[0] if loop else None, breaks))
+            return inner + breaks + ([] if has_default else [(node, "default")])
+        if kind == "break":
+            if loop:
+                loop[1].extend(preds)
+            return []
+        if kind == "continue":
+            if loop and loop[0] is not None:
+                self.connect(preds, loop[0])
+            return []
+        if kind == "return":
+            node = self.node(statement, f"return {statement['text']}".strip(), guards)
+            self.connect(preds, node)
+            self.edges.append([node, EXIT, None])
+            return []
+        if kind == "goto":
+            node = self.node(statement, f"goto {statement['label']}", guards)
+            self.connect(preds, node)
+            self.gotos.append((node, statement["label"]))
+            return []
+        if kind == "label":
+            node = self.node(statement, f"{statement['label']}:", guards)
+            self.connect(preds, node)
+            self.labels[statement["label"]] = node
+            return [(node, None)]
+        node = self.node(statement, statement.get("text", kind), guards)
+        self.connect(preds, node)
+        return [(node, None)]
+
+
+def build_cfg(function):
+    """Build the control-flow graph of a parsed function.
+
+    Returns:
+        dict: {"nodes": [...], "edges": [[from, to, label], ...]}; node 0 is
+              the entry and node 1 the exit
+    """
+    builder = _CFGBuilder()
+    preds = builder.sequence(function["body"], [(ENTRY, None)], [], None)
+    builder.connect(preds, EXIT)
+    for node, label in builder.gotos:
+        builder.edges.append([node, builder.labels.get(label, EXIT), None])
+    return {"nodes": builder.nodes, "edges": builder.edges}
+
+
+def _kills(written, variable):
+    # Element writes (`x[]`) update part of an array and leave earlier definitions live
+    return written == variable and not written.endswith("[]")
+
+
+def _uses(read, defined):
+    # Reading `p->field` or `a[]` also uses the definition of `p` or `a`
+    return read == defined or read.startswith((defined + "->", defined + ".", defined + "["))
+
+
+def def_use_chains(function, cfg):
+    """Link each definition in a function to the uses it reaches (reaching definitions).
+
+    Parameters count as definitions at the entry node.
+
+    Returns:
+        list: {"variable", "line", "uses": [lines]} per definition, in line order
+    """
+    nodes = cfg["nodes"]
+    predecessors = {node["id"]: [] for node in nodes}
+    for source, target, _ in cfg["edges"]:
+        predecessors[target].append(source)
+    gen = {node["id"]: {(variable, node["id"]) for variable in node.get("writes", [])} for node in nodes}
+    gen[ENTRY] = {(param["name"], ENTRY) for param in function["params"] if param["name"]}
+    reach_in = {node["id"]: set() for node in nodes}
+    reach_out = {node["id"]: set(gen[node["id"]]) for node in nodes}
+    changed = True
+    while changed:
+        changed = False
+        for node in nodes:
+            node_id = node["id"]
+            incoming = set().union(*(reach_out[pred] for pred in predecessors[node_id]))
+            written = node.get("writes", [])
+            outgoing = gen[node_id] | {(variable, origin) for variable, origin in incoming
+                                       if not any(_kills(name, variable) for name in written)}
+            if incoming != reach_in[node_id] or outgoing != reach_out[node_id]:
+                reach_in[node_id], reach_out[node_id] = incoming, outgoing
+                changed = True
+
+    uses = {}
+    for node in nodes:
+        for variable in node.get("reads", []):
+            for defined, origin in reach_in[node["id"]]:
+                if _uses(variable, defined):
+                    uses.setdefault((defined, origin), set()).add(node["line"])
+    lines = {node["id"]: node.get("line", function["start_line"]) for node in nodes}
+    chains = [{"variable": variable, "line": lines[origin], "uses": sorted(uses.get((variable, origin), ()))}
+              for node_id in sorted(gen) for variable, origin in sorted(gen[node_id])]
+    return sorted(chains, key=lambda chain: (chain["line"], chain["variable"]))
+
+
+def build_code_index(structure):
+    """Build the call graph, per-function CFGs, def-use chains and variable accesses of a parsed file.
+
+    Args:
+        structure (dict): Result of `parse_c_source`
+
+    Returns:
+        dict: Index with "structure", "calls", "callers", "external", "roots",
+              "cfg", "def_use" and "accesses"
+    """
+    functions = structure["functions"]
+    index = {"version": INDEX_VERSION, "structure": structure, "calls": {}, "callers": {}, "cfg": {},
+             "def_use": {}, "accesses": {}}
+    for name, function in functions.items():
+        cfg = build_cfg(function)
+        index["cfg"][name] = cfg
+        index["def_use"][name] = def_use_chains(function, cfg)
+        index["calls"][name] = function["calls"]
+        for node in cfg["nodes"]:
+            site = {"function": name, "line": node.get("line"), "text": node.get("text"), "guards": node.get("guards")}
+            for callee in node.get("calls", []):
+                index["callers"].setdefault(callee, []).append(site)
+            for mode in ("reads", "writes"):
+                for variable in node.get(mode, []):
+                    accesses = index["accesses"].setdefault(variable, {"reads": [], "writes": []})
+                    accesses[mode].append(site)
+    index["external"] = sorted(callee for callee in index["callers"] if callee not in functions)
+    index["roots"] = [name for name in functions if name not in index["callers"]]
+    return index
+
+
+#--------------------------------#
+#          Index Cache           #
+#--------------------------------#
+def load_code_index(code_chunks, path=None, cache_dir=INDEX_CACHE_DIR):
+    """Parse and index a chunked source, reusing a cached index for identical content.
+
+    The cache key is the SHA-256 of the source text, so re-uploading an
+    unchanged file skips both parsing and indexing.
+
+    Args:
+        code_chunks (list): Chunks from `iter_chunks`
+        path (str): File path recorded in the structure
+        cache_dir (str): Directory of cached indexes; None disables caching
+
+    Returns:
+        dict: The index from `build_code_index`, plus its "hash"
+    """
+    digest = hashlib.sha256()
+    for chunk in code_chunks:
+        digest.update(chunk["text"].encode("utf-8"))
+    file_hash = digest.hexdigest()
+    cache_path = os.path.join(cache_dir, f"{file_hash}.json") if cache_dir else None
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with open(cache_path, encoding="utf-8") as f:
+                index = json.load(f)
+            if index.get("version") == INDEX_VERSION:
+                index["structure"]["path"] = path
+                return index
+        except (OSError, ValueError):
+            pass  # Unreadable cache entries are rebuilt below
+    index = build_code_index(parse_chunks(code_chunks, path))
+    index["hash"] = file_hash
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        temporary = f"{cache_path}.{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(index, f, separators=(",", ":"))
+        os.replace(temporary, cache_path)
+    return index
+
+
+#--------------------------------#
+#         Index Queries          #
+#--------------------------------#
+def callers_of(indexes, name):
+    """Return the call sites of `name` across files, with the conditions guarding each call."""
+    return {path: index["callers"][name] for path, index in indexes.items() if name in index["callers"]}
+
+
+def callees_of(indexes, name):
+    return {path: index["calls"][name] for path, index in indexes.items() if name in index["calls"]}
+
+
+def call_paths_into(indexes, name, max_paths=MAX_CALL_PATHS):
+    """List call chains from root functions (e.g. `main`) down to `name` across all files.
+
+    Returns:
+        list: Paths as lists of function names, shortest first, at most `max_paths`
+    """
+    callers = {}
+    defined = set()
+    for index in indexes.values():
+        defined.update(index["calls"])
+        for callee, sites in index["callers"].items():
+            callers.setdefault(callee, set()).update(site["function"] for site in sites)
+    paths = []
+    frontier = [[name]]
+    while frontier and len(paths) < max_paths:
+        next_frontier = []
+        for path in frontier:
+            parents = [caller for caller in sorted(callers.get(path[0], ())) if caller not in path]
+            if not parents:
+                if len(path) > 1 or path[0] in defined:
+                    paths.append(path)
+                continue
+            next_frontier.extend([parent] + path for parent in parents)
+        frontier = next_frontier
+    return paths[:max_paths]
+
+
+def accesses_of(indexes, variable, mode):
+    """Return the statements that read or write `variable` (mode "reads" or "writes").
+
+    A bare field name such as `soc` also matches accesses like `bms->soc`.
+    """
+    found = {}
+    for path, index in indexes.items():
+        sites = []
+        for name, accesses in index["accesses"].items():
+            base = name.rstrip("[]")
+            if base == variable or base.endswith(("->" + variable, "." + variable)):
+                sites.extend(dict(site, variable=name) for site in accesses[mode])
+        if sites:
+            found[path] = sorted(sites, key=lambda site: (site["function"], site["line"] or 0))
+    return found
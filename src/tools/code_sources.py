@@ -0,0 +1,81 @@
+import io
+import os
+import zipfile
+from src.tools.code_chunker import iter_chunks
+
+#--------------------------------#
+#      Multi-File Code Sources   #
+#--------------------------------#
+C_SOURCE_EXTENSIONS = (".c", ".h")
+
+
+def _is_c_source(path):
+    return path.lower().endswith(C_SOURCE_EXTENSIONS) and not os.path.basename(path).startswith(".")
+
+
+def _chunk_stream(binary_stream):
+    lines = io.TextIOWrapper(binary_stream, encoding="utf-8", errors="replace")
+    try:
+        return list(iter_chunks(lines))
+    finally:
+        # Detach so closing the wrapper leaves the caller's stream alone
+        lines.detach()
+
+
+def load_uploaded_sources(uploaded_files):
+    """Chunk uploaded C files and the C files inside any uploaded zip archives.
+
+    Args:
+        uploaded_files (list): File-like uploads exposing `name`
+
+    Returns:
+        list: Sources as {"path": str, "chunks": list}, sorted by path
+
+    Raises:
+        ValueError: If an uploaded zip archive is corrupt or not a zip file
+    """
+    sources = []
+    for uploaded_file in uploaded_files:
+        uploaded_file.seek(0)
+        if uploaded_file.name.lower().endswith(".zip"):
+            try:
+                with zipfile.ZipFile(uploaded_file) as archive:
+                    for member in archive.infolist():
+                        if not member.is_dir() and _is_c_source(member.filename):
+                            with archive.open(member) as stream:
+                                sources.append({"path": member.filename, "chunks": _chunk_stream(stream)})
+            except zipfile.BadZipFile as e:
+                raise ValueError(f"'{uploaded_file.name}' is not a valid zip archive") from e
+        else:
+            sources.append({"path": uploaded_file.name, "chunks": _chunk_stream(uploaded_file)})
+    return sorted(sources, key=lambda source: source["path"])
+
+
+def load_directory_sources(directory, root=None):
+    """Chunk every C file under a directory.
+
+    The directory must resolve inside `root` (default: the working directory),
+    so the app cannot be pointed at arbitrary paths on the server.
+
+    Args:
+        directory (str): Directory to scan recursively
+        root (str): Directory the scan is confined to
+
+    Returns:
+        list: Sources as {"path": str, "chunks": list}, sorted by path
+
+    Raises:
+        ValueError: If the directory is outside `root` or does not exist
+    """
+    root = os.path.realpath(root or os.getcwd())
+    directory = os.path.realpath(os.path.join(root, directory))
+    if os.path.commonpath([root, directory]) != root or not os.path.isdir(directory):
+        raise ValueError(f"'{directory}' is not a directory inside {root}")
+    sources = []
+    for current, _, filenames in os.walk(directory):
+        for filename in filenames:
+            path = os.path.join(current, filename)
+            if _is_c_source(path):
+                with open(path, "rb") as stream:
+                    sources.append({"path": os.path.relpath(path, directory), "chunks": _chunk_stream(stream)})
+    return sorted(sources, key=lambda source: source["path"])
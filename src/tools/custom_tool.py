@@ -1,7 +1,13 @@
-from typing import Type
+from typing import List, Type
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
-import os, requests
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import asyncio, json, os, requests
+from src.utils import http_client
+from src.utils.response_cache import get_exa_cache
+from src.utils.tracing import traced_tool
+from src.tools.c_parser import summarize_structure, lookup_symbol
+from src.tools.code_index import callers_of, callees_of, call_paths_into, accesses_of
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -15,16 +21,40 @@ class EXAAnswerTool(BaseTool):
     name: str = "Ask Exa a question"
     description: str = "A tool that asks Exa a question and returns the answer."
     args_schema: Type[BaseModel] = EXAAnswerToolSchema
-    answer_url: str = "https://api.exa.ai/answer"
+    answer_url: str = os.getenv("EXA_ANSWER_URL", "https://api.exa.ai/answer")
     headers: dict = {
         "accept": "application/json",
         "content-type": "application/json",
         "x-api-key": os.getenv("EXA_API_KEY")
     }
+    use_cache: bool = True
 
+    @traced_tool
     def _run(self, query: str):
+        response_data = self._answer(query)
+
+        answer = response_data["answer"]
+        citations = response_data.get("citations", [])
+        output = f"Answer: {answer}\n\n"
+        if citations:
+            output += "Citations:\n"
+            for citation in citations:
+                output += f"- {citation['title']} ({citation['url']})\n"
+
+        return output
+
+    def _answer(self, query: str):
+        cache = get_exa_cache() if self.use_cache else None
+        response_data = cache.get(query) if cache else None
+        if response_data is None:
+            response_data = self._fetch_answer(query)
+            if cache:
+                cache.set(query, response_data)
+        return response_data
+
+    def _fetch_answer(self, query: str):
         try:
-            response = requests.post(
+            response = http_client.post(
                 self.answer_url,
                 json={"query": query, "text": True},
                 headers=self.headers,
@@ -39,12 +69,179 @@ class EXAAnswerTool(BaseTool):
             raise
 
         response_data = response.json()
-        answer = response_data["answer"]
-        citations = response_data.get("citations", [])
-        output = f"Answer: {answer}\n\n"
-        if citations:
-            output += "Citations:\n"
-            for citation in citations:
-                output += f"- {citation['title']} ({citation['url']})\n"
+        return {
+            "answer": response_data["answer"],
+            "citations": [
+                {"title": citation.get("title"), "url": citation.get("url")}
+                for citation in response_data.get("citations", [])
+            ],
+        }
+
+#--------------------------------#
+#     EXA Fan-out Answer Tool    #
+#--------------------------------#
+EXA_FANOUT_MAX_QUERIES = int(os.getenv("EXA_FANOUT_MAX_QUERIES", "8"))
+EXA_FANOUT_CONCURRENCY = int(os.getenv("EXA_FANOUT_CONCURRENCY", "4"))
+# Answers are cut to this many characters so a fan-out stays cheap to feed back to the LLM
+EXA_FANOUT_ANSWER_CHARS = int(os.getenv("EXA_FANOUT_ANSWER_CHARS", "1200"))
+
+
+def citation_key(url):
+    """Normalize a citation URL so the same page cited by several answers is listed once."""
+    parts = urlsplit((url or "").strip())
+    host = parts.netloc.lower()
+    host = host[4:] if host.startswith("www.") else host
+    query = urlencode([(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                       if not key.lower().startswith("utm_")])
+    return urlunsplit((parts.scheme.lower(), host, parts.path.rstrip("/"), query, ""))
+
+
+def merge_answers(queries, results):
+    """Merge several Exa answers into one evidence block with a shared, deduplicated source list.
+
+    Args:
+        queries (list): The sub-queries, in the order they were asked
+        results (list): Per query, the answer dict or the exception it raised
+
+    Returns:
+        str: "Q<n>:"/"A<n>:" pairs citing "[k]" markers, followed by the numbered sources
+    """
+    sources = {}
+    sections = []
+    for number, (query, result) in enumerate(zip(queries, results), 1):
+        if isinstance(result, BaseException):
+            sections.append(f"Q{number}: {query}\nA{number}: (failed: {type(result).__name__}: {result})")
+            continue
+        markers = []
+        for citation in result.get("citations", []):
+            key = citation_key(citation.get("url")) or citation.get("title")
+            if not key:
+                continue
+            if key not in sources:
+                sources[key] = (len(sources) + 1, citation.get("title") or citation.get("url"), citation.get("url"))
+            marker = f"[{sources[key][0]}]"
+            if marker not in markers:
+                markers.append(marker)
+        answer = " ".join(str(result.get("answer", "")).split())
+        if len(answer) > EXA_FANOUT_ANSWER_CHARS:
+            answer = answer[:EXA_FANOUT_ANSWER_CHARS].rsplit(" ", 1)[0] + " …"
+        sections.append(f"Q{number}: {query}\nA{number}: {answer} {''.join(markers)}".rstrip())
+    output = "\n\n".join(sections)
+    if sources:
+        output += "\n\nSources:\n" + "\n".join(f"[{number}] {title} ({url})" for number, title, url in sources.values())
+    return output
+
+
+class EXAMultiAnswerToolSchema(BaseModel):
+    queries: List[str] = Field(..., description=(
+        f"Independent sub-questions to ask Exa at the same time (at most {EXA_FANOUT_MAX_QUERIES})."))
+
+class EXAMultiAnswerTool(EXAAnswerTool):
+    name: str = "Ask Exa several questions at once"
+    description: str = ("Asks Exa up to {} independent questions concurrently and returns every answer with one "
+                        "shared, numbered list of sources. Prefer this over asking questions one by one."
+                        ).format(EXA_FANOUT_MAX_QUERIES)
+    args_schema: Type[BaseModel] = EXAMultiAnswerToolSchema
+    concurrency: int = EXA_FANOUT_CONCURRENCY
+
+    @traced_tool
+    def _run(self, queries: List[str]):
+        return asyncio.run(self._arun(queries))
+
+    async def _arun(self, queries: List[str]):
+        """Ask all sub-queries concurrently; a failed query is reported inline instead of failing the call."""
+        if isinstance(queries, str):
+            queries = [queries]
+        unique = list(dict.fromkeys(" ".join(str(query).split()) for query in queries if str(query).strip()))
+        unique = unique[:EXA_FANOUT_MAX_QUERIES]
+        if not unique:
+            return "No questions were given."
+        # Requests go through the shared keep-alive session, whose pool also caps connections per host
+        semaphore = asyncio.Semaphore(max(1, self.concurrency))
+
+        async def ask(query):
+            async with semaphore:
+                return await asyncio.to_thread(self._answer, query)
+
+        results = await asyncio.gather(*(ask(query) for query in unique), return_exceptions=True)
+        return merge_answers(unique, results)
+
+#--------------------------------#
+#      Code Structure Tool       #
+#--------------------------------#
+class CodeStructureToolSchema(BaseModel):
+    query: str = Field(..., description=(
+        'One of: "overview", "function <name>" (statement tree with calls, reads and writes), '
+        '"type <name>" or "symbol <name>" (macro, global, enum constant, type or function, with its users).'))
+
+class CodeStructureTool(BaseTool):
+    name: str = "Look up C code structure"
+    description: str = ("Returns the locally parsed structure of the C code under analysis: declarations, "
+                        "function signatures and per-statement control flow, calls, reads and writes.")
+    args_schema: Type[BaseModel] = CodeStructureToolSchema
+    files: dict = {}
+
+    @traced_tool
+    def _run(self, query: str):
+        command, _, name = query.strip().partition(" ")
+        command, name = command.lower(), name.strip()
+        if command == "overview":
+            return "\n\n".join(summarize_structure(structure) for structure in self.files.values())
+        if command in ("function", "type", "symbol") and name:
+            found = {}
+            for path, structure in self.files.items():
+                if command == "function":
+                    match = structure["functions"].get(name)
+                elif command == "type":
+                    match = structure["types"].get(name)
+                else:
+                    match = lookup_symbol(structure, name)
+                if match:
+                    found[path] = match
+            if not found:
+                return f"No {command} named '{name}' in the parsed code."
+            return json.dumps(found, separators=(",", ":"))
+        return 'Unknown query. Use "overview", "function <name>", "type <name>" or "symbol <name>".'
+
+#--------------------------------#
+#        Code Index Tool         #
+#--------------------------------#
+class CodeIndexToolSchema(BaseModel):
+    query: str = Field(..., description=(
+        'One of: "callers <function>", "callees <function>", "paths <function>" (call chains from entry points), '
+        '"writers <variable>", "readers <variable>" (a field name like "soc" matches "bms->soc"), '
+        '"cfg <function>" (control-flow graph) or "defuse <function>" (def-use chains).'))
+
+class CodeIndexTool(BaseTool):
+    name: str = "Query C call graph and data flow"
+    description: str = ("Answers call graph, control-flow and def-use questions about the C code under analysis "
+                        "from a precomputed index. Call sites and accesses include the branch conditions guarding them.")
+    args_schema: Type[BaseModel] = CodeIndexToolSchema
+    indexes: dict = {}
+
+    @traced_tool
+    def _run(self, query: str):
+        command, _, name = query.strip().partition(" ")
+        command, name = command.lower(), name.strip()
+        if not name:
+            return self._usage()
+        if command == "callers":
+            found = callers_of(self.indexes, name)
+        elif command == "callees":
+            found = callees_of(self.indexes, name)
+        elif command == "paths":
+            found = call_paths_into(self.indexes, name)
+        elif command in ("writers", "readers"):
+            found = accesses_of(self.indexes, name, "writes" if command == "writers" else "reads")
+        elif command in ("cfg", "defuse"):
+            key = "cfg" if command == "cfg" else "def_use"
+            found = {path: index[key][name] for path, index in self.indexes.items() if name in index[key]}
+        else:
+            return self._usage()
+        if not found:
+            return f"No {command} found for '{name}'."
+        return json.dumps(found, separators=(",", ":"))
 
-        return output
\ No newline at end of file
+    def _usage(self):
+        return ('Unknown query. Use "callers <function>", "callees <function>", "paths <function>", '
+                '"writers <variable>", "readers <variable>", "cfg <function>" or "defuse <function>".')
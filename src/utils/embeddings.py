@@ -0,0 +1,155 @@
+import os
+import re
+import threading
+import zlib
+import numpy as np
+from src.utils import http_client
+from dotenv import load_dotenv
+load_dotenv()
+
+#--------------------------------#
+#        Embedding Backends      #
+#--------------------------------#
+# "auto" uses OpenAI when OPENAI_API_KEY is set and the local hashing embedder otherwise;
+# "local" never leaves the machine; "sentence-transformers" needs that package and a local model
+EMBEDDING_BACKEND = os.getenv("KNOWLEDGE_EMBEDDER", "auto")
+# Same default as CrewAI's knowledge storage
+EMBEDDING_MODEL = os.getenv("KNOWLEDGE_EMBEDDING_MODEL", "text-embedding-3-small")
+EMBEDDING_BATCH_SIZE = int(os.getenv("KNOWLEDGE_EMBEDDING_BATCH_SIZE", "64"))
+LOCAL_EMBEDDING_DIM = int(os.getenv("KNOWLEDGE_EMBEDDING_DIM", "1024"))
+SENTENCE_TRANSFORMER_MODEL = os.getenv("KNOWLEDGE_LOCAL_MODEL", "all-MiniLM-L6-v2")
+# Hashed features remembered by the local embedder before the memo is reset
+_MAX_MEMO = 1_000_000
+
+
+class OpenAIEmbedder:
+    """Embed texts with the OpenAI embeddings API, several texts per request."""
+
+    url = "https://api.openai.com/v1/embeddings"
+
+    def __init__(self, model=EMBEDDING_MODEL, batch_size=EMBEDDING_BATCH_SIZE):
+        self.model = model
+        self.batch_size = batch_size
+        self.name = f"openai:{model}"
+
+    def embed(self, texts):
+        """Return L2-normalized float32 embeddings, one row per text."""
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY is required for OpenAI embeddings")
+        rows = []
+        for start in range(0, len(texts), self.batch_size):
+            response = http_client.post(
+                self.url,
+                json={"model": self.model, "input": texts[start:start + self.batch_size]},
+                headers={"Authorization": f"Bearer {api_key}"},
+            )
+            response.raise_for_status()
+            data = sorted(response.json()["data"], key=lambda item: item["index"])
+            rows.extend(item["embedding"] for item in data)
+        return normalize(np.asarray(rows, dtype=np.float32))
+
+
+class HashingEmbedder:
+    """Embed texts on the CPU by hashing words, word bigrams and character trigrams.
+
+    Needs no model download or network access, and its cost is linear in the
+    number of tokens. Each batch is encoded with a handful of NumPy calls: every
+    distinct feature is hashed once, then all counts are scattered into the
+    batch matrix at once and scaled by log term frequency.
+    """
+
+    version = 1
+
+    def __init__(self, dim=LOCAL_EMBEDDING_DIM, batch_size=EMBEDDING_BATCH_SIZE):
+        self.dim = dim
+        self.batch_size = batch_size
+        self.name = f"hashing-v{self.version}:{dim}"
+        self._buckets = {}
+
+    @staticmethod
+    def _features(text):
+        words = re.findall(r"\w+", text.lower())
+        features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        for word in words:
+            padded = f"<{word}>"
+            features.extend(f"#{padded[i:i + 3]}" for i in range(len(padded) - 2))
+        return features
+
+    def _bucket(self, feature):
+        # Stable across processes (unlike hash()), with the sign from an independent bit
+        bucket = self._buckets.get(feature)
+        if bucket is None:
+            if len(self._buckets) >= _MAX_MEMO:
+                self._buckets.clear()
+            value = zlib.crc32(feature.encode("utf-8"))
+            bucket = self._buckets[feature] = (value % self.dim, 1.0 if value & 0x80000000 else -1.0)
+        return bucket
+
+    def embed(self, texts):
+        """Return L2-normalized float32 embeddings, one row per text."""
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for start in range(0, len(texts), self.batch_size):
+            rows, columns, signs = [], [], []
+            for row, text in enumerate(texts[start:start + self.batch_size], start):
+                for feature in self._features(text):
+                    column, sign = self._bucket(feature)
+                    rows.append(row)
+                    columns.append(column)
+                    signs.append(sign)
+            if rows:
+                np.add.at(vectors, (np.asarray(rows), np.asarray(columns)), np.asarray(signs, dtype=np.float32))
+        vectors = np.sign(vectors) * np.log1p(np.abs(vectors))
+        return normalize(vectors)
+
+
+class SentenceTransformerEmbedder:
+    """Embed texts with a locally installed sentence-transformers model on the CPU."""
+
+    def __init__(self, model, batch_size=EMBEDDING_BATCH_SIZE):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model, device="cpu")
+        self.batch_size = batch_size
+        self.name = f"sentence-transformers:{model}"
+
+    def embed(self, texts):
+        vectors = self.model.encode(texts, batch_size=self.batch_size, convert_to_numpy=True)
+        return normalize(vectors.astype(np.float32))
+
+
+def normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+_embedders = {}
+_embedders_lock = threading.Lock()
+
+
+def _resolve_backend():
+    """Return the backend `get_embedder` uses now; "auto" follows whether an OpenAI key is set."""
+    if EMBEDDING_BACKEND == "auto":
+        return "openai" if os.getenv("OPENAI_API_KEY") else "local"
+    return EMBEDDING_BACKEND
+
+
+def get_embedder():
+    """Return the process-wide embedder of the current backend for knowledge retrieval.
+
+    The backend is resolved at every call, so an OpenAI key entered after the
+    first retrieval switches "auto" from the local embedder to OpenAI.
+    """
+    backend = _resolve_backend()
+    with _embedders_lock:
+        embedder = _embedders.get(backend)
+        if embedder is None:
+            if backend == "openai":
+                embedder = OpenAIEmbedder()
+            elif backend == "local":
+                embedder = HashingEmbedder()
+            elif backend == "sentence-transformers":
+                embedder = SentenceTransformerEmbedder(SENTENCE_TRANSFORMER_MODEL)
+            else:
+                raise ValueError(f"Unknown KNOWLEDGE_EMBEDDER '{backend}'")
+            _embedders[backend] = embedder
+    return embedder
@@ -0,0 +1,93 @@
+import os
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+
+#--------------------------------#
+#       Shared HTTP Session      #
+#--------------------------------#
+# (connect, read) timeouts in seconds applied when a caller does not pass one
+DEFAULT_TIMEOUT = (
+    float(os.getenv("HTTP_CONNECT_TIMEOUT", "5")),
+    float(os.getenv("HTTP_READ_TIMEOUT", "60")),
+)
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Return the process-wide keep-alive session used for all outbound calls.
+
+    Connections are pooled per host (HTTP_POOL_MAXSIZE, default 10) and the pool
+    blocks instead of opening extra sockets when it is exhausted, which acts as
+    a per-host concurrency limit.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=int(os.getenv("HTTP_POOL_CONNECTIONS", "10")),
+                pool_maxsize=int(os.getenv("HTTP_POOL_MAXSIZE", "10")),
+                pool_block=True,
+                max_retries=0,
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+    return _session
+
+
+def _retry_delay(attempt, backoff_base, backoff_max, response=None):
+    """Full-jitter exponential backoff, honouring a numeric Retry-After header."""
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), backoff_max)
+    return random.uniform(0, min(backoff_max, backoff_base * (2 ** attempt)))
+
+
+def request(method, url, *, timeout=None, retries=3, backoff_base=0.5, backoff_max=8.0, **kwargs):
+    """Send a request through the shared session with bounded timeouts and retries.
+
+    Connection errors, timeouts and 429/5xx responses are retried up to
+    `retries` times with jittered exponential backoff. The last response is
+    returned as-is so callers keep using `raise_for_status()`.
+
+    Args:
+        method (str): HTTP method, e.g. "GET" or "POST"
+        url (str): Target URL
+        timeout (float | tuple): Overrides DEFAULT_TIMEOUT
+        retries (int): Number of retries after the first attempt
+        **kwargs: Passed through to `requests.Session.request`
+
+    Returns:
+        requests.Response: The final response
+    """
+    session = get_session()
+    timeout = timeout if timeout is not None else DEFAULT_TIMEOUT
+    for attempt in range(retries + 1):
+        try:
+            response = session.request(method, url, timeout=timeout, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if attempt == retries:
+                raise
+            time.sleep(_retry_delay(attempt, backoff_base, backoff_max))
+            continue
+        if response.status_code not in RETRY_STATUS_CODES or attempt == retries:
+            return response
+        delay = _retry_delay(attempt, backoff_base, backoff_max, response)
+        response.close()
+        time.sleep(delay)
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
@@ -0,0 +1,137 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from src.utils.output_handler import capture_thread_output, StreamlitProcessOutput
+from src.utils.run_events import RunEvents, run_events_scope
+from src.utils.tracing import RunTrace, TRACING
+from src.utils.usage import UsageMeter
+
+#--------------------------------#
+#      Background Crew Jobs      #
+#--------------------------------#
+MAX_WORKERS = int(os.getenv("CREW_MAX_WORKERS", "4"))
+# Finished jobs are kept this many seconds so a session can still collect the result
+JOB_RETENTION = float(os.getenv("CREW_JOB_RETENTION", "3600"))
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="crew-job")
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+class JobLog:
+    """Holds the latest snapshot of a job's process output.
+
+    Acts as the "container" of a StreamlitProcessOutput, so the worker thread
+    never touches Streamlit elements; the UI polls `value` instead.
+    """
+
+    def __init__(self):
+        self._value = ""
+        self.output = None
+
+    def text(self, value):
+        self._value = value
+
+    @property
+    def value(self):
+        # Renders throttled output when the UI polls, so quiet stretches of a run never hide the last lines
+        if self.output is not None:
+            self.output.flush()
+        return self._value
+
+
+class Job:
+    """Handle for a crew run executing on the shared worker pool."""
+
+    def __init__(self, label, job_id=None):
+        self.id = job_id or uuid.uuid4().hex
+        self.label = label
+        self.status = "queued"
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.log = JobLog()
+        self.events = RunEvents()
+        self.trace = None
+        self.usage = None
+        self.future = None
+
+    @property
+    def done(self):
+        return self.status in ("completed", "failed")
+
+    @property
+    def elapsed(self):
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def _run(self, fn, args, kwargs):
+        self.status = "running"
+        self.started_at = time.time()
+        # Timed from here, so neither events nor spans include the time spent queued
+        self.trace = RunTrace(self.id, self.label) if TRACING else None
+        self.usage = UsageMeter.for_crew(self.label)
+        self.events = RunEvents(self.trace, self.usage)
+        output = self.log.output = StreamlitProcessOutput(self.log)
+        try:
+            with capture_thread_output(output), run_events_scope(self.events):
+                try:
+                    self.result = fn(*args, **kwargs)
+                finally:
+                    if self.usage.total["calls"]:
+                        print(f"\nToken usage:\n{self.usage.summary()}")
+            self.status = "completed"
+        except Exception as e:
+            self.error = e
+            self.status = "failed"
+        finally:
+            output.flush()
+            self.events.close()
+            self.finished_at = time.time()
+            if self.trace is not None:
+                self.trace.finish()
+                try:
+                    self.trace.export()
+                except OSError as e:
+                    print(f"Could not write the run trace: {e}")
+        return self.result
+
+
+def _prune_jobs():
+    cutoff = time.time() - JOB_RETENTION
+    for job_id, job in list(_jobs.items()):
+        if job.done and job.finished_at < cutoff:
+            del _jobs[job_id]
+
+
+def submit_job(fn, *args, label="crew run", job_id=None, **kwargs):
+    """Queue `fn(*args, **kwargs)` on the worker pool and return its Job handle.
+
+    Output the function prints is captured into the job's log rather than the
+    Streamlit script, so the calling session stays responsive; crews started
+    by the function report progress to the job's `events`. Pass `job_id`
+    to reuse an id from the durable job store.
+    """
+    job = Job(label, job_id)
+    with _jobs_lock:
+        _prune_jobs()
+        _jobs[job.id] = job
+    job.future = _executor.submit(job._run, fn, args, kwargs)
+    return job
+
+
+def get_job(job_id):
+    """Return the Job for an id, or None if it is unknown or has been pruned."""
+    with _jobs_lock:
+        return _jobs.get(job_id)
+
+
+def active_jobs():
+    """Return the number of queued or running jobs in this process."""
+    with _jobs_lock:
+        return sum(1 for job in _jobs.values() if not job.done)
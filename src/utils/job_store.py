@@ -0,0 +1,146 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+#--------------------------------#
+#        Durable Job Store       #
+#--------------------------------#
+class JobStore:
+    """SQLite-backed record of crew jobs and their per-task checkpoints.
+
+    Every completed task's output is written as soon as the task finishes, so
+    a run interrupted by a browser refresh, a crash or a server restart can be
+    resumed from the last completed task.
+
+    Args:
+        path (str): Location of the SQLite database file
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                   id TEXT PRIMARY KEY,
+                   crew_type TEXT NOT NULL,
+                   params TEXT NOT NULL,
+                   status TEXT NOT NULL,
+                   total_tasks INTEGER,
+                   result TEXT,
+                   error TEXT,
+                   created_at REAL NOT NULL,
+                   updated_at REAL NOT NULL
+               );
+               CREATE TABLE IF NOT EXISTS checkpoints (
+                   job_id TEXT NOT NULL,
+                   task_index INTEGER NOT NULL,
+                   description TEXT,
+                   output TEXT NOT NULL,
+                   created_at REAL NOT NULL,
+                   PRIMARY KEY (job_id, task_index)
+               );"""
+        )
+        self._conn.commit()
+
+    def create_job(self, crew_type, params, job_id=None):
+        """Record a new queued job and return its id; pass `job_id` when params must already refer to it."""
+        job_id = job_id or uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, crew_type, params, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, crew_type, json.dumps(params), "queued", now, now),
+            )
+            self._conn.commit()
+        return job_id
+
+    def get_job(self, job_id):
+        """Return a job as a dict (params decoded, completed task count added) or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            completed = self._conn.execute(
+                "SELECT COUNT(*) FROM checkpoints WHERE job_id = ?", (job_id,)
+            ).fetchone()[0]
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        job["completed_tasks"] = completed
+        return job
+
+    def update_job(self, job_id, status, **fields):
+        """Set a job's status and any of total_tasks, result or error."""
+        allowed = {"total_tasks", "result", "error"}
+        columns = {key: value for key, value in fields.items() if key in allowed}
+        assignments = "".join(f", {key} = ?" for key in columns)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET status = ?, updated_at = ?{assignments} WHERE id = ?",
+                (status, time.time(), *columns.values(), job_id),
+            )
+            self._conn.commit()
+
+    def save_checkpoint(self, job_id, task_index, description, output):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (job_id, task_index, description, output, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (job_id, task_index, description, output, time.time()),
+            )
+            self._conn.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (time.time(), job_id))
+            self._conn.commit()
+
+    def load_checkpoints(self, job_id):
+        """Return {task_index: output} for every completed task of a job."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT task_index, output FROM checkpoints WHERE job_id = ? ORDER BY task_index", (job_id,)
+            ).fetchall()
+        return {row["task_index"]: row["output"] for row in rows}
+
+    def mark_interrupted(self):
+        """Flag jobs left queued or running by a previous process as interrupted."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'interrupted', updated_at = ? WHERE status IN ('queued', 'running')",
+                (time.time(),),
+            )
+            self._conn.commit()
+
+    def list_jobs(self, statuses=None, limit=20):
+        """Return the most recently updated jobs, optionally filtered by status."""
+        query = "SELECT id, crew_type, status, total_tasks, created_at, updated_at FROM jobs"
+        args = []
+        if statuses:
+            query += f" WHERE status IN ({', '.join('?' for _ in statuses)})"
+            args.extend(statuses)
+        query += " ORDER BY updated_at DESC LIMIT ?"
+        args.append(limit)
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(query, args).fetchall()]
+
+
+_job_store = None
+_job_store_lock = threading.Lock()
+
+
+def get_job_store():
+    """Return the process-wide job store (JOB_STORE_PATH, default ".cache/jobs.sqlite3").
+
+    Opening the store in a fresh process marks jobs that were still running
+    as interrupted, since no worker survives a restart.
+    """
+    global _job_store
+    with _job_store_lock:
+        if _job_store is None:
+            _job_store = JobStore(os.getenv("JOB_STORE_PATH", ".cache/jobs.sqlite3"))
+            _job_store.mark_interrupted()
+    return _job_store
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import numpy as np
+from src.utils.embeddings import get_embedder
+from src.utils.tracing import traced
+
+#--------------------------------#
+#     Cached Knowledge Index     #
+#--------------------------------#
+KNOWLEDGE_DIR = os.getenv("KNOWLEDGE_DIR", "knowledge")
+INDEX_DIR = os.getenv("KNOWLEDGE_INDEX_DIR", ".cache/knowledge_index")
+# Same chunking as CrewAI's file knowledge sources
+CHUNK_SIZE = 4000
+CHUNK_OVERLAP = 200
+# "int8" stores vectors at a quarter of the float32 size with a per-row scale
+INDEX_QUANTIZATION = os.getenv("KNOWLEDGE_INDEX_QUANTIZATION", "none")
+
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_text(path):
+    if path.lower().endswith(".pdf"):
+        import pdfplumber
+        with pdfplumber.open(path) as pdf:
+            return "\n".join(page.extract_text() or "" for page in pdf.pages)
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+
+def _chunk_text(text):
+    return [text[i:i + CHUNK_SIZE] for i in range(0, len(text), CHUNK_SIZE - CHUNK_OVERLAP)]
+
+
+class KnowledgeIndex:
+    """Chunks of one knowledge file and their embeddings, memory-mapped from disk.
+
+    Args:
+        directory (str): Directory holding `chunks.json` and `vectors.npy`
+    """
+
+    def __init__(self, directory):
+        with open(os.path.join(directory, "chunks.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        self.source = meta["source"]
+        self.embedder = meta["embedder"]
+        self.chunks = meta["chunks"]
+        # Read-only mapping: pages are loaded on demand and shared between processes
+        self.vectors = np.load(os.path.join(directory, "vectors.npy"), mmap_mode="r")
+        scales_path = os.path.join(directory, "scales.npy")
+        self.scales = np.load(scales_path) if os.path.exists(scales_path) else None
+
+    def search(self, query_vector, limit=3):
+        """Return the `limit` chunks most similar to a normalized query vector."""
+        if not self.chunks:
+            return []
+        if self.scales is None:
+            scores = self.vectors @ query_vector
+        else:
+            scores = (self.vectors @ query_vector.astype(np.float32)) * self.scales
+        limit = min(limit, len(scores))
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top])]
+        return [{"context": self.chunks[i], "score": float(scores[i]),
+                 "metadata": {"source": self.source, "chunk": int(i)}} for i in top]
+
+
+def quantize(vectors):
+    """Quantize rows to int8 with one float32 scale per row (symmetric, max-abs)."""
+    scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127.0
+    return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+
+
+def build_index(path, directory, embedder, quantization=INDEX_QUANTIZATION):
+    """Chunk and embed a knowledge file and write it to `directory` atomically."""
+    chunks = _chunk_text(_read_text(path))
+    vectors = embedder.embed(chunks) if chunks else np.zeros((0, 1), dtype=np.float32)
+    temporary = f"{directory}.{os.getpid()}.{threading.get_ident()}.tmp"
+    os.makedirs(temporary, exist_ok=True)
+    if quantization == "int8":
+        vectors, scales = quantize(vectors)
+        np.save(os.path.join(temporary, "scales.npy"), scales)
+    np.save(os.path.join(temporary, "vectors.npy"), vectors)
+    with open(os.path.join(temporary, "chunks.json"), "w", encoding="utf-8") as f:
+        json.dump({"source": os.path.basename(path), "embedder": embedder.name, "chunks": chunks}, f)
+    try:
+        os.rename(temporary, directory)
+    except OSError:
+        # Another process finished the same index first
+        for name in os.listdir(temporary):
+            os.remove(os.path.join(temporary, name))
+        os.rmdir(temporary)
+
+
+_indexes = {}
+_hashes = {}
+_lock = threading.Lock()
+
+
+def get_knowledge_index(file_name, embedder=None):
+    """Return the index of a file under `knowledge/`, building it on first use.
+
+    Indexes are stored per file hash and embedder, so an edited file or a new
+    embedding model gets a fresh index while unchanged files are never parsed
+    or embedded again. Each index is loaded once per process.
+
+    Args:
+        file_name (str): File name relative to the knowledge directory
+        embedder: Embedding backend; defaults to `get_embedder()`
+
+    Returns:
+        KnowledgeIndex: The shared, memory-mapped index
+    """
+    embedder = embedder or get_embedder()
+    path = os.path.join(KNOWLEDGE_DIR, file_name)
+    stat = os.stat(path)
+    with _lock:
+        stamp = (path, stat.st_mtime_ns, stat.st_size)
+        if stamp not in _hashes:
+            _hashes[stamp] = _file_hash(path)
+        slug = re.sub(r"[^\w.-]+", "_", embedder.name)
+        suffix = "-int8" if INDEX_QUANTIZATION == "int8" else ""
+        directory = os.path.join(INDEX_DIR, f"{_hashes[stamp][:16]}-{slug}{suffix}")
+        index = _indexes.get(directory)
+        if index is None:
+            if not os.path.exists(directory):
+                os.makedirs(INDEX_DIR, exist_ok=True)
+                build_index(path, directory, embedder)
+            index = _indexes[directory] = KnowledgeIndex(directory)
+        return index
+
+
+def knowledge_context(file_names, query, limit=3):
+    """Retrieve the chunks of the knowledge files most relevant to `query`.
+
+    Mirrors what CrewAI appends to a task prompt for agent knowledge sources.
+
+    Returns:
+        str: "Additional Information: ..." or an empty string when nothing is available
+    """
+    with traced("knowledge retrieval", "retrieval", files=", ".join(file_names)):
+        try:
+            embedder = get_embedder()
+            indexes = [get_knowledge_index(file_name, embedder) for file_name in file_names]
+            query_vector = embedder.embed([query])[0]
+        except Exception as e:
+            print(f"Knowledge retrieval unavailable: {e}")
+            return ""
+        results = sorted((result for index in indexes for result in index.search(query_vector, limit)),
+                         key=lambda result: result["score"], reverse=True)[:limit]
+    if not results:
+        return ""
+    return "\n\nAdditional Information: " + "\n".join(result["context"] for result in results)
+
+
+if __name__ == "__main__":
+    # Pre-build the indexes of every file in the knowledge directory
+    for name in sorted(os.listdir(KNOWLEDGE_DIR)):
+        if os.path.isfile(os.path.join(KNOWLEDGE_DIR, name)):
+            start = time.perf_counter()
+            index = get_knowledge_index(name)
+            seconds = time.perf_counter() - start
+            print(f"{name}: {len(index.chunks)} chunks ({index.embedder}, {INDEX_QUANTIZATION}) "
+                  f"in {seconds:.2f}s, {len(index.chunks) / max(seconds, 1e-9):.0f} chunks/s")
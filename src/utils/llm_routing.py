@@ -0,0 +1,181 @@
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import nullcontext
+from src.utils.output_handler import capture_thread_output, current_output_sink
+from src.utils.run_events import current_run_events
+from src.utils.tracing import current_trace, current_agent, bind_thread
+from src.utils.usage import BudgetExceeded
+from dotenv import load_dotenv
+load_dotenv()
+
+#--------------------------------#
+#     LLM Fallback & Hedging     #
+#--------------------------------#
+# Ordered backups per LiteLLM model-name prefix (longest prefix wins), e.g.
+# LLM_FALLBACKS='{"openai/gpt-4o": ["anthropic/claude-3-5-sonnet-20241022", "openai/gpt-4o-mini"]}'
+LLM_FALLBACKS = json.loads(os.getenv("LLM_FALLBACKS") or "{}")
+# Seconds an attempt may take before the next model is asked as well; empty means no limit
+LLM_LATENCY_SLO = float(os.getenv("LLM_LATENCY_SLO") or 0) or None
+# Also ask the next model once an attempt is slower than its model's recent p95 latency
+LLM_HEDGE = os.getenv("LLM_HEDGE", "false").lower() in ("1", "true", "yes")
+# Latencies a model needs on record before its p95 is trusted for hedging
+HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LATENCY_WINDOW = int(os.getenv("LLM_LATENCY_WINDOW", "200"))
+
+
+def fallback_models(model):
+    """Return the configured backup models for a LiteLLM model name, in the order they are tried."""
+    matches = [prefix for prefix in LLM_FALLBACKS if model.startswith(prefix)]
+    if not matches:
+        return []
+    return [backup for backup in LLM_FALLBACKS[max(matches, key=len)] if backup != model]
+
+
+class LatencyTracker:
+    """Recent successful call latencies per model, for the hedging threshold."""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, model, seconds):
+        with self._lock:
+            self._samples.setdefault(model, deque(maxlen=self.window)).append(seconds)
+
+    def p95(self, model):
+        """Return the model's 95th-percentile latency, or None until HEDGE_MIN_SAMPLES calls are known."""
+        with self._lock:
+            samples = sorted(self._samples.get(model, ()))
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, math.ceil(0.95 * len(samples)) - 1)]
+
+
+latencies = LatencyTracker()
+
+
+def escalation_delay(model, slo=LLM_LATENCY_SLO, hedge=LLM_HEDGE):
+    """Seconds after which an attempt on `model` also starts the next model; None means never."""
+    delays = [slo] if slo else []
+    if hedge:
+        p95 = latencies.p95(model)
+        if p95 is not None:
+            delays.append(p95)
+    return min(delays) if delays else None
+
+
+def should_fall_back(error):
+    """Whether another model may succeed where this error occurred.
+
+    An exhausted budget stops the run everywhere, and an overlong prompt is
+    left to CrewAI, which shortens the conversation and retries.
+    """
+    return not isinstance(error, BudgetExceeded) and type(error).__name__ != "ContextWindowExceededError"
+
+
+def _timed(model, call):
+    started = time.perf_counter()
+    result = call()
+    latencies.record(model, time.perf_counter() - started)
+    return result
+
+
+def _attempt(model, call, sink, trace, agent):
+    with capture_thread_output(sink) if sink is not None else nullcontext():
+        bind_thread(trace, agent)
+        return _timed(model, call)
+
+
+def route(attempts, slo=LLM_LATENCY_SLO, hedge=LLM_HEDGE):
+    """Get one answer from an ordered list of models.
+
+    The first model is asked first. When an attempt fails, the next model is
+    asked. When an attempt is still running after the SLO, or after its
+    model's p95 latency with hedging on, the next model is asked as well, and
+    whichever answers first wins. Slow attempts are not cancelled: their
+    answer is still used if it arrives first, otherwise it is discarded.
+    Attempts that have nothing to escalate to run on the calling thread.
+
+    Args:
+        attempts (list): (model name, zero-argument callable) pairs in fallback order
+        slo (float): Seconds per attempt before escalating, or None
+        hedge (bool): Also escalate at the model's p95 latency
+
+    Returns:
+        The first successful attempt's result
+
+    Raises:
+        Exception: The last attempt's error when every model failed, or at
+            once for errors no other model can fix (see `should_fall_back`)
+    """
+    sink, trace, agent = current_output_sink(), current_trace(), current_agent()
+    events = current_run_events()
+    remaining = list(attempts)
+    running = {}
+    error = reason = None
+
+    def announce(model, reason):
+        if reason:
+            print(f"↪️ Routing to {model}: {reason}")
+            if events is not None:
+                events.emit("llm_fallback", agent=agent, model=model, reason=reason)
+
+    # An attempt that can only be followed on failure runs on the calling thread
+    while remaining and (len(remaining) == 1 or escalation_delay(remaining[0][0], slo, hedge) is None):
+        model, call = remaining.pop(0)
+        announce(model, reason)
+        try:
+            return _timed(model, call)
+        except Exception as e:
+            if not should_fall_back(e):
+                raise
+            error = e
+            print(f"⚠️ {model} failed: {type(e).__name__}: {e}")
+            reason = f"{model} failed with {type(e).__name__}"
+    if not remaining:
+        raise error
+    pool = ThreadPoolExecutor(max_workers=len(remaining), thread_name_prefix="llm-route")
+
+    def start(reason=None):
+        model, call = remaining.pop(0)
+        announce(model, reason)
+        # Only the first attempt streams, so a backup never interleaves its tokens with another answer
+        future = pool.submit(_attempt, model, call, sink if not running and error is None else None, trace, agent)
+        running[future] = (model, time.monotonic())
+        return future
+
+    try:
+        newest = start(reason)
+        while running:
+            timeout = None
+            if remaining:
+                model, started = running.get(newest, (None, None))
+                delay = escalation_delay(model, slo, hedge) if model else None
+                if delay is not None:
+                    timeout = max(0.0, started + delay - time.monotonic())
+            done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                model, started = running[newest]
+                newest = start(f"{model} has not answered after {time.monotonic() - started:.1f}s")
+                continue
+            for future in done:
+                model, _ = running.pop(future)
+                try:
+                    return future.result()
+                except Exception as e:
+                    if not should_fall_back(e):
+                        raise
+                    error = e
+                    print(f"⚠️ {model} failed: {type(e).__name__}: {e}")
+            # The newest attempt failed: move on now rather than only waiting for slower ones
+            if remaining and newest not in running:
+                newest = start(f"{model} failed with {type(error).__name__}")
+        raise error
+    finally:
+        pool.shutdown(wait=False)
@@ -0,0 +1,68 @@
+import os
+import threading
+from src.utils.output_handler import current_output_sink
+
+#--------------------------------#
+#       LLM Token Streaming      #
+#--------------------------------#
+# CrewAI moved its event bus between releases; older releases have no streaming events at all
+try:
+    from crewai.events import (crewai_event_bus, LLMStreamChunkEvent, LLMCallCompletedEvent,
+                               AgentExecutionStartedEvent)
+except ImportError:
+    try:
+        from crewai.utilities.events import (crewai_event_bus, LLMStreamChunkEvent, LLMCallCompletedEvent,
+                                             AgentExecutionStartedEvent)
+    except ImportError:
+        crewai_event_bus = LLMStreamChunkEvent = LLMCallCompletedEvent = None
+        AgentExecutionStartedEvent = None
+
+STREAMING_SUPPORTED = crewai_event_bus is not None
+LLM_STREAMING = os.getenv("LLM_STREAMING", "true").lower() in ("1", "true", "yes") and STREAMING_SUPPORTED
+
+_registered = False
+_register_lock = threading.Lock()
+
+
+def _sink():
+    sink = current_output_sink()
+    return sink if hasattr(sink, "stream") else None
+
+
+def _on_chunk(source, event):
+    sink = _sink()
+    if sink:
+        sink.stream(event.chunk)
+
+
+def _on_call_completed(source, event):
+    sink = _sink()
+    if sink:
+        # The verbose log prints the complete answer, so the live preview can go
+        sink.end_stream()
+
+
+def enable_token_streaming():
+    """Forward LLM token deltas to the calling thread's output sink.
+
+    Listeners are registered once per process on CrewAI's event bus; each
+    event goes to the sink of the thread that emitted it, so concurrent jobs
+    only see their own tokens.
+
+    Returns:
+        bool: Whether streaming is active
+    """
+    global _registered
+    if not LLM_STREAMING:
+        return False
+    with _register_lock:
+        if not _registered:
+            crewai_event_bus.on(LLMStreamChunkEvent)(_on_chunk)
+            crewai_event_bus.on(LLMCallCompletedEvent)(_on_call_completed)
+            _registered = True
+    return True
+
+
+def streaming_llm_kwargs():
+    """Extra LLM arguments that turn on token streaming where CrewAI supports it."""
+    return {"stream": True} if enable_token_streaming() else {}
@@ -1,5 +1,9 @@
 import streamlit as st
+import os
 import sys
+import threading
+import time
+from collections import OrderedDict, deque
 from contextlib import contextmanager
 from io import StringIO
 import re
@@ -7,50 +11,108 @@ import re
 #--------------------------------#
 #         Output Handler         #
 #--------------------------------#
+# Lines kept for display; older lines scroll out of the buffer
+MAX_LOG_LINES = int(os.getenv("PROCESS_LOG_MAX_LINES", "2000"))
+# Recent distinct lines remembered to drop CrewAI's repeated prints
+DEDUP_WINDOW = int(os.getenv("PROCESS_LOG_DEDUP_WINDOW", "2000"))
+# Minimum seconds between two renders of the container
+RENDER_INTERVAL = float(os.getenv("PROCESS_LOG_RENDER_INTERVAL", "0.25"))
+# Characters of the in-progress LLM response shown below the log
+STREAM_PREVIEW_CHARS = 4000
+
+ANSI_ESCAPE = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
+# Color codes whose escape character was already stripped upstream
+BARE_COLOR_CODES = re.compile(r'\[(?:1|95|92|00)m')
+LITELLM_NOISE = ('LiteLLM.Info:', 'Provider List:')
+
 class StreamlitProcessOutput:
-    def __init__(self, container):
+    """A stdout replacement that shows a crew's process output in a Streamlit container.
+
+    Writes append to a bounded ring buffer and the container is re-rendered
+    at most every `min_interval` seconds, so each write costs O(1) and a
+    render costs O(max_lines) however long the run gets. Call `flush()` to
+    render pending output immediately; it is safe to call from another thread.
+    """
+    def __init__(self, container, max_lines=MAX_LOG_LINES, min_interval=RENDER_INTERVAL):
         self.container = container
-        self.output_text = ""
-        self.seen_lines = set()
-        
+        self.lines = deque(maxlen=max_lines)
+        self.seen_lines = OrderedDict()
+        self.streaming = deque()
+        self.streaming_chars = 0
+        self.min_interval = min_interval
+        self.last_render = 0.0
+        self.dirty = False
+        self._lock = threading.RLock()
+
+    @property
+    def output_text(self):
+        return "\n".join(self.lines)
+
+    @property
+    def streaming_text(self):
+        return "".join(self.streaming)
+
     def clean_text(self, text):
-        # Remove ANSI escape codes
-        ansi_escape = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
-        text = ansi_escape.sub('', text)
-        
-        # Remove LiteLLM debug messages
-        if text.strip().startswith('LiteLLM.Info:') or text.strip().startswith('Provider List:'):
+        if text.strip().startswith(LITELLM_NOISE):
             return None
-            
-        # Clean up the formatting
-        text = text.replace('[1m', '').replace('[95m', '').replace('[92m', '').replace('[00m', '')
-        return text
-        
+        return BARE_COLOR_CODES.sub('', ANSI_ESCAPE.sub('', text))
+
+    def _is_new(self, line):
+        if line in self.seen_lines:
+            self.seen_lines.move_to_end(line)
+            return False
+        self.seen_lines[line] = None
+        if len(self.seen_lines) > DEDUP_WINDOW:
+            self.seen_lines.popitem(last=False)
+        return True
+
     def write(self, text):
         cleaned_text = self.clean_text(text)
         if cleaned_text is None:
             return
-            
-        # Split into lines and process each line
-        lines = cleaned_text.split('\n')
-        new_lines = []
-        
-        for line in lines:
-            line = line.strip()
-            if line and line not in self.seen_lines:
-                self.seen_lines.add(line)
-                new_lines.append(line)
-        
-        if new_lines:
-            # Add the new lines to the output
-            new_content = '\n'.join(new_lines)
-            self.output_text = f"{self.output_text}\n{new_content}" if self.output_text else new_content
-            
-            # Update the display
-            self.container.text(self.output_text)
-        
+        with self._lock:
+            for line in cleaned_text.split('\n'):
+                line = line.strip()
+                if line and self._is_new(line):
+                    self.lines.append(line)
+                    self.dirty = True
+            self._render_if_due()
+
+    def stream(self, delta):
+        """Show a token delta of the LLM response in progress below the log."""
+        with self._lock:
+            self.streaming.append(delta)
+            self.streaming_chars += len(delta)
+            while self.streaming_chars > STREAM_PREVIEW_CHARS and len(self.streaming) > 1:
+                self.streaming_chars -= len(self.streaming.popleft())
+            self.dirty = True
+            self._render_if_due()
+
+    def end_stream(self):
+        """Drop the live response once the LLM call has completed."""
+        with self._lock:
+            self.streaming.clear()
+            self.streaming_chars = 0
+            self.dirty = True
+            self._render_if_due()
+
+    def _render_if_due(self):
+        if self.dirty and time.monotonic() - self.last_render >= self.min_interval:
+            self.render()
+
+    def render(self):
+        with self._lock:
+            self.dirty = False
+            self.last_render = time.monotonic()
+            if self.streaming:
+                self.container.text(f"{self.output_text}\n\n💬 {self.streaming_text}")
+            else:
+                self.container.text(self.output_text)
+
     def flush(self):
-        pass
+        with self._lock:
+            if self.dirty:
+                self.render()
 
 @contextmanager
 def capture_output(container):
@@ -63,6 +125,51 @@ def capture_output(container):
         yield string_io
     finally:
         sys.stdout = old_stdout
+        output_handler.flush()
+
+class ThreadRoutedStdout:
+    """A sys.stdout replacement that sends each thread's writes to its own sink.
+
+    Threads without a registered sink write to the original stdout, so
+    concurrent background jobs never interleave their output.
+    """
+    def __init__(self, fallback):
+        self.fallback = fallback
+        self._local = threading.local()
+
+    @property
+    def sink(self):
+        return getattr(self._local, "sink", None)
+
+    @sink.setter
+    def sink(self, value):
+        self._local.sink = value
+
+    def write(self, text):
+        (self.sink or self.fallback).write(text)
+
+    def flush(self):
+        (self.sink or self.fallback).flush()
+
+_routed_stdout_lock = threading.Lock()
+
+@contextmanager
+def capture_thread_output(sink):
+    """Redirect stdout written by the current thread only to `sink`."""
+    with _routed_stdout_lock:
+        if not isinstance(sys.stdout, ThreadRoutedStdout):
+            sys.stdout = ThreadRoutedStdout(sys.stdout)
+        router = sys.stdout
+    previous = router.sink
+    router.sink = sink
+    try:
+        yield sink
+    finally:
+        router.sink = previous
+
+def current_output_sink():
+    """Return the sink the current thread's stdout is routed to, if any."""
+    return sys.stdout.sink if isinstance(sys.stdout, ThreadRoutedStdout) else None
 
-# Export the capture_output function
-__all__ = ['capture_output']
\ No newline at end of file
+# Export the capture helpers
+__all__ = ['capture_output', 'capture_thread_output', 'current_output_sink', 'StreamlitProcessOutput']
\ No newline at end of file
@@ -0,0 +1,211 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dotenv import load_dotenv
+load_dotenv()
+
+#--------------------------------#
+#     Provider Rate Limiting     #
+#--------------------------------#
+# Quotas per LiteLLM model-name prefix; the longest matching prefix names the limiter, so
+# "openai" is shared by every OpenAI model while "openai/gpt-4o" gets a limiter of its own, e.g.
+# LLM_RATE_LIMITS='{"openai": {"rpm": 500, "tpm": 200000, "concurrency": 16}, "openai/gpt-4o": {"tpm": 30000}}'
+RATE_LIMITS = json.loads(os.getenv("LLM_RATE_LIMITS") or "{}")
+# Seconds of quota a bucket holds, i.e. how large a burst may be after an idle period
+RATE_BURST_SECONDS = float(os.getenv("LLM_RATE_BURST_SECONDS", "10"))
+# Output tokens assumed for a request until the provider reports its real usage
+RATE_OUTPUT_ESTIMATE = int(os.getenv("LLM_RATE_OUTPUT_ESTIMATE", "500"))
+# Pause after a 429 response that carries no Retry-After header
+RATE_LIMIT_PAUSE = float(os.getenv("LLM_RATE_LIMIT_PAUSE", "5"))
+
+
+class _TokenBucket:
+    """Holds up to RATE_BURST_SECONDS of a per-minute quota and refills continuously."""
+
+    def __init__(self, per_minute):
+        self.per_minute = per_minute
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * RATE_BURST_SECONDS)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        # A request larger than the whole bucket waits for a full bucket and leaves it in debt
+        return max(0.0, (min(amount, self.capacity) - self.level) / self.rate)
+
+    def take(self, amount):
+        self.level -= amount
+
+    def give_back(self, amount):
+        self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimiter:
+    """Requests/min, tokens/min and in-flight limits shared by every session of the process.
+
+    Callers are served strictly in arrival order: only the head of the queue
+    may take quota, so a large request is never starved by a stream of small
+    ones and waiting sessions resume one by one instead of all at once.
+    Token use is estimated up front and corrected once the response reports
+    its usage. A 429 from the provider pauses the whole queue.
+
+    Args:
+        name (str): The LLM_RATE_LIMITS key the limiter was created for
+        rpm (int): Requests per minute, or None
+        tpm (int): Input plus output tokens per minute, or None
+        concurrency (int): Requests in flight at once, or None
+    """
+
+    def __init__(self, name, rpm=None, tpm=None, concurrency=None):
+        self.name = name
+        self.requests = _TokenBucket(rpm) if rpm else None
+        self.tokens = _TokenBucket(tpm) if tpm else None
+        self.concurrency = concurrency
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.served = 0
+        self.throttled = 0
+        self.wait_seconds = 0.0
+        self._queue = deque()
+        self._condition = threading.Condition()
+
+    def _delay(self, tokens, now):
+        """Seconds until the head of the queue may start; None while it waits for a free slot."""
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.concurrency and self.in_flight >= self.concurrency:
+            return None
+        delay = 0.0
+        for bucket, amount in ((self.requests, 1), (self.tokens, tokens)):
+            if bucket is not None:
+                bucket.refill(now)
+                delay = max(delay, bucket.wait_time(amount))
+        return delay
+
+    def acquire(self, tokens):
+        """Block until it is this caller's turn and the quota allows `tokens`; returns seconds waited."""
+        ticket = object()
+        started = time.monotonic()
+        with self._condition:
+            self._queue.append(ticket)
+            try:
+                while True:
+                    delay = self._delay(tokens, time.monotonic()) if self._queue[0] is ticket else None
+                    if delay == 0.0:
+                        break
+                    self._condition.wait(delay)
+            finally:
+                self._queue.remove(ticket)
+                self._condition.notify_all()
+            if self.requests is not None:
+                self.requests.take(1)
+            if self.tokens is not None:
+                self.tokens.take(tokens)
+            self.in_flight += 1
+            waited = time.monotonic() - started
+            self.served += 1
+            self.wait_seconds += waited
+        return waited
+
+    def release(self, estimated, used=None):
+        """Free the caller's slot and settle its token estimate against the reported usage."""
+        with self._condition:
+            self.in_flight -= 1
+            if self.tokens is not None and used is not None:
+                if used < estimated:
+                    self.tokens.give_back(estimated - used)
+                else:
+                    self.tokens.take(used - estimated)
+            self._condition.notify_all()
+
+    def pause(self, seconds):
+        """Stop handing out quota for `seconds`, e.g. after the provider answered 429."""
+        with self._condition:
+            self.throttled += 1
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self, tokens):
+        """Hold a request slot for the enclosed call.
+
+        Yields a dict with the seconds waited ("waited"); set its "used" key
+        to the tokens the call really consumed.
+        """
+        ticket = {"waited": self.acquire(tokens), "used": None}
+        try:
+            yield ticket
+        except Exception as e:
+            if _is_rate_limited(e):
+                self.pause(_retry_after(e) or RATE_LIMIT_PAUSE)
+            raise
+        finally:
+            self.release(tokens, ticket["used"])
+
+    def stats(self):
+        with self._condition:
+            return {
+                "limiter": self.name,
+                "queued": len(self._queue),
+                "in_flight": self.in_flight,
+                "served": self.served,
+                "avg_wait_seconds": round(self.wait_seconds / self.served, 3) if self.served else 0.0,
+                "throttled": self.throttled,
+                "rpm": self.requests.per_minute if self.requests else None,
+                "tpm": self.tokens.per_minute if self.tokens else None,
+                "concurrency": self.concurrency,
+            }
+
+
+def _is_rate_limited(error):
+    return getattr(error, "status_code", None) == 429 or type(error).__name__ == "RateLimitError"
+
+
+def _retry_after(error):
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after") or headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+def estimate_tokens(messages, max_tokens=None):
+    """Rough input plus output tokens of a chat request, at about four characters per token."""
+    if isinstance(messages, str):
+        characters = len(messages)
+    else:
+        characters = sum(len(str(message.get("content") or "")) for message in messages)
+    return characters // 4 + (max_tokens or RATE_OUTPUT_ESTIMATE)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(model):
+    """Return the process-wide limiter for a LiteLLM model name, or None if it has no configured quota."""
+    matches = [prefix for prefix in RATE_LIMITS if model.startswith(prefix)]
+    if not matches:
+        return None
+    name = max(matches, key=len)
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limits = RATE_LIMITS[name]
+            limiter = RateLimiter(name, limits.get("rpm"), limits.get("tpm"), limits.get("concurrency"))
+            _limiters[name] = limiter
+    return limiter
+
+
+def limiter_stats():
+    """Return the queue depth, in-flight requests and totals of every limiter in use."""
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return [limiter.stats() for limiter in limiters]
@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+#--------------------------------#
+#      Persistent Response Cache #
+#--------------------------------#
+class ResponseCache:
+    """A small on-disk key/value cache with a TTL and LRU eviction.
+
+    Entries are stored in a SQLite file so they survive Streamlit reruns and
+    server restarts. Keys are content-addressed: the normalized query is hashed,
+    so trivially different spellings of the same question share one entry.
+
+    Args:
+        path (str): Location of the SQLite database file
+        ttl (float): Seconds an entry stays fresh; 0 or less disables expiry
+        max_entries (int): Upper bound on stored entries before LRU eviction
+    """
+
+    def __init__(self, path, ttl=86400, max_entries=1000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                   key TEXT PRIMARY KEY,
+                   value TEXT NOT NULL,
+                   created_at REAL NOT NULL,
+                   accessed_at REAL NOT NULL
+               )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def normalize(query):
+        """Normalize a query so near-identical questions map to the same key."""
+        query = re.sub(r"\s+", " ", query.strip().lower())
+        return query.rstrip(" ?.!")
+
+    def make_key(self, query):
+        return hashlib.sha256(self.normalize(query).encode("utf-8")).hexdigest()
+
+    def get(self, query):
+        """Return the cached value for a query, or None on a miss or expired entry."""
+        key = self.make_key(query)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (self.ttl > 0 and now - row[1] > self.ttl):
+                if row is not None:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, query, value):
+        """Store a JSON-serializable value and evict least recently used entries."""
+        key = self.make_key(query)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now),
+            )
+            self._conn.execute(
+                """DELETE FROM responses WHERE key IN (
+                       SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                   )""",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Return hit/miss counters and the current number of stored entries."""
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": size,
+        }
+
+
+_exa_cache = None
+_exa_cache_lock = threading.Lock()
+
+
+def get_exa_cache():
+    """Return the process-wide cache used by the EXA answer tool.
+
+    Configured through environment variables:
+        EXA_CACHE_PATH (default ".cache/exa_answers.sqlite3")
+        EXA_CACHE_TTL seconds (default 86400)
+        EXA_CACHE_MAX_ENTRIES (default 1000)
+    """
+    global _exa_cache
+    with _exa_cache_lock:
+        if _exa_cache is None:
+            _exa_cache = ResponseCache(
+                path=os.getenv("EXA_CACHE_PATH", ".cache/exa_answers.sqlite3"),
+                ttl=float(os.getenv("EXA_CACHE_TTL", "86400")),
+                max_entries=int(os.getenv("EXA_CACHE_MAX_ENTRIES", "1000")),
+            )
+    return _exa_cache
@@ -0,0 +1,186 @@
+import threading
+import time
+from contextlib import contextmanager
+from src.utils.llm_streaming import crewai_event_bus, AgentExecutionStartedEvent
+from src.utils.tracing import trace_scope
+
+#--------------------------------#
+#        Run Event Channel       #
+#--------------------------------#
+# Characters of tool inputs, tool outputs and task results kept per event
+EVENT_TEXT_CHARS = 300
+
+
+def _shorten(value, limit=EVENT_TEXT_CHARS):
+    text = " ".join(str(value or "").split())
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+class RunEvents:
+    """Structured progress events of one crew run.
+
+    CrewAI invokes the callbacks bound here from whichever thread runs the
+    agent, including the threads of async tasks, so events always land in
+    the run they belong to. Events are append-only; readers poll with
+    `since()` and never block the run for long.
+
+    Args:
+        trace (RunTrace): Receives agent step and task spans; optional
+        usage (UsageMeter): Token and cost meter of the run; optional
+    """
+
+    def __init__(self, trace=None, usage=None):
+        self.trace = trace
+        self.usage = usage
+        self.started = time.perf_counter()
+        self.events = []
+        self._lock = threading.Lock()
+        self._last_step = {}
+        self._labels = {}
+        self._role_counts = {}
+
+    def emit(self, kind, **fields):
+        with self._lock:
+            event = {"seq": len(self.events), "kind": kind, "at": round(time.perf_counter() - self.started, 3), **fields}
+            self.events.append(event)
+        return event
+
+    def since(self, seq=0):
+        """Return the events numbered `seq` and later."""
+        with self._lock:
+            return self.events[seq:]
+
+    def agent_started(self, agent, task=""):
+        self._last_step[agent] = time.perf_counter()
+        self.emit("agent_started", agent=agent, task=_shorten(task, 120))
+
+    def on_step(self, agent, step):
+        """Record an agent step: a tool call with its result, or the final answer.
+
+        CrewAI reports a step after its tool has run, so `seconds` covers the
+        LLM call and the tool call of that step. Bare tool results, which
+        CrewAI also passes to step callbacks, are skipped.
+        """
+        tool = getattr(step, "tool", None)
+        if tool is None and not hasattr(step, "output"):
+            return
+        if agent not in self._last_step:
+            self.agent_started(agent)
+        now = time.perf_counter()
+        seconds = round(now - self._last_step[agent], 3)
+        if self.trace is not None:
+            self.trace.add_span(f"step: {tool or 'final answer'}", "step", self._last_step[agent], now, agent=agent)
+        self._last_step[agent] = now
+        if tool is not None:
+            self.emit("tool_call", agent=agent, tool=tool, input=_shorten(getattr(step, "tool_input", "")),
+                      output=_shorten(getattr(step, "result", "")), seconds=seconds)
+        else:
+            self.emit("final_answer", agent=agent, seconds=seconds)
+
+    def on_task(self, output, agent=None):
+        agent = agent or getattr(output, "agent", "") or ""
+        started = self._task_started(agent)
+        now = time.perf_counter()
+        task = _shorten(getattr(output, "description", ""), 120)
+        if self.trace is not None:
+            self.trace.add_span(f"task: {task[:60]}", "task", started, now, agent=agent)
+        usage = self.usage.close_task(agent, task) if self.usage is not None else {}
+        self.emit("task_finished", agent=agent, task=task, output=_shorten(getattr(output, "raw", "")),
+                  seconds=round(now - started, 3), tokens=usage.get("tokens_in", 0) + usage.get("tokens_out", 0),
+                  cost=usage.get("cost", 0.0))
+
+    def _task_started(self, agent):
+        with self._lock:
+            starts = [event["at"] for event in self.events if event["kind"] == "agent_started" and event["agent"] == agent]
+        self._last_step.pop(agent, None)
+        return self.started + (starts[-1] if starts else 0.0)
+
+    def register(self, agent):
+        """Return the agent's label in this run: its role, numbered when several agents share it.
+
+        Concurrent crews of one run (repository files, research batches) use
+        agents with the same role, and the label keeps their steps apart.
+        """
+        with self._lock:
+            label = self._labels.get(id(agent))
+            if label is None:
+                count = self._role_counts[agent.role] = self._role_counts.get(agent.role, 0) + 1
+                label = self._labels[id(agent)] = agent.role if count == 1 else f"{agent.role} #{count}"
+                _agent_channels[id(agent)] = (self, label)
+        return label
+
+    def close(self):
+        """Forget the agents of this run; call when the run has finished."""
+        with self._lock:
+            for agent_id in self._labels:
+                _agent_channels.pop(agent_id, None)
+            self._labels.clear()
+
+
+# Agents of instrumented crews by id, for CrewAI event-bus listeners that only receive the agent
+_agent_channels = {}
+
+
+def _on_agent_started(source, event):
+    channel = _agent_channels.get(id(event.agent))
+    if channel:
+        events, role = channel
+        events.agent_started(role, getattr(getattr(event, "task", None), "description", ""))
+
+
+if crewai_event_bus is not None:
+    crewai_event_bus.on(AgentExecutionStartedEvent)(_on_agent_started)
+
+
+_local = threading.local()
+
+
+def current_run_events():
+    """Return the event channel of the run executing on this thread, if any."""
+    return getattr(_local, "events", None)
+
+
+@contextmanager
+def run_events_scope(events):
+    """Make `events` and its trace current on this thread (e.g. in a job or worker thread)."""
+    previous = current_run_events()
+    _local.events = events
+    try:
+        with trace_scope(getattr(events, "trace", None)):
+            yield events
+    finally:
+        _local.events = previous
+
+
+def instrument_crew(agents, tasks):
+    """Wire a crew's agents and tasks to the current run's event channel.
+
+    Each agent gets a step callback bound to its label and the run's channel,
+    and an LLM bound to the run's trace and usage meter, so none of them
+    depends on which thread CrewAI runs the agent in.
+    Task callbacks are chained rather than passed as the crew's
+    `task_callback`, which CrewAI skips for tasks that have their own
+    callback (e.g. checkpoints). Agents and tasks are per-run objects, so
+    nothing leaks into other runs. Does nothing outside a run.
+    """
+    events = current_run_events()
+    if events is None:
+        return
+    for agent in agents:
+        label = events.register(agent)
+        agent.step_callback = lambda step, label=label: events.on_step(label, step)
+        if (events.trace is not None or events.usage is not None) and hasattr(agent.llm, "bind"):
+            agent.llm = agent.llm.bind(events.trace, label, events.usage)
+    for task in tasks:
+        label = events.register(task.agent) if task.agent is not None else None
+        task.callback = _chain(task.callback, lambda output, label=label: events.on_task(output, label))
+
+
+def _chain(first, second):
+    if first is None:
+        return second
+
+    def callback(output):
+        first(output)
+        second(output)
+    return callback
@@ -0,0 +1,110 @@
+import json
+import os
+import statistics
+import time
+
+#--------------------------------#
+#     Dependency-Aware Process   #
+#--------------------------------#
+def _dependencies(task, tasks):
+    """Return the tasks in `tasks` that `task` lists in its context."""
+    context = task.context if isinstance(task.context, list) else []
+    return [dep for dep in context if any(dep is other for other in tasks)]
+
+
+def task_layers(tasks):
+    """Group tasks into layers where each layer only depends on earlier layers.
+
+    Dependencies come from each task's explicit `context`; context entries that
+    are not part of `tasks` (e.g. already completed on resume) are ignored.
+
+    Returns:
+        list: Lists of tasks, in execution order
+    """
+    levels = []
+    for task in tasks:
+        deps = _dependencies(task, tasks)
+        for dep in deps:
+            if not any(dep is done for done, _ in levels):
+                raise ValueError(f"Task '{task.description[:40]}...' depends on a task listed after it")
+        level = max((lvl for done, lvl in levels if any(done is dep for dep in deps)), default=-1) + 1
+        levels.append((task, level))
+    layers = [[] for _ in range(max((lvl for _, lvl in levels), default=-1) + 1)]
+    for task, level in levels:
+        layers[level].append(task)
+    return layers
+
+
+def schedule_tasks(tasks):
+    """Order tasks by dependency layer and mark independent ones for async execution.
+
+    CrewAI runs consecutive async tasks concurrently and joins them at the next
+    synchronous task, so every multi-task layer is made async and the first
+    task of the following layer acts as the join. Two constraints of the
+    sequential process are respected: a multi-task layer directly after another
+    one starts with a synchronous task, and the crew ends with at most one
+    async task.
+
+    Args:
+        tasks (list): Tasks with explicit `context` declaring their real inputs
+
+    Returns:
+        list: The tasks in execution order, with `async_execution` set
+    """
+    layers = task_layers(tasks)
+    ordered = []
+    previous_async = False
+    for index, layer in enumerate(layers):
+        is_last = index == len(layers) - 1
+        for position, task in enumerate(layer):
+            task.async_execution = len(layer) > 1
+            if previous_async and position == 0:
+                task.async_execution = False
+            if is_last and position == len(layer) - 1 and len(layer) > 1:
+                task.async_execution = False
+            ordered.append(task)
+        previous_async = ordered[-1].async_execution
+    return ordered
+
+
+#--------------------------------#
+#          Run Timings           #
+#--------------------------------#
+TIMINGS_PATH = os.getenv("RUN_TIMINGS_PATH", "output/run_timings.jsonl")
+
+
+def record_run_timing(crew_type, execution_mode, seconds, task_count):
+    """Append one crew run's wall time to the timings log."""
+    directory = os.path.dirname(TIMINGS_PATH)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(TIMINGS_PATH, "a", encoding="utf-8") as f:
+        f.write(json.dumps({
+            "crew_type": crew_type,
+            "execution_mode": execution_mode,
+            "seconds": round(seconds, 3),
+            "task_count": task_count,
+            "timestamp": time.time(),
+        }) + "\n")
+
+
+def speedup_summary(crew_type, task_count):
+    """Compare median wall times of sequential and DAG runs of the same size.
+
+    Returns:
+        str: A one-line report, or an empty string until both modes have run
+    """
+    if not os.path.exists(TIMINGS_PATH):
+        return ""
+    timings = {"sequential": [], "dag": []}
+    with open(TIMINGS_PATH, encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            if entry["crew_type"] == crew_type and entry["task_count"] == task_count:
+                timings.setdefault(entry["execution_mode"], []).append(entry["seconds"])
+    if not timings["sequential"] or not timings["dag"]:
+        return ""
+    sequential = statistics.median(timings["sequential"])
+    dag = statistics.median(timings["dag"])
+    return (f"Median wall time: sequential {sequential:.1f}s ({len(timings['sequential'])} runs), "
+            f"DAG {dag:.1f}s ({len(timings['dag'])} runs), speed-up {sequential / dag:.2f}x")
@@ -0,0 +1,249 @@
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+#--------------------------------#
+#         Run Tracing            #
+#--------------------------------#
+TRACING = os.getenv("TRACING", "true").lower() in ("1", "true", "yes")
+TRACE_DIR = os.getenv("TRACE_DIR", ".cache/traces")
+# Spans kept per run; later spans are counted but dropped so a runaway crew cannot exhaust memory
+TRACE_MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", "10000"))
+
+# OpenTelemetry span kinds: calls that leave the process are clients
+_SPAN_KINDS = {"llm": "SPAN_KIND_CLIENT", "tool": "SPAN_KIND_CLIENT", "retrieval": "SPAN_KIND_CLIENT"}
+
+
+class RunTrace:
+    """Timed spans of one crew run: LLM requests, tool calls, retrieval and agent steps.
+
+    Recording a span is a clock read and a list append under a lock, so
+    tracing can stay on in production. Spans are written out once, when the
+    run finishes.
+
+    Args:
+        trace_id (str): 32 hex characters, e.g. a job id; random when omitted
+        name (str): Name of the run's root span
+    """
+
+    def __init__(self, trace_id=None, name="run"):
+        self.trace_id = trace_id or uuid.uuid4().hex
+        # A resumed job reuses its trace id, so span ids are unique per attempt
+        self.span_prefix = uuid.uuid4().hex[:8]
+        self.name = name
+        self.started = time.perf_counter()
+        self.started_ns = time.time_ns()
+        self.finished = None
+        self.spans = []
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def add_span(self, name, kind, start, end, error=None, **attributes):
+        """Record a finished span; `start` and `end` are `time.perf_counter()` values."""
+        span = {"name": name, "kind": kind, "start": round(start - self.started, 6),
+                "end": round(end - self.started, 6), "error": error, "attributes": attributes}
+        with self._lock:
+            if len(self.spans) < TRACE_MAX_SPANS:
+                self.spans.append(span)
+            else:
+                self.dropped += 1
+        return span
+
+    @contextmanager
+    def span(self, name, kind, **attributes):
+        """Time the enclosed block; the yielded dict takes attributes known only at the end."""
+        start = time.perf_counter()
+        error = None
+        try:
+            yield attributes
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self.add_span(name, kind, start, time.perf_counter(), error, **attributes)
+
+    def finish(self):
+        self.finished = time.perf_counter()
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.spans)
+
+    def breakdown(self):
+        """Return total seconds and span count per span kind."""
+        totals = {}
+        for span in self.snapshot():
+            total = totals.setdefault(span["kind"], {"seconds": 0.0, "spans": 0})
+            total["seconds"] += span["end"] - span["start"]
+            total["spans"] += 1
+        return totals
+
+    def to_otlp(self):
+        """Return the spans as OTLP/JSON span objects, the first being the run's root span."""
+        end = (self.finished or time.perf_counter()) - self.started
+        root_id = f"{self.span_prefix}{0:08x}"
+        spans = [_otlp_span(self, {"name": self.name, "kind": "run", "start": 0.0, "end": end, "error": None,
+                                   "attributes": {"spans.dropped": self.dropped}}, root_id, "")]
+        for number, span in enumerate(self.snapshot(), 1):
+            spans.append(_otlp_span(self, span, f"{self.span_prefix}{number:08x}", root_id))
+        return spans
+
+    def export(self, directory=TRACE_DIR):
+        """Append the run's spans to `<directory>/<trace id>.jsonl`, one OTLP/JSON span per line.
+
+        Returns:
+            str: Path of the trace file
+        """
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.trace_id}.jsonl")
+        with open(path, "a", encoding="utf-8") as f:
+            for span in self.to_otlp():
+                f.write(json.dumps(span) + "\n")
+        return path
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_span(trace, span, span_id, parent_id):
+    return {
+        "traceId": trace.trace_id,
+        "spanId": span_id,
+        "parentSpanId": parent_id,
+        "name": span["name"],
+        "kind": _SPAN_KINDS.get(span["kind"], "SPAN_KIND_INTERNAL"),
+        "startTimeUnixNano": str(trace.started_ns + int(span["start"] * 1e9)),
+        "endTimeUnixNano": str(trace.started_ns + int(span["end"] * 1e9)),
+        "attributes": [{"key": key, "value": _otlp_value(value)}
+                       for key, value in dict(span["attributes"], **{"span.kind": span["kind"]}).items()
+                       if value is not None],
+        "status": {"code": "STATUS_CODE_ERROR", "message": span["error"]} if span["error"] else {"code": "STATUS_CODE_OK"},
+    }
+
+
+#--------------------------------#
+#      Thread Trace Binding      #
+#--------------------------------#
+_local = threading.local()
+
+
+def current_trace():
+    """Return the trace of the run executing on this thread, if any."""
+    return getattr(_local, "trace", None)
+
+
+def current_agent():
+    """Return the role of the agent that last called its LLM on this thread, if known."""
+    return getattr(_local, "agent", None)
+
+
+@contextmanager
+def trace_scope(trace):
+    """Make `trace` the current thread's trace (e.g. in a job or worker thread)."""
+    previous = current_trace(), current_agent()
+    _local.trace, _local.agent = trace, None
+    try:
+        yield trace
+    finally:
+        _local.trace, _local.agent = previous
+
+
+def bind_thread(trace, agent):
+    """Attribute later spans on this thread to `trace` and `agent`.
+
+    Called by an agent's LLM at every request. CrewAI runs async tasks on
+    threads of its own, and the binding is what lets the tools an agent
+    calls there find the run they belong to.
+    """
+    _local.trace, _local.agent = trace, agent
+
+
+@contextmanager
+def traced(name, kind, **attributes):
+    """Record a span on the current thread's trace; does nothing outside a traced run."""
+    trace = current_trace()
+    if trace is None:
+        yield attributes
+        return
+    with trace.span(name, kind, agent=current_agent(), **attributes) as span:
+        yield span
+
+
+def traced_tool(run):
+    """Decorate a tool's `_run` so each call is recorded as a tool span."""
+    @functools.wraps(run)
+    def wrapper(self, *args, **kwargs):
+        with traced(self.name, "tool"):
+            return run(self, *args, **kwargs)
+    return wrapper
+
+
+#--------------------------------#
+#         LLM Usage Spans        #
+#--------------------------------#
+class UsageRecorder:
+    """Holds the token usage reported for one LLM call."""
+
+    def __init__(self):
+        self.usage = None
+
+    def log_success_event(self, kwargs, response_obj, start_time, end_time):
+        usage = response_obj.get("usage") if isinstance(response_obj, dict) else getattr(response_obj, "usage", None)
+        if usage is not None:
+            self.usage = usage
+
+
+class _UsageRouter:
+    """The one usage callback every LLM call is given.
+
+    CrewAI installs an LLM call's callbacks as LiteLLM's process-global
+    callbacks, so a recorder per call would be replaced by whichever call
+    started last. This router is the same object for every call; it reports
+    usage on the calling thread and is forwarded to the recorder that thread
+    bound with `record_usage`.
+    """
+
+    def log_success_event(self, kwargs, response_obj, start_time, end_time):
+        recorder = getattr(_local, "usage_recorder", None)
+        if recorder is not None:
+            recorder.log_success_event(kwargs, response_obj, start_time, end_time)
+
+
+usage_callback = _UsageRouter()
+
+
+@contextmanager
+def record_usage():
+    """Collect the usage `usage_callback` receives on this thread inside the block; yields a UsageRecorder."""
+    recorder, previous = UsageRecorder(), getattr(_local, "usage_recorder", None)
+    _local.usage_recorder = recorder
+    try:
+        yield recorder
+    finally:
+        _local.usage_recorder = previous
+
+
+def usage_tokens(usage):
+    """Return (input tokens, output tokens) from a LiteLLM usage object or dict."""
+    if usage is None:
+        return None, None
+    get = usage.get if isinstance(usage, dict) else lambda key: getattr(usage, key, None)
+    return get("prompt_tokens"), get("completion_tokens")
+
+
+def llm_span_attributes(model):
+    """OpenTelemetry GenAI attributes for a LiteLLM model name such as "openai/gpt-4"."""
+    provider, _, name = model.partition("/")
+    return {"gen_ai.system": provider if name else None, "gen_ai.request.model": name or model}
+
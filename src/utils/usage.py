@@ -0,0 +1,146 @@
+import json
+import os
+import threading
+from dotenv import load_dotenv
+load_dotenv()
+
+#--------------------------------#
+#     Token & Cost Accounting    #
+#--------------------------------#
+# USD per million input and output tokens; matched by the longest model-name prefix
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4": (30.00, 60.00),
+    "gpt-3.5-turbo": (0.50, 1.50),
+    "o1-mini": (1.10, 4.40),
+    "o1-preview": (15.00, 60.00),
+    "o1": (15.00, 60.00),
+    "o3-mini": (1.10, 4.40),
+    "claude-3-haiku": (0.25, 1.25),
+    "claude-3-sonnet": (3.00, 15.00),
+    "claude-3-opus": (15.00, 75.00),
+    "claude-3-5-haiku": (0.80, 4.00),
+    "claude-3-5-sonnet": (3.00, 15.00),
+    "gemini-1.5-pro": (1.25, 5.00),
+    "gemini-1.5-flash-8b": (0.0375, 0.15),
+    "gemini-1.5-flash": (0.075, 0.30),
+    "gemini-2.0-flash-lite": (0.075, 0.30),
+    "gemini-2.0-flash": (0.10, 0.40),
+}
+# Extra or corrected prices, e.g. LLM_PRICES='{"my-model": [1.0, 2.0]}'
+MODEL_PRICES.update({model: tuple(price) for model, price in json.loads(os.getenv("LLM_PRICES", "{}")).items()})
+
+
+class BudgetExceeded(RuntimeError):
+    """Raised before an LLM request once a run has used up its token or cost budget."""
+
+
+def model_price(model):
+    """Return (input, output) USD per million tokens for a LiteLLM model name, or None if unknown."""
+    provider, _, name = model.partition("/")
+    if provider == "ollama":
+        return 0.0, 0.0
+    name = name or model
+    matches = [prefix for prefix in MODEL_PRICES if name.startswith(prefix)]
+    return MODEL_PRICES[max(matches, key=len)] if matches else None
+
+
+def _env_number(name):
+    value = os.getenv(name)
+    return float(value) if value else None
+
+
+def crew_budget(crew_type):
+    """Return (token budget, cost budget in USD) for a crew type; None means unlimited.
+
+    `<CREW_TYPE>_TOKEN_BUDGET` and `<CREW_TYPE>_COST_BUDGET` (e.g.
+    DESIGN_THINKING_COST_BUDGET) override RUN_TOKEN_BUDGET and RUN_COST_BUDGET.
+    """
+    prefix = crew_type.upper()
+    tokens = _env_number(f"{prefix}_TOKEN_BUDGET") or _env_number("RUN_TOKEN_BUDGET")
+    cost = _env_number(f"{prefix}_COST_BUDGET") or _env_number("RUN_COST_BUDGET")
+    return (int(tokens) if tokens else None), cost
+
+
+class UsageMeter:
+    """Token and cost totals of one crew run, per task and overall, with optional budgets.
+
+    LLM clients bound to the run record every response's usage here and call
+    `check()` before each request, so a run that has spent its budget stops at
+    the next LLM call instead of in the middle of one.
+
+    Args:
+        token_budget (int): Maximum input plus output tokens, or None
+        cost_budget (float): Maximum cost in USD, or None
+    """
+
+    def __init__(self, token_budget=None, cost_budget=None):
+        self.token_budget = token_budget
+        self.cost_budget = cost_budget
+        self.total = _counter()
+        self.tasks = []
+        self.unpriced = set()
+        self._open = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_crew(cls, crew_type):
+        return cls(*crew_budget(crew_type))
+
+    def record(self, agent, model, tokens_in, tokens_out):
+        """Add one LLM response's usage to the run and to the agent's current task."""
+        tokens_in, tokens_out = tokens_in or 0, tokens_out or 0
+        price = model_price(model)
+        cost = (tokens_in * price[0] + tokens_out * price[1]) / 1e6 if price else 0.0
+        with self._lock:
+            if price is None:
+                self.unpriced.add(model)
+            for counter in (self.total, self._open.setdefault(agent, _counter())):
+                counter["calls"] += 1
+                counter["tokens_in"] += tokens_in
+                counter["tokens_out"] += tokens_out
+                counter["cost"] += cost
+
+    def check(self):
+        """Raise BudgetExceeded if the run has reached its token or cost budget."""
+        with self._lock:
+            tokens = self.total["tokens_in"] + self.total["tokens_out"]
+            cost = self.total["cost"]
+        if self.token_budget is not None and tokens >= self.token_budget:
+            raise BudgetExceeded(f"Token budget exhausted: {tokens} of {self.token_budget} tokens used")
+        if self.cost_budget is not None and cost >= self.cost_budget:
+            raise BudgetExceeded(f"Cost budget exhausted: ${cost:.4f} of ${self.cost_budget:.4f} used")
+
+    def close_task(self, agent, task):
+        """Attribute the agent's usage since its last finished task to `task`; returns that usage."""
+        with self._lock:
+            counter = self._open.pop(agent, None) or _counter()
+            self.tasks.append(dict(counter, agent=agent, task=task))
+        return counter
+
+    def rows(self):
+        """Return one row per finished task, one for usage not yet tied to a task, and the total."""
+        with self._lock:
+            rows = [dict(row) for row in self.tasks]
+            for agent, counter in self._open.items():
+                if counter["calls"]:
+                    rows.append(dict(counter, agent=agent, task="(unfinished)"))
+            rows.append(dict(self.total, agent="", task="Total"))
+        return rows
+
+    def summary(self):
+        """Render the usage per task as a markdown table."""
+        lines = ["| Task | Agent | Calls | Tokens in | Tokens out | Cost (USD) |",
+                 "|---|---|---:|---:|---:|---:|"]
+        for row in self.rows():
+            task = row["task"][:60].replace("|", "/")
+            lines.append(f"| {task} | {row['agent']} | {row['calls']} | {row['tokens_in']:,} | "
+                         f"{row['tokens_out']:,} | {row['cost']:.4f} |")
+        if self.unpriced:
+            lines.append(f"\nNo price known for {', '.join(sorted(self.unpriced))}; their cost is counted as 0.")
+        return "\n".join(lines)
+
+
+def _counter():
+    return {"calls": 0, "tokens_in": 0, "tokens_out": 0, "cost": 0.0}
@@ -1,14 +1,207 @@
 import streamlit as st
+import altair as alt
 from textwrap import dedent
 import os
+import uuid
 from src.components.sidebar import render_sidebar
-from src.components.researcher import create_researcher, create_research_task, run_research
-from src.components.design_thinking import create_design_thinking_crew, create_design_thinking_tasks, run_design_thinking
-from src.components.code_extractor import create_code_extractor_crew, run_code_extractor, create_code_extractor_tasks
-from src.utils.output_handler import capture_output
+from src.components.crew_jobs import run_stored_job
+from src.components.design_thinking import DESIGN_THINKING_TASK_COUNT
+from src.components.research_batch import parse_prompts, BATCH_CONCURRENCY, BATCH_OUTPUT_DIR, ARCHIVE_NAME
+from src.tools.code_sources import load_uploaded_sources, load_directory_sources
+from src.utils.job_runner import submit_job, get_job
+from src.utils.usage import BudgetExceeded
+from src.utils.rate_limit import limiter_stats
+from src.utils.job_store import get_job_store
+from src.utils.task_graph import speedup_summary
 from dotenv import load_dotenv
 load_dotenv()
 
+# Latest run events shown in a job's progress panel
+PROGRESS_EVENTS = 200
+# Latest spans drawn in a job's timing waterfall
+WATERFALL_SPANS = 300
+
+#--------------------------------#
+#        Crew Job Helpers        #
+#--------------------------------#
+def start_job(job_key, crew_type, params=None, job_id=None):
+    """Record a new durable job (or resume `job_id`) and run it on the worker pool."""
+    if job_id is None:
+        job_id = get_job_store().create_job(crew_type, params)
+    submit_job(run_stored_job, job_id, label=crew_type, job_id=job_id)
+    st.session_state[job_key] = job_id
+    st.session_state[f"{job_key}_rendered"] = False
+    # Keep the id in the URL so a browser refresh reattaches to the run
+    st.query_params["job"] = job_id
+
+def code_extractor_params(selection, user_prompt, uploaded_files, source_directory):
+    """Chunk the uploaded files, zip archives and directory into job parameters.
+
+    A single file keeps the single-file pipeline; several files switch the job
+    to repository mode, which analyzes files in parallel.
+    """
+    sources = load_uploaded_sources(uploaded_files or [])
+    if source_directory:
+        sources += load_directory_sources(source_directory)
+    params = {"selection": selection, "user_prompt": user_prompt}
+    if len(sources) == 1:
+        params["code_chunks"] = sources[0]["chunks"]
+        params["source_path"] = sources[0]["path"]
+    elif sources:
+        params["sources"] = sources
+    return params
+
+def render_stored_job(job_key, crew_type, job_id, done_label):
+    """Render a job that has no live worker: a finished result or a resumable run."""
+    stored = get_job_store().get_job(job_id)
+    if stored is None or stored["crew_type"] != crew_type:
+        return None
+    st.session_state[job_key] = job_id
+    if stored["status"] == "completed":
+        st.status(done_label, state="complete", expanded=False)
+        return stored["result"]
+
+    total = stored["total_tasks"] or "?"
+    st.warning(f"⏸️ The previous run stopped after {stored['completed_tasks']} of {total} tasks.")
+    if stored["error"]:
+        st.caption(f"Last error: {stored['error']}")
+    if st.button("▶️ Resume Run", key=f"{job_key}_resume"):
+        start_job(job_key, crew_type, job_id=job_id)
+        st.rerun()
+    return None
+
+def format_event(event):
+    """Render one structured run event as a markdown line."""
+    at = f"`{event['at']:7.1f}s`"
+    if event["kind"] == "agent_started":
+        return f"{at} 🤖 **{event['agent']}** started: {event['task']}"
+    if event["kind"] == "tool_call":
+        return f"{at} 🔧 {event['agent']} used **{event['tool']}** ({event['seconds']:.1f}s)"
+    if event["kind"] == "final_answer":
+        return f"{at} 💡 {event['agent']} reached a final answer ({event['seconds']:.1f}s)"
+    if event["kind"] == "task_finished":
+        tokens = f", {event['tokens']:,} tokens" if event.get("tokens") else ""
+        return f"{at} ✅ {event['agent']} finished a task ({event['seconds']:.1f}s{tokens})"
+    if event["kind"] == "llm_fallback":
+        return f"{at} ↪️ {event['agent'] or 'LLM'} routed to **{event['model']}**: {event['reason']}"
+    return f"{at} {event['kind']}"
+
+def render_trace(trace):
+    """Show where a run's time went: seconds per span kind and a timing waterfall."""
+    spans = trace.snapshot()
+    if not spans:
+        return
+    breakdown = trace.breakdown()
+    columns = st.columns(len(breakdown))
+    for column, (kind, total) in zip(columns, sorted(breakdown.items())):
+        column.metric(kind, f"{total['seconds']:.1f}s", f"{total['spans']} spans", delta_color="off")
+    rows = [{"span": span["name"][:60], "kind": span["kind"], "agent": span["attributes"].get("agent") or "",
+             "start": span["start"], "end": span["end"], "seconds": round(span["end"] - span["start"], 3),
+             "tokens in": span["attributes"].get("gen_ai.usage.input_tokens"),
+             "tokens out": span["attributes"].get("gen_ai.usage.output_tokens")}
+            for span in spans[-WATERFALL_SPANS:]]
+    for number, row in enumerate(rows):
+        row["row"] = f"{number:04d} {row['agent']}: {row['span']}"
+    chart = alt.Chart(alt.Data(values=rows)).mark_bar().encode(
+        x=alt.X("start:Q", title="seconds since start"),
+        x2="end:Q",
+        y=alt.Y("row:N", sort=None, axis=None),
+        color="kind:N",
+        tooltip=["span:N", "agent:N", "kind:N", "seconds:Q", "tokens in:Q", "tokens out:Q"],
+    ).properties(height=max(120, 16 * len(rows)))
+    st.altair_chart(chart, use_container_width=True)
+
+def render_usage(usage):
+    """Show a run's token use and cost per task, and how much of its budget is spent."""
+    total = usage.total
+    if usage.token_budget:
+        tokens = total["tokens_in"] + total["tokens_out"]
+        st.progress(min(tokens / usage.token_budget, 1.0), f"{tokens:,} of {usage.token_budget:,} tokens")
+    if usage.cost_budget:
+        st.progress(min(total["cost"] / usage.cost_budget, 1.0), f"${total['cost']:.4f} of ${usage.cost_budget:.4f}")
+    st.dataframe(usage.rows(), hide_index=True, use_container_width=True,
+                 column_order=["task", "agent", "calls", "tokens_in", "tokens_out", "cost"])
+    if usage.unpriced:
+        st.caption(f"No price known for {', '.join(sorted(usage.unpriced))}; their cost is counted as 0.")
+
+def render_batch_download(job_key):
+    """Offer the combined archive of a research batch once it has been written."""
+    job_id = st.session_state.get(job_key)
+    stored = get_job_store().get_job(job_id) if job_id else None
+    if stored is None or stored["crew_type"] != "research_batch":
+        return
+    archive_path = os.path.join(stored["params"]["output_dir"], ARCHIVE_NAME)
+    if os.path.exists(archive_path):
+        with open(archive_path, "rb") as f:
+            st.download_button(
+                label="📦 Download All Reports",
+                data=f.read(),
+                file_name=ARCHIVE_NAME,
+                mime="application/zip",
+                help="Every report, a combined markdown file and the per-prompt results"
+            )
+
+def render_job(job_key, crew_type, running_label, done_label):
+    """Poll the session's background job and render its progress.
+
+    Only this fragment reruns while the crew works, so the rest of the page
+    stays interactive. Returns the result text once the job has completed.
+    """
+    job_id = st.session_state.get(job_key) or st.query_params.get("job")
+    if not job_id:
+        return None
+    job = get_job(job_id)
+    if job is None:
+        return render_stored_job(job_key, crew_type, job_id, done_label)
+    if job.label != crew_type:
+        return None
+
+    @st.fragment(run_every=None if job.done else 1.0)
+    def job_progress():
+        if job.done:
+            # Switch to a full rerun once so the final result renders outside the fragment
+            if not st.session_state.get(f"{job_key}_rendered"):
+                st.session_state[f"{job_key}_rendered"] = True
+                st.rerun()
+        state = {"completed": "complete", "failed": "error"}.get(job.status, "running")
+        label = {
+            "queued": "⏳ Waiting for a free worker...",
+            "completed": done_label,
+            "failed": "❌ Error occurred",
+        }.get(job.status, running_label)
+        with st.status(f"{label} ({job.elapsed:.0f}s)", expanded=not job.done, state=state):
+            events = job.events.since(0)
+            if events:
+                progress_container = st.container(height=300, border=True)
+                progress_container.markdown("  \n".join(format_event(event) for event in events[-PROGRESS_EVENTS:]))
+            if not job.done:
+                for stats in limiter_stats():
+                    if stats["queued"]:
+                        st.caption(f"🚦 {stats['queued']} LLM requests waiting for {stats['limiter']} quota "
+                                   f"({stats['in_flight']} in flight, all sessions)")
+            if job.trace is not None:
+                with st.expander("⏱️ Timing breakdown"):
+                    render_trace(job.trace)
+            if job.usage is not None and job.usage.total["calls"]:
+                with st.expander(f"💰 Token usage (${job.usage.total['cost']:.4f})"):
+                    render_usage(job.usage)
+            with st.expander("Process output", expanded=not events):
+                # Persistent container for process output with fixed height.
+                process_container = st.container(height=300, border=True)
+                process_container.text(job.log.value)
+
+    job_progress()
+    if job.status == "failed":
+        if isinstance(job.error, BudgetExceeded):
+            st.warning(f"🛑 Run stopped: {job.error}. Completed tasks are kept and the run can be resumed.")
+        else:
+            st.error(f"An error occurred: {str(job.error)}")
+        return render_stored_job(job_key, crew_type, job_id, done_label)
+    if job.status == "completed":
+        # Convert CrewOutput to string for display and download
+        return str(job.result)
+    return None
+
 #--------------------------------#
 #         Streamlit App          #
 #--------------------------------#
@@ -52,54 +245,78 @@ if selection["agentic_option"] == "research_assistant":
     # Create two columns for the input section
     input_col1, input_col2, input_col3 = st.columns([1, 3, 1])
     with input_col2:
-        user_prompt = st.text_area(
-            "What would you like to research?",
-            value="Research the latest AI Agent news in February 2025 and summarize each.",
-            height=68
-        )
-
-    col1, col2, col3 = st.columns([1, 0.5, 1])
-    with col2:
-        start_research = st.button("🚀 Start Research", use_container_width=False, type="primary")
+        batch_mode = st.toggle("Batch mode", help="Research every prompt of a CSV or JSONL file in one run")
+        if batch_mode:
+            prompt_file = st.file_uploader(
+                "Upload prompts (CSV with a \"prompt\" column and optional \"id\" column, or JSONL)",
+                type=["csv", "jsonl", "ndjson"]
+            )
+            concurrency = st.slider("Prompts researched at once", 1, 16, BATCH_CONCURRENCY)
+            runs_per_minute = st.number_input("Maximum runs started per minute (0 = no limit)", min_value=0, value=0)
+        else:
+            user_prompt = st.text_area(
+                "What would you like to research?",
+                value="Research the latest AI Agent news in February 2025 and summarize each.",
+                height=68
+            )
 
-    if start_research:
-        with st.status("🤖 Researching...", expanded=True) as status:
+    if batch_mode:
+        col1, col2, col3 = st.columns([1, 0.5, 1])
+        with col2:
+            start_batch = st.button("🚀 Start Batch", use_container_width=False, type="primary",
+                                    disabled=prompt_file is None)
+        if start_batch:
             try:
-                # Create persistent container for process output with fixed height.
-                process_container = st.container(height=300, border=True)
-                output_container = process_container.container()
-
-                # Single output capture context.
-                with capture_output(output_container):
-                    researcher = create_researcher(selection)
-                    task = create_research_task(researcher, user_prompt)
-                    result = run_research(researcher, task)
-                    status.update(label="✅ Research completed!", state="complete", expanded=False)
-            except Exception as e:
-                status.update(label="❌ Error occurred", state="error")
-                st.error(f"An error occurred: {str(e)}")
-                st.stop()
+                prompts = parse_prompts(prompt_file.name, prompt_file.getvalue())
+            except ValueError as e:
+                st.error(f"Could not read the prompt file: {e}")
+                prompts = None
+            if prompts == []:
+                st.warning("⚠️ The file contains no prompts")
+            elif prompts:
+                # One directory per job, so batches started in the same second never share reports
+                job_id = uuid.uuid4().hex
+                get_job_store().create_job("research_batch", {
+                    "selection": selection,
+                    "prompts": prompts,
+                    "concurrency": concurrency,
+                    "runs_per_minute": runs_per_minute,
+                    "output_dir": os.path.join(BATCH_OUTPUT_DIR, job_id),
+                }, job_id)
+                start_job("research_batch_job", "research_batch", job_id=job_id)
 
-        # Convert CrewOutput to string for display and download
-        result_text = str(result)
+        result_text = render_job("research_batch_job", "research_batch", "🤖 Researching the batch...",
+                                 "✅ Batch completed!")
+        render_batch_download("research_batch_job")
+        if result_text is not None:
+            st.markdown(result_text)
+    else:
+        col1, col2, col3 = st.columns([1, 0.5, 1])
+        with col2:
+            start_research = st.button("🚀 Start Research", use_container_width=False, type="primary")
 
-        # Display the final result
-        st.markdown(result_text)
+        if start_research:
+            start_job("research_job", "research", {"selection": selection, "user_prompt": user_prompt})
 
-        # Create download buttons
-        st.divider()
-        download_col1, download_col2, download_col3 = st.columns([1, 2, 1])
-        with download_col2:
-            st.markdown("### 📥 Download Research Report")
+        result_text = render_job("research_job", "research", "🤖 Researching...", "✅ Research completed!")
+        if result_text is not None:
+            # Display the final result
+            st.markdown(result_text)
 
-            # Download as Markdown
-            st.download_button(
-                label="Download Report",
-                data=result_text,
-                file_name="research_report.md",
-                mime="text/markdown",
-                help="Download the research report in Markdown format"
-            )
+            # Create download buttons
+            st.divider()
+            download_col1, download_col2, download_col3 = st.columns([1, 2, 1])
+            with download_col2:
+                st.markdown("### 📥 Download Research Report")
+
+                # Download as Markdown
+                st.download_button(
+                    label="Download Report",
+                    data=result_text,
+                    file_name="research_report.md",
+                    mime="text/markdown",
+                    help="Download the research report in Markdown format"
+                )
 elif selection["agentic_option"] == "design_thinking":
     # Create two columns for the input section
     input_col1, input_col2, input_col3 = st.columns([1, 3, 1])
@@ -114,25 +331,14 @@ elif selection["agentic_option"] == "design_thinking":
     with col2:
         start_design_thinking = st.button("🚀 Start Design Thinking", use_container_width=False, type="primary")
     if start_design_thinking:
-        with st.status("🤖 Researching...", expanded=True) as status:
-            try:
-                # Create persistent container for process output with fixed height.
-                process_container = st.container(height=300, border=True)
-                output_container = process_container.container()
-
-                # Single output capture context.
-                with capture_output(output_container):
-                    agents = create_design_thinking_crew(selection)
-                    tasks = create_design_thinking_tasks(agents, user_prompt)
-                    result = run_design_thinking(agents, tasks)
-                    status.update(label="✅ Research completed!", state="complete", expanded=False)
-            except Exception as e:
-                status.update(label="❌ Error occurred", state="error")
-                st.error(f"An error occurred: {str(e)}")
-                st.stop()
+        start_job("design_thinking_job", "design_thinking", {"selection": selection, "user_prompt": user_prompt})
 
-        # Convert CrewOutput to string for display and download
-        result_text = str(result)
+    result_text = render_job("design_thinking_job", "design_thinking", "🤖 Researching...", "✅ Research completed!")
+    if result_text is not None:
+        # Report how the parallel (DAG) mode compares with sequential runs
+        timing_summary = speedup_summary("design_thinking", DESIGN_THINKING_TASK_COUNT)
+        if timing_summary:
+            st.caption(f"⏱️ {timing_summary}")
 
         # Display the final result
         st.markdown(result_text)
@@ -160,34 +366,37 @@ elif selection["agentic_option"] == "code_extractor":
             value=dedent("""The attached code is for a Battery Management System (BMS) for an electric vehicle. It includes features such as cell balancing, temperature monitoring, and state-of-charge estimation."""),
             height=68
         )
-        uploaded_file = st.file_uploader("Select code file(s) or repository", accept_multiple_files=False)
-        code_file = uploaded_file.read().decode("utf-8") if uploaded_file else None
+        uploaded_files = st.file_uploader(
+            "Select code file(s) or repository",
+            type=["c", "h", "zip"],
+            accept_multiple_files=True,
+            help="Upload one or more C files, or a zip of a repository"
+        )
+        source_directory = st.text_input(
+            "...or a directory on the server",
+            value="",
+            placeholder="input/code_extractor_repo/",
+            help="Path relative to the app directory; every .c and .h file below it is analyzed"
+        )
 
         col1, col2, col3 = st.columns([1, 0.5, 1])
         with col2:
             start_code_extractor = st.button("🚀 Start Code Extractor", use_container_width=False, type="primary")
 
         if start_code_extractor:
-            with st.status("🤖 Extracting...", expanded=True) as status:
-                try:
-                    # Create persistent container for process output with fixed height.
-                    process_container = st.container(height=300, border=True)
-                    output_container = process_container.container()
-
-                    # Single output capture context.
-                    with capture_output(output_container):
-                        agents = create_code_extractor_crew(selection, code_file)
-                        tasks = create_code_extractor_tasks(agents, user_prompt)
-                        result = run_code_extractor(agents, tasks)
-                        status.update(label="✅ Research completed!", state="complete", expanded=False)
-                except Exception as e:
-                    status.update(label="❌ Error occurred", state="error")
-                    st.error(f"An error occurred: {str(e)}")
-                    st.stop()
-
-            # Convert CrewOutput to string for display and download
-            result_text = str(result)
+            # Sources are only read and chunked on submit, not on every rerun
+            try:
+                params = code_extractor_params(selection, user_prompt, uploaded_files, source_directory)
+            except ValueError as e:
+                params = None
+                st.error(str(e))
+            if params is not None and "code_chunks" not in params and "sources" not in params:
+                st.warning("⚠️ Please upload a code file or choose a directory to extract requirements from")
+            elif params is not None:
+                start_job("code_extractor_job", "code_extractor", params)
 
+        result_text = render_job("code_extractor_job", "code_extractor", "🤖 Extracting...", "✅ Research completed!")
+        if result_text is not None:
             # Display the final result
             st.markdown(result_text)
 
@@ -0,0 +1,35 @@
+from src.tools.c_parser import parse_c_source
+from src.tools.code_chunker import iter_units
+
+TAGGED_RETURN_TYPES = """struct point { int x; int y; };
+enum color { RED, GREEN };
+/* Allocates a point (x, y) */
+struct point *make_point(int x, int y) {
+    struct point *p = malloc(sizeof *p);
+    p->x = x;
+    return p;
+}
+enum color get(void) { return RED; }
+static const struct point origin = { 0, 0 };
+"""
+
+
+def test_functions_returning_struct_or_enum_are_functions():
+    result = parse_c_source(TAGGED_RETURN_TYPES)
+    assert list(result["functions"]) == ["make_point", "get"]
+    assert result["functions"]["make_point"]["return_type"] == "struct point*"
+    assert result["functions"]["make_point"]["calls"] == ["malloc"]
+    assert result["functions"]["get"]["return_type"] == "enum color"
+
+
+def test_functions_returning_struct_or_enum_leave_types_alone():
+    result = parse_c_source(TAGGED_RETURN_TYPES)
+    assert [member["name"] for member in result["types"]["point"]["members"]] == ["x", "y"]
+    assert [member["name"] for member in result["types"]["color"]["members"]] == ["RED", "GREEN"]
+    assert "origin" in result["globals"]
+    assert result["unparsed"] == []
+
+
+def test_chunker_names_function_units_by_shape():
+    functions = [unit["function"] for unit in iter_units(TAGGED_RETURN_TYPES.splitlines(keepends=True))]
+    assert functions == [None, None, "make_point", "get", None]
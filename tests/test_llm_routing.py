@@ -0,0 +1,96 @@
+import threading
+from io import StringIO
+import pytest
+
+# The output capture used for streaming lives next to the Streamlit output handler
+pytest.importorskip("streamlit")
+
+from src.utils.llm_routing import route
+from src.utils.output_handler import capture_thread_output
+from src.utils.usage import BudgetExceeded
+
+
+class ContextWindowExceededError(Exception):
+    pass
+
+
+def answer(text, calls):
+    def call():
+        calls.append(text)
+        return text
+    return call
+
+
+def fail(error, calls, name):
+    def call():
+        calls.append(name)
+        raise error
+    return call
+
+
+def test_falls_back_when_an_attempt_fails():
+    calls = []
+    result = route([("a", fail(RuntimeError("down"), calls, "a")), ("b", answer("b", calls))], slo=None)
+    assert result == "b"
+    assert calls == ["a", "b"]
+
+
+def test_slow_attempt_escalates_and_first_answer_wins():
+    # "a" only answers once "b" has been started, so the SLO must have escalated
+    barrier = threading.Barrier(2, timeout=5)
+    released = threading.Event()
+
+    def slow_first():
+        barrier.wait()
+        return "a"
+
+    def backup():
+        barrier.wait()
+        released.wait(5)
+        return "b"
+
+    try:
+        assert route([("a", slow_first), ("b", backup)], slo=0.05) == "a"
+    finally:
+        released.set()
+
+
+def test_backup_answer_wins_over_a_stuck_attempt():
+    released = threading.Event()
+
+    def stuck():
+        released.wait(5)
+        return "a"
+
+    try:
+        assert route([("a", stuck), ("b", lambda: "b")], slo=0.05) == "b"
+    finally:
+        released.set()
+
+
+@pytest.mark.parametrize("error", [BudgetExceeded("budget"), ContextWindowExceededError("too long")])
+def test_errors_no_other_model_can_fix_are_not_retried(error):
+    calls = []
+    with pytest.raises(type(error)):
+        route([("a", fail(error, calls, "a")), ("b", answer("b", calls))], slo=None)
+    assert calls == ["a"]
+
+
+def test_only_the_first_attempt_streams():
+    barrier = threading.Barrier(2, timeout=5)
+
+    def first():
+        barrier.wait()
+        print("first answer")
+        return "a"
+
+    def backup():
+        print("backup answer")
+        barrier.wait()
+        return "b"
+
+    sink = StringIO()
+    with capture_thread_output(sink):
+        route([("a", first), ("b", backup)], slo=0.05)
+    assert "first answer" in sink.getvalue()
+    assert "backup answer" not in sink.getvalue()
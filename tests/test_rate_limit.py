@@ -0,0 +1,83 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from src.utils.rate_limit import RateLimiter
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after):
+        super().__init__("429 Too Many Requests")
+        self.response = type("Response", (), {"headers": {"retry-after": str(retry_after)}})()
+
+
+def wait_for_queue(limiter, length):
+    deadline = time.monotonic() + 5
+    while len(limiter._queue) < length:
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_queue_is_served_in_arrival_order():
+    # 100 tokens per second: the head needs half a second, the request behind it almost nothing
+    limiter = RateLimiter("test", tpm=6000)
+    limiter.acquire(limiter.tokens.capacity)
+    limiter.release(limiter.tokens.capacity)
+    served = []
+
+    def request(name, tokens):
+        limiter.acquire(tokens)
+        served.append(name)
+        limiter.release(tokens)
+
+    large = threading.Thread(target=request, args=("large", 50))
+    large.start()
+    wait_for_queue(limiter, 1)
+    small = threading.Thread(target=request, args=("small", 1))
+    small.start()
+    large.join(5)
+    small.join(5)
+    assert served == ["large", "small"]
+
+
+def test_concurrency_cap_holds():
+    limiter = RateLimiter("test", concurrency=2)
+    barrier = threading.Barrier(6, timeout=5)
+    lock = threading.Lock()
+    in_flight = peak = 0
+
+    def request(_):
+        nonlocal in_flight, peak
+        barrier.wait()
+        with limiter.slot(1):
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            time.sleep(0.02)
+            with lock:
+                in_flight -= 1
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        list(pool.map(request, range(6)))
+    assert peak == 2
+    assert limiter.stats()["served"] == 6
+
+
+def test_429_pauses_the_queue_for_retry_after():
+    limiter = RateLimiter("test", rpm=6000)
+    with pytest.raises(RateLimitError):
+        with limiter.slot(1):
+            raise RateLimitError(retry_after=0.3)
+    assert limiter.acquire(1) >= 0.25
+    assert limiter.stats()["throttled"] == 1
+
+
+@pytest.mark.parametrize("used, level", [(100, 900), (800, 200), (None, 500)])
+def test_release_settles_the_estimate_against_usage(used, level):
+    limiter = RateLimiter("test", tpm=6000)
+    limiter.acquire(500)
+    limiter.release(500, used)
+    assert limiter.tokens.level == pytest.approx(level)
+    assert limiter.in_flight == 0
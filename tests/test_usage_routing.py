@@ -0,0 +1,37 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from src.utils.tracing import usage_callback, record_usage, usage_tokens
+
+# Stands in for LiteLLM's process-global callback list, which CrewAI overwrites at every call
+global_callbacks = []
+
+
+def fake_llm_call(callbacks, usage, barrier):
+    """Mimic CrewAI's LLM.call: install the callbacks globally, then report usage to them."""
+    global_callbacks[:] = callbacks
+    # Both calls are in flight before either reports, so the last installed callbacks are shared
+    barrier.wait()
+    for callback in list(global_callbacks):
+        callback.log_success_event(kwargs={}, response_obj={"usage": usage}, start_time=0, end_time=0)
+
+
+def metered_call(usage, barrier):
+    with record_usage() as recorder:
+        fake_llm_call([usage_callback], usage, barrier)
+    return usage_tokens(recorder.usage)
+
+
+def test_concurrent_calls_get_their_own_usage():
+    barrier = threading.Barrier(2)
+    first = {"prompt_tokens": 11, "completion_tokens": 1}
+    second = {"prompt_tokens": 22, "completion_tokens": 2}
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        results = list(pool.map(metered_call, (first, second), (barrier, barrier)))
+    assert results == [(11, 1), (22, 2)]
+
+
+def test_usage_outside_a_recorded_call_is_ignored():
+    usage_callback.log_success_event(kwargs={}, response_obj={"usage": {"prompt_tokens": 5}}, start_time=0, end_time=0)
+    with record_usage() as recorder:
+        pass
+    assert recorder.usage is None